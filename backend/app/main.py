@@ -8,6 +8,10 @@ from app.routers.common import auth, users, posts, messages, translate, paraphra
 from app.routers.codespace import analyze_command, execute_command, conversations
 from app.routers.voice import voice, google_speech
 from app.database.connection import engine, Base
+from app.services.session_workers import get_session_worker_pool
+from app.services.exec_pool import get_exec_pool
+from app.services.http_clients import get_http_pool, close_http_pool
+from app.services.session_state import get_session_state_store
 
 from app.routers.turtle import turtle_execute
 
@@ -16,7 +20,9 @@ Base.metadata.create_all(bind=engine)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
-    prewarm_enabled = os.getenv("PREWARM_MODELS", "true").lower() == "true"
+    # off by default: every web worker would load its own copy of Whisper;
+    # enable it where voice inference runs in-process
+    prewarm_enabled = os.getenv("PREWARM_MODELS", "false").lower() == "true"
 
     if prewarm_enabled:
         print("\nStarting pre-warming in background...")
@@ -31,9 +37,17 @@ async def lifespan(app: FastAPI):
     else:
         print("\nPre-warming disabled (set PREWARM_MODELS=true to enable)")
 
+    # fork the /execute_simple interpreters before the first burst of "Run" clicks
+    get_exec_pool()
+
     yield
 
     print("\nShutting down Py-Talk API...")
+    for pool in (get_session_worker_pool(), get_exec_pool()):
+        if pool is not None:
+            pool.shutdown()
+    await close_http_pool()
+    get_session_state_store().flush_all()
 
 app = FastAPI(
     title="Py-Talk API",
@@ -72,6 +86,16 @@ async def root():
 async def health_check():
     return {"status": "healthy", "message": "API is running successfully"}
 
+@app.get("/http_stats")
+async def http_stats():
+    """Outbound keep-alive client pool: per-host requests, errors and latency"""
+    return get_http_pool().get_stats()
+
+@app.get("/state_stats")
+async def state_stats():
+    """Session state store: memory hits, disk reads and writes"""
+    return get_session_state_store().get_stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
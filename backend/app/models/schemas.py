@@ -116,6 +116,16 @@ class AnalyzeCommandRequest(BaseModel):
     command: str
     language: Optional[str] = "en"
     
+class AnalyzeBatchItem(BaseModel):
+    command: str
+    conversation_id: Optional[int] = None  # falls back to AnalyzeBatchRequest.conversation_id
+
+class AnalyzeBatchRequest(BaseModel):
+    conversation_id: Optional[int] = None
+    commands: List[str] = []
+    items: List[AnalyzeBatchItem] = []
+    language: Optional[str] = "en"
+
 class UndoRequest(BaseModel):
     conversation_id: int
 
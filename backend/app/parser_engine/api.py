@@ -4,7 +4,7 @@ from __future__ import annotations
 from typing import Any, Dict, Optional
 import threading
 
-from app.parser_engine.lex_alz import setup_nltk
+from app.parser_engine.lex_alz import setup_nltk, analyze_sentences
 from app.parser_engine.phase2_domain import load_domain
 from app.parser_engine import main_process
 
@@ -56,14 +56,7 @@ def _build_constructor_executable(object_name: str, class_name: str, constructor
 
     return f"{object_name} = {class_name}({', '.join(parts)})"
 
-def compile_single(command_text: str, module_path: str) -> Dict[str, Any]:
-    """
-    Deterministic compile (no AI model):
-      NL command -> (lex -> domain -> grammar -> code)
-
-    Returns dict used by analyze_command.py.
-    """
-    _ensure_nltk()
+def _clean_command_text(command_text: str) -> str:
     command_text = (command_text or "").strip()
 
     # remove only trailing sentence period
@@ -72,6 +65,26 @@ def compile_single(command_text: str, module_path: str) -> Dict[str, Any]:
     # keeps decimals like 3.14 inside text untouched
     if command_text.endswith("."):
         command_text = command_text[:-1].strip()
+    return command_text
+
+
+def compile_single(
+    command_text: str,
+    module_path: str,
+    lex_tokens: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    Deterministic compile (no AI model):
+      NL command -> (lex -> domain -> grammar -> code)
+
+    lex_tokens: optional pre-tagged tokens for an already-cleaned
+    command_text (see compile_batch); skips tokenising/tagging again.
+
+    Returns dict used by analyze_command.py.
+    """
+    _ensure_nltk()
+    if lex_tokens is None:
+        command_text = _clean_command_text(command_text)
 
     # ---- HARDCASE: turtle creation -> emit assignment line (no file read) ----
     # This runs BEFORE load_domain/main_process, so turtle creation follows preset rules only.
@@ -106,7 +119,7 @@ def compile_single(command_text: str, module_path: str) -> Dict[str, Any]:
         print(a, "=>", info.get("phrases"))
     print()
 
-    out = main_process.run(command_text, module_path)
+    out = main_process.run(command_text, module_path, lex_tokens=lex_tokens)
     if not out:
         return {"status": "no_match", "explanation": "Empty parser output", "meta": {}}
 
@@ -201,6 +214,32 @@ def compile_single(command_text: str, module_path: str) -> Dict[str, Any]:
         },
     }
 
+def compile_batch(command_texts: List[str], module_path: str) -> List[Dict[str, Any]]:
+    """
+    Compile many commands against one module.
+
+    NLTK setup and the domain load happen once, and every command that
+    reaches the parser is tokenised + tagged in a single batched pass.
+    Results are in input order, same shape as compile_single().
+    """
+    _ensure_nltk()
+    load_domain(module_path)
+
+    cleaned = [_clean_command_text(c) for c in command_texts]
+
+    # turtle-creation hardcase never reaches the tagger
+    to_tag = [i for i, c in enumerate(cleaned) if c and not _looks_like_turtle_create(c)]
+    tagged = analyze_sentences([cleaned[i] for i in to_tag]) if to_tag else []
+    tokens_by_idx = dict(zip(to_tag, tagged))
+
+    results: List[Dict[str, Any]] = []
+    for i, raw in enumerate(command_texts):
+        if i in tokens_by_idx:
+            results.append(compile_single(cleaned[i], module_path, lex_tokens=tokens_by_idx[i]))
+        else:
+            results.append(compile_single(raw, module_path))
+    return results
+
 def apply_followup(pending: dict, answer_text: str, module_path: str) -> Dict[str, Any]:
     """
     User answered a missing-argument question.
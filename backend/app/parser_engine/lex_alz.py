@@ -2,6 +2,8 @@ import re
 import nltk
 from nltk.corpus import wordnet as wn
 from typing import List, Dict
+
+from app.parser_engine.synonyms import get_synonyms as _cached_synonyms
 # from num2words import num2words
 import ssl
 
@@ -86,27 +88,11 @@ POS_TO_WN = {
 
 
 def get_synonyms(word: str, pos: str, limit: int = 10) -> List[str]:
-    if pos == "NUMBER":
-        return []
-
-    wn_pos = POS_TO_WN.get(pos)
-    synsets = wn.synsets(word, pos=wn_pos) if wn_pos else wn.synsets(word)
-
-    synonyms = set()
-    for syn in synsets:
-        for lemma in syn.lemmas():
-            name = lemma.name().replace("_", " ").lower()
-            if name != word.lower():
-                synonyms.add(name)
-
-    return sorted(synonyms)[:limit]
-
+    # cached + precomputed table, see synonyms.py
+    return _cached_synonyms(word, pos, limit)
 
-def analyze_sentence(sentence: str) -> List[Dict]:
-    sentence = _words_to_numbers(sentence)
-    tokens = nltk.word_tokenize(sentence)
-    tagged = nltk.pos_tag(tokens)
 
+def _tagged_to_tokens(tagged) -> List[Dict]:
     result = []
     for word, penn_tag in tagged:
         simple_pos = penn_to_simple(penn_tag, word)
@@ -124,6 +110,23 @@ def analyze_sentence(sentence: str) -> List[Dict]:
 
     return result
 
+
+def analyze_sentence(sentence: str) -> List[Dict]:
+    sentence = _words_to_numbers(sentence)
+    tokens = nltk.word_tokenize(sentence)
+    tagged = nltk.pos_tag(tokens)
+    return _tagged_to_tokens(tagged)
+
+
+def analyze_sentences(sentences: List[str]) -> List[List[Dict]]:
+    """
+    Batch version of analyze_sentence(): tokenise every sentence, then tag
+    the whole batch with a single pos_tag_sents() call.
+    """
+    token_lists = [nltk.word_tokenize(_words_to_numbers(s)) for s in sentences]
+    tagged_lists = nltk.pos_tag_sents(token_lists)
+    return [_tagged_to_tokens(tagged) for tagged in tagged_lists]
+
 if __name__ == "__main__":
     # Example usage
     import json
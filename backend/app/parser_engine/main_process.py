@@ -421,9 +421,12 @@ def _clean_string_args(args: Dict[str, Any], action: Optional[str]) -> Dict[str,
 # ------------------------------------------------------------
 # Main pipeline
 # ------------------------------------------------------------
-def run(sentence: str, py_file: str) -> List[Dict[str, Any]]:
-    # Process 1
-    lex_tokens = analyze_sentence(sentence)
+def run(sentence: str,
+        py_file: str,
+        lex_tokens: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    # Process 1 (skipped when the caller already tagged the sentence)
+    if lex_tokens is None:
+        lex_tokens = analyze_sentence(sentence)
 
     # Process 2: domain + semantic token tagging
     domain = load_domain(py_file)
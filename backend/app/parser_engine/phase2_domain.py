@@ -5,10 +5,15 @@ from typing import Dict, List, Set, Optional, Any, Tuple
 import re
 import time
 
-# from lex_alz import get_synonyms
+from app.parser_engine.synonyms import get_synonyms as _cached_synonyms
 
 DOMAIN_CACHE: Dict[str, Dict[str, Any]] = {}
 
+# WordNet synonyms in phase-2 matching. This tier never matched before the
+# synonym service existed (wn was undefined here), so it stays off unless
+# enabled explicitly: turning it on changes phase-2 match results.
+PHASE2_WORDNET_SYNONYMS = os.getenv("PHASE2_WORDNET_SYNONYMS", "false").lower() == "true"
+
 # -----------------------------
 # Helpers
 # -----------------------------
@@ -16,20 +21,10 @@ def split_snake_case(name: str) -> List[str]:
     return name.lower().split("_")
 
 def get_synonyms(word: str, pos: str, limit: int = 10) -> List[str]:
-    if pos == "NUMBER":
+    if not PHASE2_WORDNET_SYNONYMS:
         return []
-
-    wn_pos = POS_TO_WN.get(pos)
-    synsets = wn.synsets(word, pos=wn_pos) if wn_pos else wn.synsets(word)
-
-    synonyms = set()
-    for syn in synsets:
-        for lemma in syn.lemmas():
-            name = lemma.name().replace("_", " ").lower()
-            if name != word.lower():
-                synonyms.add(name)
-
-    return sorted(synonyms)[:limit]
+    # cached + precomputed table, see synonyms.py
+    return _cached_synonyms(word, pos, limit)
 
 
 def normalize(word: str) -> str:
@@ -387,47 +382,37 @@ def _ordered_match_score(phrase_words: List[str], sent_words: List[str]) -> Opti
     return 70.0 + (len(phrase_words) * 5.0) - (gaps * 1.0)
 
 
-def _word_matches_with_synonyms(phrase_word: str, sent_word: str) -> bool:
-    if phrase_word == sent_word:
-        return True
-
-    phrase_syns = set()
-    sent_syns = set()
-
-    try:
-        phrase_syns |= safe_syns(phrase_word, "VERB")
-        phrase_syns |= safe_syns(phrase_word, "NOUN")
-        phrase_syns |= safe_syns(phrase_word, "ADJECTIVE")
-        phrase_syns |= safe_syns(phrase_word, "ADVERB")
-    except Exception:
-        pass
-
-    try:
-        sent_syns |= safe_syns(sent_word, "VERB")
-        sent_syns |= safe_syns(sent_word, "NOUN")
-        sent_syns |= safe_syns(sent_word, "ADJECTIVE")
-        sent_syns |= safe_syns(sent_word, "ADVERB")
-    except Exception:
-        pass
+def _synonym_keys(word: str) -> Set[str]:
+    """
+    The word itself plus its normalized synonyms over VERB/NOUN/ADJECTIVE/ADVERB.
+    Two words are synonym-equivalent iff their key sets intersect.
+    """
+    keys = {word}
+    for pos in ("VERB", "NOUN", "ADJECTIVE", "ADVERB"):
+        keys |= {_norm_text(x) for x in safe_syns(word, pos)}
+    return keys
 
-    phrase_syns = {_norm_text(x) for x in phrase_syns}
-    sent_syns = {_norm_text(x) for x in sent_syns}
 
-    if sent_word in phrase_syns:
-        return True
-    if phrase_word in sent_syns:
-        return True
-
-    if phrase_syns & sent_syns:
+def _word_matches_with_synonyms(phrase_word: str, sent_word: str) -> bool:
+    if phrase_word == sent_word:
         return True
 
-    return False
+    # sent_word in syns(phrase_word) / phrase_word in syns(sent_word) /
+    # shared synonym -- all covered by intersecting the key sets
+    return bool(_synonym_keys(phrase_word) & _synonym_keys(sent_word))
 
 
-def _ordered_synonym_match_score(phrase_words: List[str], sent_words: List[str]) -> Optional[float]:
+def _ordered_synonym_match_score(
+    phrase_words: List[str],
+    sent_words: List[str],
+    sent_equiv: Optional[List[Set[str]]] = None,
+) -> Optional[float]:
     """
     Ordered match with gaps allowed, but each phrase word may match
     by exact word OR synonym.
+
+    sent_equiv (optional): per sentence position, the set of phrase words
+    that are synonym-equivalent to it (see _sentence_synonym_equiv).
     """
     if not phrase_words or not sent_words:
         return None
@@ -447,7 +432,7 @@ def _ordered_synonym_match_score(phrase_words: List[str], sent_words: List[str])
                 j += 1
                 found = True
                 break
-            elif _word_matches_with_synonyms(pw, sw):
+            elif (pw in sent_equiv[j]) if sent_equiv is not None else _word_matches_with_synonyms(pw, sw):
                 positions.append(j)
                 synonym_count += 1
                 j += 1
@@ -482,6 +467,143 @@ def build_phrase_index(domain: Dict[str, Any]) -> Dict[str, str]:
     return phrase_to_action
 
 
+# ============================================================
+# Precompiled phrase matcher (built once per load_domain)
+# ============================================================
+_TRIE_END = "$"
+
+
+def compile_phrase_matcher(domain: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalize every docstring phrase once and compile them into:
+
+      entries  : [(action, phrase, phrase_words), ...] in action/phrase order
+      trie     : token trie over phrase_words (exact contiguous matches)
+      inverted : word -> [(entry_idx, {positions of word in phrase})]
+                 (ordered matches with gaps, found in one sentence pass)
+      syn_ids / syn_index : synonym key -> int id -> phrase words
+                 (ordered synonym matches)
+
+    Stored on the cached domain as domain["PHRASE_MATCHER"] by load_domain().
+    """
+    entries: List[Tuple[str, str, Tuple[str, ...]]] = []
+    trie: Dict[str, Any] = {}
+    inverted: Dict[str, List[Tuple[int, Set[int]]]] = {}
+
+    for action, info in (domain.get("ACTIONS") or {}).items():
+        for raw_phrase in (info.get("phrases") or []):
+            phrase = normalize_user_input(str(raw_phrase))
+            if not phrase:
+                continue
+
+            pwords = tuple(phrase.split())
+            idx = len(entries)
+            entries.append((action, phrase, pwords))
+
+            node = trie
+            for w in pwords:
+                node = node.setdefault(w, {})
+            node.setdefault(_TRIE_END, []).append(idx)
+
+            positions: Dict[str, Set[int]] = {}
+            for k, w in enumerate(pwords):
+                positions.setdefault(w, set()).add(k)
+            for w, ks in positions.items():
+                inverted.setdefault(w, []).append((idx, ks))
+
+    # Synonym keys are interned to ints; syn_index maps key id -> phrase words
+    # whose key set contains it, so equivalence is an id-set intersection.
+    syn_ids: Dict[str, int] = {}
+    syn_index: Dict[int, Set[str]] = {}
+    for w in inverted:
+        for key in _synonym_keys(w):
+            kid = syn_ids.setdefault(key, len(syn_ids))
+            syn_index.setdefault(kid, set()).add(w)
+
+    return {
+        "entries": entries,
+        "trie": trie,
+        "inverted": inverted,
+        "syn_ids": syn_ids,
+        "syn_index": syn_index,
+    }
+
+
+def _sentence_synonym_equiv(matcher: Dict[str, Any], sent_words: List[str]) -> List[Set[str]]:
+    """
+    For each sentence word, the phrase words it is synonym-equivalent to.
+    Synonym keys unknown to the domain can never intersect, so they are dropped.
+    """
+    syn_ids = matcher["syn_ids"]
+    syn_index = matcher["syn_index"]
+
+    cache: Dict[str, Set[str]] = {}
+    out: List[Set[str]] = []
+    for sw in sent_words:
+        equiv = cache.get(sw)
+        if equiv is None:
+            equiv = set()
+            for key in _synonym_keys(sw):
+                kid = syn_ids.get(key)
+                if kid is not None:
+                    equiv |= syn_index[kid]
+            cache[sw] = equiv
+        out.append(equiv)
+    return out
+
+
+def _get_phrase_matcher(domain: Dict[str, Any]) -> Dict[str, Any]:
+    matcher = domain.get("PHRASE_MATCHER")
+    if matcher is None:
+        # domain not built by load_domain() (e.g. hand-made in a script)
+        matcher = compile_phrase_matcher(domain)
+        domain["PHRASE_MATCHER"] = matcher
+    return matcher
+
+
+def _scan_phrase_matches(
+    matcher: Dict[str, Any],
+    sent_words: List[str],
+) -> Tuple[Set[int], Dict[int, List[int]]]:
+    """
+    Single pass over the sentence.
+
+    Returns:
+      exact   : entry ids whose phrase occurs contiguously in the sentence
+      ordered : entry id -> matched positions (greedy, gaps allowed),
+                only for phrases whose words were all found in order
+    """
+    trie = matcher["trie"]
+    inverted = matcher["inverted"]
+    entries = matcher["entries"]
+
+    exact: Set[int] = set()
+    progress: Dict[int, List[int]] = {}
+
+    for j, w in enumerate(sent_words):
+        # exact: walk the trie from this start position
+        node = trie.get(w)
+        k = j + 1
+        while node is not None:
+            exact.update(node.get(_TRIE_END, ()))
+            if k >= len(sent_words):
+                break
+            node = node.get(sent_words[k])
+            k += 1
+
+        # ordered: advance every phrase waiting for this word (once per word)
+        for idx, ks in inverted.get(w, ()):
+            pos = progress.setdefault(idx, [])
+            if len(pos) in ks and len(pos) < len(entries[idx][2]):
+                pos.append(j)
+
+    ordered = {
+        idx: pos for idx, pos in progress.items()
+        if len(pos) == len(entries[idx][2])
+    }
+    return exact, ordered
+
+
 def safe_syns(word: str, pos: str) -> Set[str]:
     try:
         return set(get_synonyms(word, pos))
@@ -855,6 +977,7 @@ def load_domain(py_file: str) -> Dict[str, Any]:
 
     # Ensure minimal shape exists (avoid KeyError later)
     domain.setdefault("ACTIONS", {})
+    domain["PHRASE_MATCHER"] = compile_phrase_matcher(domain)
 
     DOMAIN_CACHE[py_file] = domain
     DOMAIN_MTIME[py_file] = current_mtime
@@ -921,54 +1044,51 @@ def match_action_by_phrases(
     if not actions:
         return None, None, []
 
-    scored: List[Tuple[str, str, float, str]] = []
-    # (action, phrase, score, match_type)
+    matcher = _get_phrase_matcher(domain)
+    exact, ordered = _scan_phrase_matches(matcher, sent_words)
+    sent_equiv: Optional[List[Set[str]]] = None  # built on first synonym-tier use
 
-    for action, info in actions.items():
-        for raw_phrase in (info.get("phrases") or []):
-            phrase = normalize_user_input(str(raw_phrase))
-            if not phrase:
-                continue
+    scored: List[Tuple[str, str, float, str, int]] = []
+    # (action, phrase, score, match_type, phrase_len)
 
-            pwords = _phrase_words(phrase)
-
-            # -------------------------
-            # 1) exact contiguous phrase match
-            # -------------------------
-            needle = f" {phrase} "
-            hay1 = f" {sent_norm} "
-            hay2 = f" {' '.join(sent_words)} "
-
-            if needle in hay1 or needle in hay2:
-                score = 100.0 + len(pwords)
-                scored.append((action, phrase, score, "exact"))
-                continue
+    for idx, (action, phrase, pwords) in enumerate(matcher["entries"]):
+        # -------------------------
+        # 1) exact contiguous phrase match
+        # -------------------------
+        if idx in exact:
+            score = 100.0 + len(pwords)
+            scored.append((action, phrase, score, "exact", len(pwords)))
+            continue
 
-            # -------------------------
-            # 2) ordered exact word match
-            # -------------------------
-            ordered_score = _ordered_match_score(pwords, sent_words)
-            if ordered_score is not None:
-                scored.append((action, phrase, ordered_score, "ordered"))
-                continue
+        # -------------------------
+        # 2) ordered exact word match (gaps allowed)
+        # -------------------------
+        positions = ordered.get(idx)
+        if positions is not None:
+            gaps = positions[-1] - positions[0] - (len(positions) - 1)
+            ordered_score = 70.0 + (len(pwords) * 5.0) - (gaps * 1.0)
+            scored.append((action, phrase, ordered_score, "ordered", len(pwords)))
+            continue
 
-            # -------------------------
-            # 3) ordered synonym match
-            # -------------------------
-            synonym_score = _ordered_synonym_match_score(pwords, sent_words)
-            if synonym_score is not None:
-                scored.append((action, phrase, synonym_score, "ordered_synonym"))
-                continue
+        # -------------------------
+        # 3) ordered synonym match
+        # -------------------------
+        if sent_equiv is None:
+            sent_equiv = _sentence_synonym_equiv(matcher, sent_words)
+        synonym_score = _ordered_synonym_match_score(list(pwords), sent_words, sent_equiv)
+        if synonym_score is not None:
+            scored.append((action, phrase, synonym_score, "ordered_synonym", len(pwords)))
+            continue
 
     if not scored:
         return None, None, []
 
     # sort by score desc, then longer phrase desc
-    scored.sort(key=lambda x: (x[2], len(_phrase_words(x[1]))), reverse=True)
+    scored.sort(key=lambda x: (x[2], x[4]), reverse=True)
 
-    best_action, best_phrase, best_score, best_type = scored[0]
+    best_action, best_phrase, best_score, best_type, _ = scored[0]
 
-    ranked = [(action, score) for action, phrase, score, match_type in scored]
+    ranked = [(action, score) for action, phrase, score, match_type, _ in scored]
     return best_action, best_phrase, ranked
 
 # ============================================================
@@ -0,0 +1,182 @@
+# backend/app/parser_engine/synonyms.py
+# ============================================================
+# Synonym service
+#
+#   get_synonyms(word, pos)  ->  in-process LRU
+#                            ->  precomputed SQLite table (synonyms.sqlite)
+#                            ->  live WordNet (only on a table miss;
+#                                the result is written back to the table)
+#
+# Build the table ahead of time (Dockerfile does this):
+#   python -m app.parser_engine.synonyms
+# ============================================================
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+SYNONYM_DB_PATH = os.getenv(
+    "SYNONYM_DB_PATH",
+    str(Path(__file__).resolve().parent / "synonyms.sqlite"),
+)
+SYNONYM_CACHE_SIZE = int(os.getenv("SYNONYM_CACHE_SIZE", "20000"))
+
+# Simple POS -> WordNet POS letter (same mapping as lex_alz.POS_TO_WN,
+# spelled out so the hot path never imports nltk)
+POS_TO_WN = {
+    "NOUN": "n",
+    "VERB": "v",
+    "ADJECTIVE": "a",
+    "ADVERB": "r",
+}
+ANY_POS = ""  # key used for wn.synsets(word) without a POS filter
+
+_db_lock = threading.Lock()
+_db: Optional[sqlite3.Connection] = None
+_db_checked = False
+
+
+def _connect() -> Optional[sqlite3.Connection]:
+    """
+    Open the synonym table once. If it has not been prebuilt it is created
+    empty and fills up from write-backs. None if the path is unusable.
+    """
+    global _db, _db_checked
+    if _db_checked:
+        return _db
+    with _db_lock:
+        if not _db_checked:
+            try:
+                _db = sqlite3.connect(SYNONYM_DB_PATH, check_same_thread=False)
+                _create_table(_db)
+            except sqlite3.Error as e:
+                print(f"[SYNONYMS] Could not open {SYNONYM_DB_PATH}: {e}")
+                _db = None
+            _db_checked = True
+    return _db
+
+
+def _create_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS synonyms ("
+        " word TEXT NOT NULL,"
+        " pos TEXT NOT NULL,"
+        " synonyms TEXT NOT NULL,"
+        " PRIMARY KEY (word, pos))"
+    )
+
+
+def _wordnet_synonyms(word: str, wn_pos: str) -> List[str]:
+    """Live WordNet lookup. Returns ALL synonyms sorted (limit applied later)."""
+    from nltk.corpus import wordnet as wn
+
+    synsets = wn.synsets(word, pos=wn_pos) if wn_pos else wn.synsets(word)
+
+    synonyms = set()
+    for syn in synsets:
+        for lemma in syn.lemmas():
+            name = lemma.name().replace("_", " ").lower()
+            if name != word.lower():
+                synonyms.add(name)
+
+    return sorted(synonyms)
+
+
+@lru_cache(maxsize=SYNONYM_CACHE_SIZE)
+def _lookup(word: str, wn_pos: str) -> Tuple[str, ...]:
+    conn = _connect()
+    if conn is not None:
+        try:
+            with _db_lock:
+                row = conn.execute(
+                    "SELECT synonyms FROM synonyms WHERE word = ? AND pos = ?",
+                    (word, wn_pos),
+                ).fetchone()
+        except sqlite3.Error as e:
+            # e.g. "database is locked" by another worker's write-back
+            print(f"[SYNONYMS] Table read failed for '{word}', using WordNet: {e}")
+            row = None
+        if row is not None:
+            return tuple(json.loads(row[0]))
+
+    # Table miss (inflected form, or table not built yet): ask WordNet once
+    syns = _wordnet_synonyms(word, wn_pos)
+
+    if conn is not None:
+        with _db_lock:
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO synonyms (word, pos, synonyms) VALUES (?, ?, ?)",
+                    (word, wn_pos, json.dumps(syns)),
+                )
+                conn.commit()
+            except sqlite3.Error:
+                pass  # read-only volume or locked by another worker: keep serving from the LRU
+
+    return tuple(syns)
+
+
+def get_synonyms(word: str, pos: str, limit: int = 10) -> List[str]:
+    if pos == "NUMBER":
+        return []
+
+    wn_pos = POS_TO_WN.get(pos, ANY_POS)
+    return list(_lookup(word.lower(), wn_pos)[:limit])
+
+
+def cache_info():
+    return _lookup.cache_info()
+
+
+def build_synonym_table(db_path: str = SYNONYM_DB_PATH) -> int:
+    """
+    Precompute synonyms for every WordNet lemma name, for each POS and
+    for the POS-less lookup. Returns number of rows written.
+    """
+    global _db, _db_checked
+    from nltk.corpus import wordnet as wn
+
+    conn = sqlite3.connect(db_path)
+    _create_table(conn)
+
+    rows = 0
+    words = sorted(set(w.replace("_", " ") for w in wn.all_lemma_names()))
+    for word in words:
+        if " " in word:
+            continue  # lookups come from single tokens
+        batch = []
+        for wn_pos in list(POS_TO_WN.values()) + [ANY_POS]:
+            batch.append((word, wn_pos, json.dumps(_wordnet_synonyms(word, wn_pos))))
+        conn.executemany(
+            "INSERT OR REPLACE INTO synonyms (word, pos, synonyms) VALUES (?, ?, ?)",
+            batch,
+        )
+        rows += len(batch)
+
+    conn.commit()
+    conn.close()
+
+    # pick up the fresh table on next lookup
+    with _db_lock:
+        if _db is not None:
+            _db.close()
+        _db = None
+        _db_checked = False
+    _lookup.cache_clear()
+    return rows
+
+
+if __name__ == "__main__":
+    import time
+
+    from app.parser_engine.lex_alz import setup_nltk
+
+    setup_nltk()
+    t0 = time.time()
+    n = build_synonym_table()
+    print(f"[SYNONYMS] Wrote {n} rows to {SYNONYM_DB_PATH} in {time.time() - t0:.1f}s")
@@ -14,14 +14,15 @@ from sqlalchemy.orm import Session
 
 from app.database.connection import get_db
 from app.models.models import Conversation
-from app.models.schemas import AnalyzeCommandRequest, UndoRequest
+from app.models.schemas import AnalyzeCommandRequest, AnalyzeBatchRequest, UndoRequest
 
-from app.parser_engine.api import compile_single, apply_followup
-from app.parser_engine.lex_alz import analyze_sentence, _words_to_numbers
+from app.parser_engine.api import compile_single, apply_followup, _clean_command_text
+from app.parser_engine.lex_alz import analyze_sentence, analyze_sentences, _words_to_numbers
 from app.parser_engine.phase2_domain import load_domain, phase2_map_tokens, DOMAIN_CACHE, DOMAIN_MTIME
 from app.parser_engine.cfg_parser import parse_command, extract_nodes_by_name, span_to_text
 
 from app.routers.codespace.conversations import initialize_turtle_session, load_turtle_domain_code, load_smarthome_domain_code
+from app.services.session_state import get_session_state_store
 
 router = APIRouter()
 
@@ -472,22 +473,21 @@ pipeline_cache = LRUCache(max_size=CACHE_MAX_SIZE, ttl_seconds=CACHE_TTL_SECONDS
 # ============================================================
 # Session State (follow-up)
 # ============================================================
-def _state_path(session_dir: Path) -> Path:
-    return session_dir / "state.json"
-
+# state.json is cached in memory; saves only mark it dirty and the request
+# handler writes it once at the end (_flush_state)
 def _load_state(session_dir: Path) -> dict:
-    p = _state_path(session_dir)
-    if not p.exists():
-        return {}
-    try:
-        return json.loads(p.read_text(encoding="utf-8"))
-    except Exception:
-        return {}
+    return get_session_state_store().load(session_dir)
 
 def _save_state(session_dir: Path, state: dict) -> None:
-    p = _state_path(session_dir)
-    session_dir.mkdir(parents=True, exist_ok=True)
-    p.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+    get_session_state_store().save(session_dir, state)
+
+def _flush_state(session_dir: Path) -> None:
+    # a failed write must not replace the response (this runs in `finally`);
+    # the entry stays dirty, so the next request for the session retries it
+    try:
+        get_session_state_store().flush(session_dir)
+    except OSError as e:
+        print(f"[STATE] Could not write state.json for {session_dir.name}, will retry: {e}")
 
 
 # ============================================================
@@ -771,55 +771,164 @@ def _split_compound_simple(full_text: str) -> List[str]:
     return parts if parts else [full_text.strip()]
 
 
-def _split_with_cfg(full_text: str, module_path: Path) -> List[str]:
+def _split_with_cfg(
+    full_text: str,
+    module_path: Path,
+    lex_tokens: Optional[List[Dict[str, Any]]] = None,
+) -> List[Tuple[str, Optional[List[Dict[str, Any]]]]]:
     """
     CFG-based command splitting:
       'turn on tv then turn on light' -> ['turn on tv', 'turn on light']
     If CFG fails, returns [full_text].
+
+    Each clause comes back with its slice of the already-tagged tokens
+    (clause_text, lex_tokens) so the per-clause compiler does not
+    tokenise/tag it again. lex_tokens is None when it cannot be reused.
+    Pass `lex_tokens` for the stripped full text when it is already tagged.
     """
-    lex_tokens = analyze_sentence(full_text)
+    full_text = full_text.strip()
+    if lex_tokens is None:
+        lex_tokens = analyze_sentence(full_text)
     domain = load_domain(str(module_path))
     sem_tokens = phase2_map_tokens(lex_tokens, domain)
 
+    # compile_single strips a trailing "." before tagging, so the full-sentence
+    # tokens only line up with the cleaned text when there is none
+    whole = [(full_text, None if full_text.endswith(".") else lex_tokens)]
+
     g = parse_command(lex_tokens, sem_tokens)
     tree = g.get("parse_tree")
     if not tree:
-        return [full_text.strip()]
+        return whole
 
     command_nodes = extract_nodes_by_name(tree, "Command")
     if not command_nodes:
-        return [full_text.strip()]
+        return whole
 
     # keep UNKNOWN so names like t1 are preserved in the extracted command text
     toks_for_span = [t for t in lex_tokens if t.get("POS") != "punctuation"]
 
-    out: List[str] = []
+    out: List[Tuple[str, Optional[List[Dict[str, Any]]]]] = []
     for n in command_nodes:
         start = int(n.get("start", 0))
         end = int(n.get("end", 0))
         txt = span_to_text(toks_for_span, start, end)
         txt = " ".join(txt.split()).strip()
         if txt:
-            out.append(txt)
+            out.append((txt, toks_for_span[start:end]))
 
     # remove duplicates, keep order
     seen = set()
-    cleaned: List[str] = []
+    cleaned: List[Tuple[str, Optional[List[Dict[str, Any]]]]] = []
     for x in out:
-        k = x.lower()
+        k = x[0].lower()
         if k not in seen:
             seen.add(k)
             cleaned.append(x)
 
-    return cleaned if cleaned else [full_text.strip()]
+    return cleaned if cleaned else whole
+
+
+def _tag_parts(parts: List[str]) -> List[Tuple[str, Optional[List[Dict[str, Any]]]]]:
+    """
+    Pair plain clause texts (regex split) with tokens, tagging all of them
+    in one batched pass. Texts are cleaned the way compile_single would.
+    """
+    texts = [_clean_command_text(p) for p in parts]
+    texts = [t for t in texts if t]
+    if not texts:
+        return []
+    return list(zip(texts, analyze_sentences(texts)))
+
+
+def _rewrite_command(command: str, convo, session_dir: Path) -> str:
+    """
+    Turtle: object-first rewrite of a normalized command, using the objects
+    already known in state.json. Read-only; shared with /analyze_batch.
+    """
+    if _is_turtle_app(convo):
+        st = _load_state(session_dir)
+        known_objects = st.get("objects", {}) or {}
+        command = _rewrite_object_first_turtle_command(command, known_objects)
+    return command
+
+
+def _compile_command(
+    command: str,
+    module_path: Path,
+    lex_tokens: Optional[List[Dict[str, Any]]] = None,
+) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """
+    Split a (rewritten) command into clauses and compile each one.
+    Returns (command_parts, results). Compile-only: no runner/state writes.
+    """
+    # Try CFG split first, fall back to simple regex split if CFG returns only 1 part
+    # or if any CFG-split part looks incomplete (too few words = bad boundary)
+    # Each part is (clause_text, lex_tokens) so clauses are tagged only once
+    tagged_parts = _split_with_cfg(command, module_path, lex_tokens=lex_tokens)
+    command_parts = [p for p, _ in tagged_parts]
+    cfg_looks_bad = len(command_parts) <= 1 or any(len(p.split()) < 2 for p in command_parts)
+    if cfg_looks_bad:
+        simple_parts = _split_compound_simple(command)
+        if len(simple_parts) > 1 or len(command_parts) <= 1:
+            if simple_parts != command_parts:
+                tagged_parts = _tag_parts(simple_parts)
+            command_parts = simple_parts
+
+    print("command_parts:", command_parts)
+
+    results: List[Dict[str, Any]] = []
+    for part, part_tokens in tagged_parts:
+        part = (part or "").strip()
+        if not part:
+            continue
+        results.append(_process_single_command(part, module_path, lex_tokens=part_tokens))
+        print("[DEBUG] raw executables =", [r.get("executable") for r in results])
+
+    # If ALL results failed and we haven't tried simple split yet, retry with simple split
+    all_failed = all(r.get("status") != "matched" for r in results) if results else True
+    if all_failed and len(command_parts) > 1:
+        simple_parts = _split_compound_simple(command)
+        if simple_parts != command_parts:
+            print("[DEBUG] CFG split failed, retrying with simple split:", simple_parts)
+            results = []
+            command_parts = simple_parts
+            for part, part_tokens in _tag_parts(command_parts):
+                results.append(_process_single_command(part, module_path, lex_tokens=part_tokens))
+
+    return command_parts, results
 
 
 # ============================================================
 # Single command compilation to frontend schema
 # ============================================================
-def _process_single_command(command: str, module_path: Path) -> Dict[str, Any]:
-    r = compile_single(command, str(module_path))
+def _process_single_command(
+    command: str,
+    module_path: Path,
+    lex_tokens: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    r = compile_single(command, str(module_path), lex_tokens=lex_tokens)
+    return _format_parser_result(command, r)
+
 
+def _no_results(command: str) -> Dict[str, Any]:
+    return {
+        "success": False,
+        "status": "no_match",
+        "original_command": command,
+        "suggestion_message": None,
+        "method": None,
+        "parameters": {},
+        "confidence": 0.0,
+        "executable": None,
+        "intent_type": "parser",
+        "source": "parser",
+        "explanation": "No results",
+        "breakdown": {},
+    }
+
+
+def _format_parser_result(command: str, r: Dict[str, Any]) -> Dict[str, Any]:
     status = r.get("status")
     confidence = float(r.get("confidence", 0.0))
 
@@ -900,6 +1009,60 @@ def _process_single_command(command: str, module_path: Path) -> Dict[str, Any]:
     }
 
 
+# ============================================================
+# Session module preparation
+# ============================================================
+def _normalize_command(command: str) -> str:
+    # Early normalization: word numbers → digits, "light bulb" → "lightbulb"
+    command = _words_to_numbers((command or "").strip())
+    return re.sub(r'\blight\s+bulb', 'lightbulb', command, flags=re.IGNORECASE)
+
+
+def _prepare_session_module(convo, conversation_id: int) -> Path:
+    """
+    Make sure the session's domain file exists and matches the canonical
+    turtle / smart home code. Returns the module path.
+    """
+    module_path = BASE_EXEC_DIR / f"session_{conversation_id}" / convo.file_name
+    if not module_path.exists():
+        if _is_turtle_app(convo):
+            code = load_turtle_domain_code()
+            initialize_turtle_session(conversation_id, code)
+        else:
+            raise HTTPException(status_code=400, detail=f"Session file not found: {module_path}")
+
+    # Sync turtle domain file with the canonical version so that
+    # existing sessions pick up updated phrases / docstrings.
+    if _is_turtle_app(convo) and module_path.exists():
+        canonical = load_turtle_domain_code()
+        current = module_path.read_text(encoding="utf-8")
+        if canonical != current:
+            module_path.write_text(canonical, encoding="utf-8")
+            abs_path = str(module_path.resolve())
+            DOMAIN_CACHE.pop(abs_path, None)
+            DOMAIN_MTIME.pop(abs_path, None)
+            print(f"[SYNC] Updated session domain file: {module_path}")
+
+    # Sync smart home domain file similarly
+    if convo.file_name == "smarthome_group_code.py" and module_path.exists():
+        try:
+            canonical = load_smarthome_domain_code()
+            current = module_path.read_text(encoding="utf-8")
+            if canonical != current:
+                module_path.write_text(canonical, encoding="utf-8")
+                abs_path = str(module_path.resolve())
+                DOMAIN_CACHE.pop(abs_path, None)
+                DOMAIN_MTIME.pop(abs_path, None)
+                print(f"[SYNC] Updated session smart home file: {module_path}")
+        except FileNotFoundError:
+            pass
+
+    if not module_path.exists():
+        raise HTTPException(status_code=400, detail=f"Session file not found: {module_path}")
+
+    return module_path
+
+
 # ============================================================
 # Routes
 # ============================================================
@@ -967,7 +1130,6 @@ def undo_last(payload: UndoRequest, db: Session = Depends(get_db)):
 
     session_dir = BASE_EXEC_DIR / f"session_{conversation_id}"
     runner_path = session_dir / "runner.py"
-    state_path = session_dir / "state.json"
 
     rec = _pop_last_undo_snapshot(session_dir)
     if not rec:
@@ -995,11 +1157,8 @@ def undo_last(payload: UndoRequest, db: Session = Depends(get_db)):
             f.truncate(prev_size)
 
     # restore state.json
-    session_dir.mkdir(parents=True, exist_ok=True)
-    state_path.write_text(
-        json.dumps(prev_state, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
+    _save_state(session_dir, prev_state)
+    _flush_state(session_dir)
 
     return {
         "success": True,
@@ -1010,54 +1169,25 @@ def undo_last(payload: UndoRequest, db: Session = Depends(get_db)):
 
 @router.post("/analyze_command")
 def analyze_command(payload: AnalyzeCommandRequest, db: Session = Depends(get_db)):
+    # every state change of the request is written to state.json once, here
+    session_dir = BASE_EXEC_DIR / f"session_{payload.conversation_id}"
+    try:
+        return _analyze_command(payload, db)
+    finally:
+        _flush_state(session_dir)
+
+
+def _analyze_command(payload: AnalyzeCommandRequest, db: Session):
     t_total_start = time.time()
     conversation_id = payload.conversation_id
-    command = (payload.command or "").strip()
-    # Early normalization: word numbers → digits, "light bulb" → "lightbulb"
-    command = _words_to_numbers(command)
-    command = re.sub(r'\blight\s+bulb', 'lightbulb', command, flags=re.IGNORECASE)
+    command = _normalize_command(payload.command)
 
     convo = db.query(Conversation).filter(Conversation.id == conversation_id).first()
     if not convo:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
     session_dir = BASE_EXEC_DIR / f"session_{conversation_id}"
-    module_path = session_dir / convo.file_name
-    if not module_path.exists():
-        if _is_turtle_app(convo):
-            code = load_turtle_domain_code()
-            initialize_turtle_session(conversation_id, code)
-        else:
-            raise HTTPException(status_code=400, detail=f"Session file not found: {module_path}")
-
-    # Sync turtle domain file with the canonical version so that
-    # existing sessions pick up updated phrases / docstrings.
-    if _is_turtle_app(convo) and module_path.exists():
-        canonical = load_turtle_domain_code()
-        current = module_path.read_text(encoding="utf-8")
-        if canonical != current:
-            module_path.write_text(canonical, encoding="utf-8")
-            abs_path = str(module_path.resolve())
-            DOMAIN_CACHE.pop(abs_path, None)
-            DOMAIN_MTIME.pop(abs_path, None)
-            print(f"[SYNC] Updated session domain file: {module_path}")
-
-    # Sync smart home domain file similarly
-    if convo.file_name == "smarthome_group_code.py" and module_path.exists():
-        try:
-            canonical = load_smarthome_domain_code()
-            current = module_path.read_text(encoding="utf-8")
-            if canonical != current:
-                module_path.write_text(canonical, encoding="utf-8")
-                abs_path = str(module_path.resolve())
-                DOMAIN_CACHE.pop(abs_path, None)
-                DOMAIN_MTIME.pop(abs_path, None)
-                print(f"[SYNC] Updated session smart home file: {module_path}")
-        except FileNotFoundError:
-            pass
-
-    if not module_path.exists():
-        raise HTTPException(status_code=400, detail=f"Session file not found: {module_path}")
+    module_path = _prepare_session_module(convo, conversation_id)
 
     cached = pipeline_cache.get(f"conv_{conversation_id}")
     if cached:
@@ -1688,43 +1818,9 @@ def analyze_command(payload: AnalyzeCommandRequest, db: Session = Depends(get_db
     # ------------------------------------------------------------
     # Normal flow
     # ------------------------------------------------------------
-    if _is_turtle_app(convo):
-        st = _load_state(session_dir)
-        known_objects = st.get("objects", {}) or {}
-        command = _rewrite_object_first_turtle_command(command, known_objects)
-    # Try CFG split first, fall back to simple regex split if CFG returns only 1 part
-    # or if any CFG-split part looks incomplete (too few words = bad boundary)
-    command_parts = _split_with_cfg(command, module_path)
-    cfg_looks_bad = len(command_parts) <= 1 or any(len(p.split()) < 2 for p in command_parts)
-    if cfg_looks_bad:
-        simple_parts = _split_compound_simple(command)
-        if len(simple_parts) > 1 or len(command_parts) <= 1:
-            command_parts = simple_parts
-
-    print("command_parts:", command_parts)
+    command = _rewrite_command(command, convo, session_dir)
     print("[DEBUG] convo.app_type =", getattr(convo, "app_type", None))
-
-    results: List[Dict[str, Any]] = []
-    for part in command_parts:
-        part = (part or "").strip()
-        if not part:
-            continue
-        results.append(_process_single_command(part, module_path))
-        print("[DEBUG] raw executables =", [r.get("executable") for r in results])
-
-    # If ALL results failed and we haven't tried simple split yet, retry with simple split
-    all_failed = all(r.get("status") != "matched" for r in results) if results else True
-    if all_failed and len(command_parts) > 1:
-        simple_parts = _split_compound_simple(command)
-        if simple_parts != command_parts:
-            print("[DEBUG] CFG split failed, retrying with simple split:", simple_parts)
-            results = []
-            command_parts = simple_parts
-            for part in command_parts:
-                part = (part or "").strip()
-                if not part:
-                    continue
-                results.append(_process_single_command(part, module_path))
+    command_parts, results = _compile_command(command, module_path)
 
     # ----------------------------------------------------------
     # Compound buffering: if ANY clause needs clarification,
@@ -1873,20 +1969,7 @@ def analyze_command(payload: AnalyzeCommandRequest, db: Session = Depends(get_db
             _save_state(session_dir, state)
             break
 
-    primary = results[0] if results else {
-        "success": False,
-        "status": "no_match",
-        "original_command": command,
-        "suggestion_message": None,
-        "method": None,
-        "parameters": {},
-        "confidence": 0.0,
-        "executable": None,
-        "intent_type": "parser",
-        "source": "parser",
-        "explanation": "No results",
-        "breakdown": {},
-    }
+    primary = results[0] if results else _no_results(command)
 
     t_total = (time.time() - t_total_start) * 1000
     print(f"[TIMING] analyze_command conv={conversation_id} cmd='{command[:50]}': {t_total:.0f}ms total")
@@ -1898,4 +1981,69 @@ def analyze_command(payload: AnalyzeCommandRequest, db: Session = Depends(get_db
         "command_count": len(command_parts),
         "result": primary,
         "results": results,
-    }
\ No newline at end of file
+    }
+
+@router.post("/analyze_batch")
+def analyze_batch(payload: AnalyzeBatchRequest, db: Session = Depends(get_db)):
+    """
+    Compile many commands in one call (grading / replay jobs).
+
+    Commands are grouped per conversation: one DB query for all
+    conversations, one domain sync + load per conversation, and one
+    batched tokenise/tag pass per conversation. Each command goes through
+    the same preprocessing as /analyze_command (normalization, turtle
+    object-first rewrite, CFG / simple compound split), so every item has
+    the same `command_count` / `result` / `results` shape.
+
+    Compile-only: does NOT touch runner.py, state.json or undo history.
+    """
+    t_total_start = time.time()
+
+    jobs: List[Tuple[int, str]] = []
+    for c in payload.commands:
+        jobs.append((payload.conversation_id, c))
+    for item in payload.items:
+        jobs.append((item.conversation_id or payload.conversation_id, item.command))
+
+    if any(cid is None for cid, _ in jobs):
+        raise HTTPException(status_code=400, detail="conversation_id is required for every command")
+
+    conversation_ids = sorted({cid for cid, _ in jobs})
+    convos = {
+        c.id: c
+        for c in db.query(Conversation).filter(Conversation.id.in_(conversation_ids)).all()
+    }
+    missing = [cid for cid in conversation_ids if cid not in convos]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Conversation not found: {missing}")
+
+    # conversation_id -> [(job index, normalized command)]
+    grouped: Dict[int, List[Tuple[int, str]]] = {}
+    for i, (cid, c) in enumerate(jobs):
+        grouped.setdefault(cid, []).append((i, _normalize_command(c)))
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+    for cid, group in grouped.items():
+        convo = convos[cid]
+        session_dir = BASE_EXEC_DIR / f"session_{cid}"
+        module_path = _prepare_session_module(convo, cid)
+        commands = [_rewrite_command(c, convo, session_dir) for _, c in group]
+        # tag every full sentence of this conversation in one pass
+        tagged = analyze_sentences([c.strip() for c in commands])
+        for (i, _), command, lex_tokens in zip(group, commands, tagged):
+            command_parts, parts = _compile_command(command, module_path, lex_tokens=lex_tokens)
+            results[i] = {
+                "conversation_id": cid,
+                "command_count": len(command_parts),
+                "result": parts[0] if parts else _no_results(command),
+                "results": parts,
+            }
+
+    t_total = (time.time() - t_total_start) * 1000
+    print(f"[TIMING] analyze_batch convs={len(grouped)} cmds={len(jobs)}: {t_total:.0f}ms total")
+
+    return {
+        "success": True,
+        "command_count": len(jobs),
+        "results": results,
+    }
@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 from app.database.connection import get_db
 from app.models.models import Conversation
 from app.models.schemas import ConversationCreate, ConversationResponse, ConversationUpdate
+from app.services.session_state import get_session_state_store
 import ast
 import re
 
@@ -65,6 +66,7 @@ def initialize_turtle_session(conversation_id: int, domain_code: str):
     }, indent=2),
         encoding="utf-8"
     )
+    get_session_state_store().invalidate(session_dir)
 
 @router.post("/{user_id}", response_model=ConversationResponse)
 def create_conversation(user_id: int, convo: ConversationCreate, db: Session = Depends(get_db)):
@@ -122,6 +124,7 @@ def initialize_session(conversation_id: int, file_name: str, code: str):
             ),
             encoding="utf-8"
         )
+        get_session_state_store().invalidate(session_dir)
         return
 
     # -----------------------------
@@ -152,6 +155,7 @@ def initialize_session(conversation_id: int, file_name: str, code: str):
         "objects": {},                  # optional: track many objects later
     }
     (session_dir / "state.json").write_text(json.dumps(state, indent=2), encoding="utf-8")
+    get_session_state_store().invalidate(session_dir)
 
     # runner starts with imports only
     # (user commands will append object creation lines later)
@@ -11,6 +11,9 @@ from app.models.models import Conversation
 from app.models.schemas import ExecuteCommandRequest, SimpleCodeRequest
 import ast
 from app.security import validate_code
+from app.services.session_workers import get_session_worker_pool
+from app.services.exec_pool import get_exec_pool
+from app.services.session_state import get_session_state_store
 from pathlib import Path
 import json
 
@@ -30,6 +33,27 @@ def safe_filename(name: str) -> str:
     return name
 
 
+def _run_runner(session_dir, fresh: bool = False) -> str:
+    """
+    Run session_dir/runner.py and return its output text.
+    Uses the session's persistent worker when enabled (only new lines run,
+    fresh=True re-executes everything), otherwise a fresh `python runner.py`.
+    Raises subprocess.TimeoutExpired.
+    """
+    pool = get_session_worker_pool()
+    if pool is not None:
+        return pool.run(session_dir, timeout=30, fresh=fresh)
+
+    result = subprocess.run(
+        [sys.executable, "runner.py"],
+        capture_output=True,
+        text=True,
+        cwd=session_dir,
+        timeout=30
+    )
+    return result.stdout.strip() or result.stderr.strip()
+
+
 
 @router.post("/execute_command")
 def execute_command(request: ExecuteCommandRequest, db: Session = Depends(get_db)):
@@ -51,6 +75,9 @@ def execute_command(request: ExecuteCommandRequest, db: Session = Depends(get_db
     # For first-time initialization, clear existing session directory to ensure clean state
     # This prevents old files from a deleted/reused conversation ID from persisting
     if request.executable == "first_time_created" and os.path.exists(session_dir):
+        pool = get_session_worker_pool()
+        if pool is not None:
+            pool.discard(session_dir)
         shutil.rmtree(session_dir)
     os.makedirs(session_dir, exist_ok=True)
 
@@ -104,6 +131,7 @@ def execute_command(request: ExecuteCommandRequest, db: Session = Depends(get_db
                             "constructor_kwargs": {}
                         }, indent=2)
                     )
+                get_session_state_store().invalidate(Path(session_dir))
             return {"output": "Turtle runner initialized"}
         
         # -----------------------------
@@ -136,6 +164,7 @@ def execute_command(request: ExecuteCommandRequest, db: Session = Depends(get_db
                     "constructor_kwargs": {}
                 }, indent=2)
             )
+        get_session_state_store().invalidate(Path(session_dir))
 
         constructor_args = state["constructor_args"]
         constructor_kwargs = state["constructor_kwargs"]
@@ -159,14 +188,7 @@ def execute_command(request: ExecuteCommandRequest, db: Session = Depends(get_db
 
 
         try:
-            result = subprocess.run(
-                [sys.executable, "runner.py"],
-                capture_output=True,
-                text=True,
-                cwd=session_dir,
-                timeout=30
-            )
-            output = result.stdout.strip() or result.stderr.strip()
+            output = _run_runner(session_dir)
             return {"output": output or "No output"}
         except subprocess.TimeoutExpired:
             raise HTTPException(status_code=500, detail="Execution timed out")
@@ -187,14 +209,7 @@ def execute_command(request: ExecuteCommandRequest, db: Session = Depends(get_db
                 f.write(f"{executable}\n")
 
     try:
-        result = subprocess.run(
-            [sys.executable, "runner.py"],
-            capture_output=True,
-            text=True,
-            cwd=session_dir,
-            timeout=30
-        )
-        output = result.stdout.strip() or result.stderr.strip()
+        output = _run_runner(session_dir)
         return {"output": output or "No output"}
     except subprocess.TimeoutExpired:
         raise HTTPException(status_code=500, detail="Execution timed out")
@@ -214,14 +229,8 @@ def rerun_command(conversation_id: int = Query(..., description="ID of the conve
         raise HTTPException(status_code=404, detail="runner.py not found for this conversation. Run /execute_command first.")
 
     try:
-        result = subprocess.run(
-            [sys.executable, "runner.py"],
-            capture_output=True,
-            text=True,
-            cwd=session_dir,
-            timeout=30
-        )
-        output = result.stdout.strip() or result.stderr.strip()
+        # a re-run executes the whole runner.py again, never cached output
+        output = _run_runner(session_dir, fresh=True)
         return {"output": output or "No output"}
     except subprocess.TimeoutExpired:
         raise HTTPException(status_code=500, detail="Re-run timed out")
@@ -535,6 +544,23 @@ def execute_simple(request: SimpleCodeRequest):
     # Validate timeout (max 60 seconds for simple execution)
     timeout = min(request.timeout or 30, 60)
 
+    pool = get_exec_pool()
+    if pool is not None:
+        try:
+            return pool.run(request.code, timeout)
+        except subprocess.TimeoutExpired:
+            return {
+                "output": "",
+                "error": f"Code execution timed out ({timeout} seconds limit)",
+                "success": False
+            }
+        except Exception as e:
+            return {
+                "output": "",
+                "error": f"Execution error: {str(e)}",
+                "success": False
+            }
+
     try:
         # Create a temporary file to store the code
         with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as temp_file:
@@ -614,5 +640,6 @@ def reset_runner(conversation_id: int = Query(...)):
             json.dumps(state, indent=2),
             encoding="utf-8"
         )
+        get_session_state_store().invalidate(session_dir)
 
     return {"success": True}
\ No newline at end of file
@@ -11,6 +11,8 @@ from difflib import SequenceMatcher
 from functools import lru_cache
 import hashlib
 
+from app.services.ttl_cache import TTLCache
+
 # Load environment variables
 load_dotenv(dotenv_path="app/nlp_v4/.env")
 
@@ -26,8 +28,17 @@ def get_anthropic_client():
         _anthropic_client = AsyncAnthropic(api_key=api_key)
     return _anthropic_client
 
-# Simple in-memory cache for paraphrases
-_paraphrase_cache = {}
+# Bounded TTL cache for paraphrases (memory LRU + optional SQLite tier)
+PARAPHRASE_LLM_CACHE_MAX = int(os.getenv("PARAPHRASE_LLM_CACHE_MAX", "2000"))
+PARAPHRASE_LLM_CACHE_TTL = int(os.getenv("PARAPHRASE_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+PARAPHRASE_LLM_CACHE_DB = os.getenv("PARAPHRASE_LLM_CACHE_DB", "paraphrase_cache.sqlite")  # "" = memory only
+
+_paraphrase_cache = TTLCache(
+    "paraphrase",
+    max_size=PARAPHRASE_LLM_CACHE_MAX,
+    ttl_seconds=PARAPHRASE_LLM_CACHE_TTL,
+    db_path=PARAPHRASE_LLM_CACHE_DB,
+)
 
 router = APIRouter(prefix="/user_command_paraphrasing_suggestion", tags=["Paraphrase"])
 
@@ -147,11 +158,14 @@ def sort_paraphrases_by_similarity(original_text: str, variants: List[str]) -> L
 
 async def generate_paraphrases(text: str, max_variants: int) -> List[str]:
     """Generate paraphrases using Claude API with caching"""
-    # Check cache first
+    # Cache first; concurrent identical requests share one API call
     cache_key = f"{text.lower().strip()}:{max_variants}"
-    if cache_key in _paraphrase_cache:
-        return _paraphrase_cache[cache_key]
+    return await _paraphrase_cache.get_or_compute(
+        cache_key, lambda: _fetch_paraphrases(text, max_variants)
+    )
 
+async def _fetch_paraphrases(text: str, max_variants: int) -> List[str]:
+    """One upstream Claude call (no cache)."""
     client = get_anthropic_client()
 
     # Simplified, shorter prompt for faster response
@@ -181,17 +195,17 @@ async def generate_paraphrases(text: str, max_variants: int) -> List[str]:
         sorted_variants = sort_paraphrases_by_similarity(text, validated_variants)
 
         # Ensure we don't exceed max_variants
-        result = sorted_variants[:max_variants]
-
-        # Cache the result
-        _paraphrase_cache[cache_key] = result
-
-        return result
+        return sorted_variants[:max_variants]
 
     except Exception as e:
         print(f"Error generating paraphrases: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to generate paraphrases: {str(e)}")
 
+@router.get("/cache_stats")
+async def paraphrase_cache_stats():
+    """Hit/miss counters and size of the paraphrase cache."""
+    return await _paraphrase_cache.get_stats_async()
+
 @router.post("", response_model=ParaphraseResponse)
 async def paraphrase_command(request: ParaphraseRequest):
     """
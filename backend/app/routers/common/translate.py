@@ -3,7 +3,8 @@ from typing import Optional
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from google.cloud import translate_v2 as translate
-import httpx
+
+from app.services.http_clients import get_http_pool
 
 router = APIRouter(prefix="/translate", tags=["Translation"])
 
@@ -114,20 +115,19 @@ async def translate_with_libretranslate(
     Can use public instance or self-hosted.
     """
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                LIBRETRANSLATE_URL,
-                json={
-                    "q": text,
-                    "source": source,
-                    "target": target,
-                    "format": "text"
-                },
-                timeout=5.0
-            )
-            if response.status_code == 200:
-                result = response.json()
-                return result.get("translatedText")
+        response = await get_http_pool().post(
+            LIBRETRANSLATE_URL,
+            json={
+                "q": text,
+                "source": source,
+                "target": target,
+                "format": "text"
+            },
+            timeout=5.0
+        )
+        if response.status_code == 200:
+            result = response.json()
+            return result.get("translatedText")
     except Exception as e:
         print(f"[Translation] LibreTranslate fallback failed: {e}")
     return None
@@ -292,16 +292,15 @@ async def check_translation_status():
 
     # Check LibreTranslate
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                LIBRETRANSLATE_URL,
-                json={"q": "test", "source": "en", "target": "th"},
-                timeout=5.0
-            )
-            if response.status_code == 200:
-                status["libretranslate"] = {"available": True, "message": "LibreTranslate is available"}
-            else:
-                status["libretranslate"] = {"available": False, "message": f"HTTP {response.status_code}"}
+        response = await get_http_pool().post(
+            LIBRETRANSLATE_URL,
+            json={"q": "test", "source": "en", "target": "th"},
+            timeout=5.0
+        )
+        if response.status_code == 200:
+            status["libretranslate"] = {"available": True, "message": "LibreTranslate is available"}
+        else:
+            status["libretranslate"] = {"available": False, "message": f"HTTP {response.status_code}"}
     except Exception as e:
         status["libretranslate"] = {"available": False, "message": str(e)}
 
@@ -1,10 +1,17 @@
 # app/routers/turtle/turtle_execute.py
 # not used whole file
 import os
+import asyncio
+import hashlib
 from pathlib import Path
 
 import httpx
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import Response
+
+from app.services.http_clients import get_http_pool
+from app.services.ttl_cache import TTLCache
+from app.services.turtle_renderer import render_turtle_lines
 
 router = APIRouter(tags=["Turtle Execute"])
 
@@ -16,6 +23,13 @@ CODE_API_BASE = os.getenv("CODE_API_BASE", "http://localhost:8000/api")
 BASE_EXEC_DIR = Path(__file__).resolve().parents[2] / "executions"
 BASE_EXEC_DIR.mkdir(parents=True, exist_ok=True)
 
+# rendered snapshots by (format, executable lines); same runner.py -> same image
+RENDER_CACHE = TTLCache(
+    "turtle_render",
+    max_size=int(os.getenv("TURTLE_RENDER_CACHE_SIZE", "128")),
+    ttl_seconds=3600,
+)
+
 
 @router.get("/run_turtle/{conversation_id}")
 async def run_turtle(conversation_id: int):
@@ -29,82 +43,109 @@ async def run_turtle(conversation_id: int):
     try:
         start_url = f"{STREAM_DEVICE_BASE_URL}/start_turtle/{conversation_id}"
         command_url = f"{STREAM_DEVICE_BASE_URL}/turtle_command/{conversation_id}"
+        batch_url = f"{STREAM_DEVICE_BASE_URL}/turtle_commands/{conversation_id}"
         get_runner_url = f"{CODE_API_BASE}/get_runner_code"
 
-        async with httpx.AsyncClient(timeout=30.0, verify=False) as client:
-            # 1) start or reuse runtime
-            start_resp = await client.post(start_url)
-            if start_resp.status_code != 200:
-                raise HTTPException(
-                    status_code=start_resp.status_code,
-                    detail=f"Failed to start turtle session: {start_resp.text}",
-                )
+        http = get_http_pool()
+
+        # 1) start or reuse runtime
+        start_resp = await http.post(start_url, verify=False)
+        if start_resp.status_code != 200:
+            raise HTTPException(
+                status_code=start_resp.status_code,
+                detail=f"Failed to start turtle session: {start_resp.text}",
+            )
 
-            start_data = start_resp.json()
-            start_status = start_data.get("status")  # expected: "started" or "already_running"
+        start_data = start_resp.json()
+        start_status = start_data.get("status")  # expected: "started" or "already_running"
 
-            # 2) load runner.py
-            runner_resp = await client.get(
-                get_runner_url,
-                params={"conversation_id": conversation_id},
+        # 2) load runner.py
+        runner_resp = await http.get(
+            get_runner_url,
+            params={"conversation_id": conversation_id},
+            verify=False,
+        )
+        if runner_resp.status_code != 200:
+            raise HTTPException(
+                status_code=runner_resp.status_code,
+                detail=f"Failed to fetch runner code: {runner_resp.text}",
             )
-            if runner_resp.status_code != 200:
-                raise HTTPException(
-                    status_code=runner_resp.status_code,
-                    detail=f"Failed to fetch runner code: {runner_resp.text}",
-                )
 
-            runner_data = runner_resp.json()
-            runner_code = runner_data.get("code")
-            if runner_code is None:
-                raise HTTPException(
-                    status_code=400,
-                    detail="get_runner_code response missing 'code'",
-                )
+        runner_data = runner_resp.json()
+        runner_code = runner_data.get("code")
+        if runner_code is None:
+            raise HTTPException(
+                status_code=400,
+                detail="get_runner_code response missing 'code'",
+            )
 
-            # 3) decide mode
-            if start_status == "started":
-                commands = extract_all_executable_lines(runner_code)
-                mode = "replay"
-            else:
-                latest = extract_latest_runner_line(runner_code)
-                commands = [latest] if latest else []
-                mode = "latest_line"
-
-            if not commands:
-                return {
-                    "result": "No executable turtle commands found",
-                    "conversation_id": conversation_id,
-                    "mode": mode,
-                    "commands_sent": 0,
-                    "commands": [],
-                    "start_status": start_status,
-                }
-
-            # 4) send to Pi
-            sent = []
-            for cmd in commands:
-                send_resp = await client.post(
-                    command_url,
-                    params={"command": cmd},
-                )
-                if send_resp.status_code != 200:
-                    raise HTTPException(
-                        status_code=send_resp.status_code,
-                        detail=f"Pi turtle command failed for '{cmd}': {send_resp.text}",
-                    )
-                sent.append(cmd)
+        # 3) decide mode
+        if start_status == "started":
+            commands = extract_all_executable_lines(runner_code)
+            mode = "replay"
+        else:
+            latest = extract_latest_runner_line(runner_code)
+            commands = [latest] if latest else []
+            mode = "latest_line"
 
+        if not commands:
             return {
-                "result": "Turtle command flow complete",
+                "result": "No executable turtle commands found",
                 "conversation_id": conversation_id,
                 "mode": mode,
-                "commands_sent": len(sent),
-                "commands": sent,
+                "commands_sent": 0,
+                "commands": [],
                 "start_status": start_status,
-                "latest_command": sent[-1] if sent else None,
             }
 
+        # 4) send to Pi: a replay goes as one batch drawn with animation off
+        #    (one runtime round trip); Pis without /turtle_commands (404) get
+        #    the lines one by one
+        sent = []
+        errors = []
+        if mode == "replay":
+            batch_resp = await http.post(
+                batch_url,
+                params={"replay": "true"},
+                json={"commands": commands},
+                verify=False,
+                timeout=30.0 + 2.0 * len(commands),
+            )
+            if batch_resp.status_code == 200:
+                results = batch_resp.json().get("results", [])
+                sent = [r["command"] for r in results if r.get("status") != "ignored"]
+                errors = [r for r in results if r.get("status") == "error"]
+                commands = []
+            elif batch_resp.status_code != 404:
+                raise HTTPException(
+                    status_code=batch_resp.status_code,
+                    detail=f"Pi turtle batch failed: {batch_resp.text}",
+                )
+
+        for cmd in commands:
+            send_resp = await http.post(
+                command_url,
+                params={"command": cmd},
+                verify=False,
+            )
+            if send_resp.status_code != 200:
+                raise HTTPException(
+                    status_code=send_resp.status_code,
+                    detail=f"Pi turtle command failed for '{cmd}': {send_resp.text}",
+                )
+            sent.append(cmd)
+
+        return {
+            "result": "Turtle command flow complete",
+            "conversation_id": conversation_id,
+            "mode": mode,
+            "commands_sent": len(sent),
+            "commands": sent,
+            "errors": errors,
+            "start_status": start_status,
+            "latest_command": sent[-1] if sent else None,
+        }
+
     except httpx.RequestError as e:
         raise HTTPException(
             status_code=503,
@@ -173,8 +214,7 @@ async def refresh_turtle(conversation_id: int):
     try:
         start_url = f"{STREAM_DEVICE_BASE_URL}/start_turtle/{conversation_id}"
 
-        async with httpx.AsyncClient(timeout=30.0, verify=False) as client:
-            start_resp = await client.post(start_url)
+        start_resp = await get_http_pool().post(start_url, verify=False)
 
         if start_resp.status_code != 200:
             raise HTTPException(
@@ -202,4 +242,41 @@ async def refresh_turtle(conversation_id: int):
         raise HTTPException(
             status_code=500,
             detail=f"Failed to refresh turtle: {str(e)}",
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/render_turtle/{conversation_id}")
+async def render_turtle(
+    conversation_id: int,
+    format: str = Query("svg", pattern="^(svg|png)$"),
+):
+    """
+    Draw runner.py on the backend (no Pi, no display) and return an SVG or PNG
+    snapshot. Lines the headless renderer could not run are counted in the
+    X-Turtle-Errors header.
+    """
+    runner_path = BASE_EXEC_DIR / f"session_{conversation_id}" / "runner.py"
+    if not runner_path.exists():
+        raise HTTPException(
+            status_code=404,
+            detail=f"runner.py not found for conversation {conversation_id}",
+        )
+
+    commands = extract_all_executable_lines(runner_path.read_text(encoding="utf-8"))
+    key = f"{format}:" + hashlib.sha256("\n".join(commands).encode("utf-8")).hexdigest()
+
+    try:
+        content, media_type, errors = await RENDER_CACHE.get_or_compute(
+            key, lambda: asyncio.to_thread(render_turtle_lines, commands, format)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to render turtle graphics: {str(e)}",
+        )
+
+    return Response(
+        content=content,
+        media_type=media_type,
+        headers={"X-Turtle-Errors": str(len(errors))},
+    )
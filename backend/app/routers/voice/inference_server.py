@@ -0,0 +1,108 @@
+# backend/app/routers/voice/inference_server.py
+# ============================================================
+# Local speech inference server
+#
+#   python -m app.routers.voice.inference_server
+#
+# Owns the ModelManager, the Whisper pipelines and T5 in its own process and
+# serves them over a Unix socket (INFERENCE_SOCKET). Web workers started with
+# FEATURE_INFERENCE_SERVER=true forward /voice/* work here
+# (app.services.inference_client), so they stay light and never block on
+# model CPU time.
+#
+# Ops (framed JSON header + optional binary payload):
+#   transcribe  {"lang", "content_type"} + raw upload bytes -> {"text", "timing"}
+#   paraphrase  {"text", "n"}                              -> {"alternatives"}
+#   stats       {}                                          -> {"stats"}
+#   ping        {}                                          -> {}
+# ============================================================
+import os
+import socketserver
+import threading
+import time
+
+from app.services import inference_client
+from app.services.inference_client import INFERENCE_SOCKET, recv_frame, send_frame
+
+# this process does the work itself: never forward to ourselves
+inference_client.FEATURE_INFERENCE_SERVER = False
+
+from app.routers.voice import voice  # noqa: E402  (after the flag override)
+
+
+def _stats():
+    stats = {"prewarmed": voice._models_prewarmed, "batching": voice._batching_stats()}
+    if voice.USE_MODEL_MANAGER:
+        stats["model_manager_stats"] = voice.get_model_manager().get_stats()
+    return stats
+
+
+def dispatch(header, payload):
+    op = header.get("op")
+
+    if op == "transcribe":
+        result = voice.transcribe_local(payload, header.get("content_type"), header.get("lang", "en"))
+        return {"ok": True, **result}
+
+    if op == "paraphrase":
+        return {"ok": True, "alternatives": voice.paraphrase(header.get("text", ""), n=header.get("n", 3))}
+
+    if op == "stats":
+        return {"ok": True, "stats": _stats()}
+
+    if op == "ping":
+        return {"ok": True}
+
+    return {"ok": False, "error": f"unknown op '{op}'"}
+
+
+class InferenceRequestHandler(socketserver.BaseRequestHandler):
+    """One thread per client connection; a connection carries many requests."""
+
+    def handle(self):
+        while True:
+            try:
+                header, payload = recv_frame(self.request)
+            except (ConnectionError, OSError, ValueError):
+                return
+
+            start = time.time()
+            try:
+                reply = dispatch(header, payload)
+            except Exception as e:
+                print(f"[INFERENCE] {header.get('op')} failed: {e}")
+                reply = {"ok": False, "error": str(e)}
+
+            try:
+                send_frame(self.request, reply)
+            except OSError:
+                return
+            print(f"[INFERENCE] {header.get('op')} in {time.time() - start:.2f}s")
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def main():
+    if os.path.exists(INFERENCE_SOCKET):
+        os.unlink(INFERENCE_SOCKET)
+
+    server = InferenceServer(INFERENCE_SOCKET, InferenceRequestHandler)
+    os.chmod(INFERENCE_SOCKET, 0o660)
+    print(f"[INFERENCE] Listening on {INFERENCE_SOCKET}")
+
+    # this process is where the models run, so pre-warm unless told not to
+    if os.getenv("PREWARM_MODELS", "true").lower() == "true":
+        threading.Thread(target=voice.prewarm_models, daemon=True).start()
+
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(INFERENCE_SOCKET):
+            os.unlink(INFERENCE_SOCKET)
+
+
+if __name__ == "__main__":
+    main()
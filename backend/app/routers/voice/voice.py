@@ -1,21 +1,60 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import subprocess, tempfile
 import threading
 import os
-import torch
-from transformers import pipeline, T5ForConditionalGeneration, T5Tokenizer
+import time
 import io
-import numpy as np
-import librosa
 from pathlib import Path
 
 from app.services import get_model_manager
+from app.services.micro_batcher import MicroBatcher
+from app.services.inference_client import get_inference_client, InferenceError
 
 router = APIRouter(prefix="/voice", tags=["voice"])
 
-# Device & dtype configuration
-device = "cuda" if torch.cuda.is_available() else "cpu"
-torch_dtype = torch.bfloat16 if torch.cuda.is_available() else torch.float32
+# Heavy ML stack, imported on first use by _ensure_ml_stack() so that importing
+# this router (and booting parser/CRUD workers) does not pay for torch & co.
+torch = None
+np = None
+librosa = None
+pipeline = None
+T5ForConditionalGeneration = None
+T5Tokenizer = None
+_ml_lock = threading.Lock()
+
+# Device & dtype configuration (set by _ensure_ml_stack)
+device = None
+torch_dtype = None
+
+
+def _ensure_ml_stack():
+    """Import torch/transformers/numpy/librosa once and pick device & dtype."""
+    global torch, np, librosa, pipeline, T5ForConditionalGeneration, T5Tokenizer
+    global device, torch_dtype
+
+    if torch is not None:
+        return
+
+    with _ml_lock:
+        if torch is not None:
+            return
+
+        start = time.time()
+        import numpy as _np
+        import librosa as _librosa
+        import torch as _torch
+        from transformers import pipeline as _pipeline, T5ForConditionalGeneration as _T5, T5Tokenizer as _T5Tok
+
+        np, librosa = _np, _librosa
+        pipeline, T5ForConditionalGeneration, T5Tokenizer = _pipeline, _T5, _T5Tok
+        device = "cuda" if _torch.cuda.is_available() else "cpu"
+        torch_dtype = _torch.bfloat16 if _torch.cuda.is_available() else _torch.float32
+        torch = _torch  # last: marks the stack as ready for the fast path
+
+        print(f"[voice] ML stack imported in {time.time() - start:.1f}s (device={device})")
 
 # Separate locks for each model (fixes thread lock contention)
 _thai_lock = threading.Lock()
@@ -27,12 +66,46 @@ _models_prewarmed = False
 thai_pipe = None
 english_pipe = None
 
+# CPU inference mode: "fp32" (default) or "int8" (dynamic int8 quantization of
+# Linear layers for Whisper and T5; roughly halves resident model memory)
+CPU_INFERENCE_MODE = os.getenv("CPU_INFERENCE_MODE", "fp32").lower()
+
 # Feature flag for model manager integration
 USE_MODEL_MANAGER = os.getenv("FEATURE_MODEL_MANAGER", "true").lower() == "true"
 
+# Micro-batching of concurrent transcriptions (one batched forward pass per window)
+USE_WHISPER_BATCHING = os.getenv("FEATURE_WHISPER_BATCHING", "true").lower() == "true"
+WHISPER_BATCH_WINDOW_MS = float(os.getenv("WHISPER_BATCH_WINDOW_MS", "30"))
+WHISPER_BATCH_MAX = int(os.getenv("WHISPER_BATCH_MAX", "8"))
+
+
+def quantize_for_cpu(model, mode=None):
+    """
+    Apply the CPU inference mode to a torch model. No-op on GPU or in fp32 mode.
+    int8: torch dynamic quantization (int8 weights, activations quantized on the fly).
+    """
+    _ensure_ml_stack()
+    mode = (mode or CPU_INFERENCE_MODE).lower()
+    if mode not in ("fp32", "int8"):
+        print(f"[voice] Unknown CPU_INFERENCE_MODE '{mode}', using fp32")
+        return model
+    if mode != "int8" or device != "cpu":
+        return model
+
+    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    model.eval()
+    return model
+
 
-def _create_thai_pipeline():
+def _size_estimate_mb(fp32_mb):
+    """Registered size estimate for the model manager (Linear weights dominate)."""
+    # int8 is a CPU-only mode, so no device check (that would import torch)
+    return fp32_mb // 2 if CPU_INFERENCE_MODE == "int8" else fp32_mb
+
+
+def _create_thai_pipeline(mode=None):
     """Factory function to create Thai Whisper pipeline."""
+    _ensure_ml_stack()
     print("Loading Thai Whisper model...")
     pipe = pipeline(
         task="automatic-speech-recognition",
@@ -46,12 +119,14 @@ def _create_thai_pipeline():
         language="th",
         task="transcribe"
     )
+    pipe.model = quantize_for_cpu(pipe.model, mode)
     print("Thai Whisper model loaded successfully")
     return pipe
 
 
-def _create_english_pipeline():
+def _create_english_pipeline(mode=None):
     """Factory function to create English Whisper pipeline."""
+    _ensure_ml_stack()
     print("Loading English Whisper model...")
     pipe = pipeline(
         task="automatic-speech-recognition",
@@ -65,6 +140,7 @@ def _create_english_pipeline():
         language="en",
         task="transcribe"
     )
+    pipe.model = quantize_for_cpu(pipe.model, mode)
     print("English Whisper model loaded successfully")
     return pipe
 
@@ -76,12 +152,12 @@ def _register_models():
         manager.register(
             name="whisper_thai",
             loader=_create_thai_pipeline,
-            size_mb=3000  # ~3GB
+            size_mb=_size_estimate_mb(3000)  # ~3GB in fp32
         )
         manager.register(
             name="whisper_english",
             loader=_create_english_pipeline,
-            size_mb=1500  # ~1.5GB
+            size_mb=_size_estimate_mb(1500)  # ~1.5GB in fp32
         )
         print("[voice] Models registered with ModelManager")
 
@@ -138,6 +214,10 @@ def prewarm_models():
     if _models_prewarmed:
         return {"status": "already_warmed"}
 
+    if get_inference_client() is not None:
+        # models live in the inference server process, which pre-warms itself
+        return {"status": "remote"}
+
     print("\n" + "="*50)
     print("PRE-WARMING WHISPER MODELS...")
     print("="*50)
@@ -167,6 +247,66 @@ def prewarm_models():
     return {"status": "warmed", "time": total_time}
 
 
+def _whisper_generate_kwargs(lang_code):
+    return {
+        "language": lang_code,
+        "task": "transcribe",
+        "num_beams": 1,  # Faster greedy decoding instead of beam search
+    }
+
+
+def _t5_generate_kwargs(n):
+    return {
+        "max_length": 128,
+        "num_return_sequences": n,
+        "num_beams": 5,
+        "temperature": 1.5,
+        "early_stopping": True,
+    }
+
+
+def _make_batch_runner(get_pipe, lang_code):
+    def run_batch(items):
+        # fetched per batch: the model manager may have evicted it meanwhile
+        pipe = get_pipe()
+        outputs = pipe(
+            [dict(item) for item in items],  # the pipeline pops keys from its input
+            batch_size=len(items),
+            return_timestamps=False,
+            generate_kwargs=_whisper_generate_kwargs(lang_code),
+        )
+        return [o["text"] for o in outputs]
+    return run_batch
+
+
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+def get_whisper_batcher(lang_code):
+    """One MicroBatcher per language model, created on first use."""
+    batcher = _batchers.get(lang_code)
+    if batcher is not None:
+        return batcher
+
+    with _batchers_lock:
+        if lang_code not in _batchers:
+            get_pipe = get_thai_pipe if lang_code == "th" else get_english_pipe
+            _batchers[lang_code] = MicroBatcher(
+                f"whisper_{lang_code}",
+                run_batch=_make_batch_runner(get_pipe, lang_code),
+                window_ms=WHISPER_BATCH_WINDOW_MS,
+                max_batch=WHISPER_BATCH_MAX,
+            )
+        return _batchers[lang_code]
+
+
+def _batching_stats():
+    if not USE_WHISPER_BATCHING:
+        return {"enabled": False}
+    return {"enabled": True, **{lang: b.get_stats() for lang, b in _batchers.items()}}
+
+
 @router.post("/prewarm")
 async def prewarm_voice_models():
     """API endpoint to pre-warm voice models"""
@@ -176,20 +316,29 @@ async def prewarm_voice_models():
 @router.get("/status")
 async def voice_status():
     """Check if voice models are loaded"""
+    client = get_inference_client()
+    if client is not None:
+        try:
+            return {"inference_server": await asyncio.to_thread(client.stats)}
+        except InferenceError as e:
+            return {"inference_server": None, "error": str(e)}
+
     if USE_MODEL_MANAGER:
         manager = get_model_manager()
         return {
             "english_loaded": manager.is_loaded("whisper_english"),
             "thai_loaded": manager.is_loaded("whisper_thai"),
             "prewarmed": _models_prewarmed,
-            "model_manager_stats": manager.get_stats()
+            "model_manager_stats": manager.get_stats(),
+            "batching": _batching_stats(),
         }
 
     return {
         "english_loaded": english_pipe is not None,
         "thai_loaded": thai_pipe is not None,
         "prewarmed": _models_prewarmed,
-        "model_manager_enabled": False
+        "model_manager_enabled": False,
+        "batching": _batching_stats(),
     }
 
 
@@ -200,6 +349,15 @@ T5_AVAILABLE = False
 _t5_loaded = False
 
 
+def _create_t5_model(mode=None):
+    """Factory function for the T5 paraphraser: (tokenizer, model)."""
+    _ensure_ml_stack()
+    t5_model_name = "Vamsi/T5_Paraphrase_Paws"
+    tokenizer = T5Tokenizer.from_pretrained(t5_model_name, legacy=False)
+    model = T5ForConditionalGeneration.from_pretrained(t5_model_name)
+    return tokenizer, quantize_for_cpu(model, mode)
+
+
 def _load_t5_model():
     """Lazy load T5 paraphrasing model."""
     global t5_tokenizer, t5_model, T5_AVAILABLE, _t5_loaded
@@ -213,9 +371,7 @@ def _load_t5_model():
 
         try:
             print("Loading T5 paraphrasing model...")
-            t5_model_name = "Vamsi/T5_Paraphrase_Paws"
-            t5_tokenizer = T5Tokenizer.from_pretrained(t5_model_name, legacy=False)
-            t5_model = T5ForConditionalGeneration.from_pretrained(t5_model_name)
+            t5_tokenizer, t5_model = _create_t5_model()
             print("T5 paraphrasing model loaded successfully")
             T5_AVAILABLE = True
         except Exception as e:
@@ -229,6 +385,14 @@ def _load_t5_model():
 
 
 def paraphrase(text, n=3):
+    client = get_inference_client()
+    if client is not None:
+        try:
+            return client.paraphrase(text, n)
+        except InferenceError as e:
+            print(f"Paraphrasing error: {e}")
+            return [text] * n
+
     # Lazy load T5 model
     if not _load_t5_model():
         # Return the original text as alternatives if T5 is not available
@@ -237,20 +401,232 @@ def paraphrase(text, n=3):
     try:
         input_text = f"paraphrase: {text} </s>"
         encoding = t5_tokenizer([input_text], return_tensors="pt", padding=True)
-        outputs = t5_model.generate(
-            **encoding,
-            max_length=128,
-            num_return_sequences=n,
-            num_beams=5,
-            temperature=1.5,
-            early_stopping=True
-        )
+        outputs = t5_model.generate(**encoding, **_t5_generate_kwargs(n))
         return [t5_tokenizer.decode(o, skip_special_tokens=True) for o in outputs]
     except Exception as e:
         print(f"Paraphrasing error: {e}")
         return [text] * n
 
 
+# Async paraphrase alternatives (kept off the transcription critical path)
+USE_ASYNC_PARAPHRASE = os.getenv("FEATURE_ASYNC_PARAPHRASE", "true").lower() == "true"
+PARAPHRASE_CACHE_SIZE = int(os.getenv("PARAPHRASE_CACHE_SIZE", "512"))
+PARAPHRASE_WORKERS = int(os.getenv("PARAPHRASE_WORKERS", "1"))
+
+_paraphrase_executor = ThreadPoolExecutor(max_workers=PARAPHRASE_WORKERS, thread_name_prefix="t5-paraphrase")
+_alternatives_cache = OrderedDict()   # normalised text -> alternatives (LRU)
+_alternatives_pending = {}            # normalised text -> Future
+_alternatives_lock = threading.Lock()
+
+
+def _alternatives_key(text):
+    return " ".join(text.lower().split())
+
+
+def _paraphrase_job(key, text):
+    try:
+        alternatives = paraphrase(text, n=3)
+        with _alternatives_lock:
+            _alternatives_cache[key] = alternatives
+            _alternatives_cache.move_to_end(key)
+            while len(_alternatives_cache) > PARAPHRASE_CACHE_SIZE:
+                _alternatives_cache.popitem(last=False)
+        return alternatives
+    finally:
+        with _alternatives_lock:
+            _alternatives_pending.pop(key, None)
+
+
+def request_alternatives(text):
+    """
+    Cached alternatives for `text`, or None after scheduling T5 in the
+    background (one job per normalised text).
+    """
+    key = _alternatives_key(text)
+    with _alternatives_lock:
+        cached = _alternatives_cache.get(key)
+        if cached is not None:
+            _alternatives_cache.move_to_end(key)
+            return cached
+        if key not in _alternatives_pending:
+            _alternatives_pending[key] = _paraphrase_executor.submit(_paraphrase_job, key, text)
+    return None
+
+
+@router.get("/alternatives")
+async def get_alternatives(
+    text: str = Query(..., description="Transcribed text returned by /voice/transcribe"),
+    wait: float = Query(0, ge=0, le=30, description="Seconds to wait for a pending result"),
+):
+    """Follow-up for /voice/transcribe: paraphrase alternatives once ready."""
+    alternatives = request_alternatives(text)
+    if alternatives is None and wait > 0:
+        with _alternatives_lock:
+            future = _alternatives_pending.get(_alternatives_key(text))
+        if future is not None:
+            try:
+                alternatives = await asyncio.wait_for(asyncio.wrap_future(future), timeout=wait)
+            except asyncio.TimeoutError:
+                alternatives = None
+        else:
+            alternatives = request_alternatives(text)
+
+    return {
+        "text": text,
+        "ready": alternatives is not None,
+        "alternatives": alternatives if alternatives is not None else [text] * 3,
+    }
+
+
+# In-memory audio decoding (no temp files)
+WHISPER_SAMPLE_RATE = 16000
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+# containers libsndfile reads directly; everything else (webm/opus, mp4, mp3) goes through ffmpeg
+_SOUNDFILE_TYPES = ("audio/wav", "audio/x-wav", "audio/wave", "audio/flac", "audio/x-flac")
+
+
+def _decode_with_soundfile(audio_bytes):
+    import soundfile as sf
+
+    data, sr = sf.read(io.BytesIO(audio_bytes), dtype="float32", always_2d=False)
+    if data.ndim > 1:
+        data = data.mean(axis=1)
+    if sr != WHISPER_SAMPLE_RATE:
+        data = librosa.resample(data, orig_sr=sr, target_sr=WHISPER_SAMPLE_RATE)
+    return np.ascontiguousarray(data, dtype=np.float32)
+
+
+def _decode_with_ffmpeg(audio_bytes):
+    # ffmpeg does demux + decode + downmix + resample in one pass
+    result = subprocess.run(
+        [
+            FFMPEG_BIN, "-nostdin", "-loglevel", "error",
+            "-i", "pipe:0",
+            "-f", "f32le", "-acodec", "pcm_f32le",
+            "-ac", "1", "-ar", str(WHISPER_SAMPLE_RATE),
+            "pipe:1",
+        ],
+        input=audio_bytes,
+        capture_output=True,
+        check=True,
+    )
+    # zero-copy view over ffmpeg's output buffer
+    return np.frombuffer(result.stdout, dtype=np.float32)
+
+
+def _decode_with_librosa(audio_bytes, content_type):
+    """Old path: temp file + librosa.load (used only if the fast paths fail)."""
+    import mimetypes
+    ext = mimetypes.guess_extension(content_type or "") or '.webm'
+    with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp_file:
+        tmp_file.write(audio_bytes)
+        tmp_path = tmp_file.name
+    try:
+        audio_array, _ = librosa.load(tmp_path, sr=WHISPER_SAMPLE_RATE)
+        return audio_array
+    finally:
+        os.unlink(tmp_path)
+
+
+def decode_audio(audio_bytes, content_type=None):
+    """
+    Decode an upload to a 16 kHz mono float32 array without touching disk.
+    soundfile for WAV/FLAC, an ffmpeg pipe for everything else,
+    temp file + librosa as a last resort.
+    """
+    _ensure_ml_stack()
+    content_type = (content_type or "").split(";")[0].strip().lower()
+
+    if content_type in _SOUNDFILE_TYPES:
+        try:
+            return _decode_with_soundfile(audio_bytes), WHISPER_SAMPLE_RATE
+        except Exception as e:
+            print(f"[voice] soundfile decode failed ({e}), trying ffmpeg")
+
+    try:
+        return _decode_with_ffmpeg(audio_bytes), WHISPER_SAMPLE_RATE
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"[voice] ffmpeg decode failed ({e}), falling back to librosa")
+
+    return _decode_with_librosa(audio_bytes, content_type), WHISPER_SAMPLE_RATE
+
+
+def _language_code(language):
+    return "th" if language.lower() in ["th", "thai", "ไทย"] else "en"
+
+
+def _prepare_transcription(audio_bytes, content_type, lang_code):
+    """Decode the audio and make sure the model is loaded (blocking) -> (pipe, audio_input, timings)."""
+    start_time = time.time()
+
+    # Decode in memory straight to 16 kHz mono float32 (Whisper input)
+    audio_array, sampling_rate = decode_audio(audio_bytes, content_type)
+    load_time = time.time()
+    print(f"[TIMING] Audio load: {load_time - start_time:.2f}s")
+
+    # Select appropriate pipeline based on language
+    pipe = get_thai_pipe() if lang_code == "th" else get_english_pipe()
+
+    model_load_time = time.time()
+    print(f"[TIMING] Model load: {model_load_time - load_time:.2f}s")
+
+    audio_input = {"array": audio_array, "sampling_rate": sampling_rate}
+    return pipe, audio_input, (start_time, load_time, model_load_time)
+
+
+def _transcription_result(prediction, timings):
+    start_time, load_time, model_load_time = timings
+    transcribe_time = time.time()
+    print(f"[TIMING] Transcription: {transcribe_time - model_load_time:.2f}s")
+
+    return {
+        "text": prediction,
+        "timing": {
+            "audio_load": round(load_time - start_time, 2),
+            "model_load": round(model_load_time - load_time, 2),
+            "transcription": round(transcribe_time - model_load_time, 2),
+        },
+    }
+
+
+def transcribe_local(audio_bytes, content_type, lang_code):
+    """
+    Decode + transcribe in this process (blocking).
+    Returns {"text": raw prediction, "timing": {audio_load, model_load, transcription}}.
+    Used by the inference server on its side (one thread per request there).
+    """
+    pipe, audio_input, timings = _prepare_transcription(audio_bytes, content_type, lang_code)
+
+    # Transcribe with optimizations
+    if USE_WHISPER_BATCHING:
+        # concurrent requests share one forward pass
+        prediction = get_whisper_batcher(lang_code).submit(audio_input).result()
+    else:
+        prediction = pipe(
+            audio_input,
+            return_timestamps=False,
+            generate_kwargs=_whisper_generate_kwargs(lang_code),
+        )["text"]
+
+    return _transcription_result(prediction, timings)
+
+
+async def transcribe_local_async(audio_bytes, content_type, lang_code):
+    """
+    transcribe_local for the /transcribe endpoint. With batching, waiting for
+    the batch is awaited on the event loop instead of parking a thread-pool
+    thread per request, so batches are bounded by max_batch, not the pool size.
+    """
+    if not USE_WHISPER_BATCHING:
+        return await asyncio.to_thread(transcribe_local, audio_bytes, content_type, lang_code)
+
+    _, audio_input, timings = await asyncio.to_thread(
+        _prepare_transcription, audio_bytes, content_type, lang_code
+    )
+    prediction = await get_whisper_batcher(lang_code).submit_async(audio_input)
+    return _transcription_result(prediction, timings)
+
+
 @router.post("/transcribe")
 async def transcribe_audio(
     file: UploadFile = File(...),
@@ -261,9 +637,9 @@ async def transcribe_audio(
     - English: distil-whisper/distil-large-v3 (faster, more accurate)
     - Thai: nectec/Pathumma-whisper-th-large-v3 (Thai-specific fine-tuned model)
 
+    With FEATURE_INFERENCE_SERVER the work runs in the inference server process.
     TTS is handled by the browser's Web Audio API on the frontend
     """
-    import time
     start_time = time.time()
 
     try:
@@ -272,51 +648,17 @@ async def transcribe_audio(
         io_time = time.time()
         print(f"[TIMING] Audio read: {io_time - start_time:.2f}s")
 
-        # Save to temporary file (librosa needs a file path)
-        import mimetypes
-        ext = mimetypes.guess_extension(file.content_type) or '.webm'
-        with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as tmp_file:
-            tmp_file.write(audio_bytes)
-            tmp_path = tmp_file.name
+        lang_code = _language_code(language)
 
-        try:
-            # Load audio with librosa (Whisper uses 16kHz)
-            audio_array, sampling_rate = librosa.load(
-                tmp_path,
-                sr=16000
-            )
-            load_time = time.time()
-            print(f"[TIMING] Audio load: {load_time - io_time:.2f}s")
-        finally:
-            # Clean up temp file
-            import os
-            os.unlink(tmp_path)
-
-        # Select appropriate pipeline based on language
-        if language.lower() in ["th", "thai", "ไทย"]:
-            pipe = get_thai_pipe()
-            lang_code = "th"
+        client = get_inference_client()
+        if client is not None:
+            result = await client.transcribe_async(audio_bytes, file.content_type, lang_code)
         else:
-            pipe = get_english_pipe()
-            lang_code = "en"
+            # off the event loop so parser/CRUD requests keep being served
+            result = await transcribe_local_async(audio_bytes, file.content_type, lang_code)
 
-        model_load_time = time.time()
-        print(f"[TIMING] Model load: {model_load_time - load_time:.2f}s")
-
-        # Transcribe with optimizations
-        prediction = pipe(
-            {"array": audio_array, "sampling_rate": sampling_rate},
-            return_timestamps=False,
-            generate_kwargs={
-                "language": lang_code,
-                "task": "transcribe",
-                "num_beams": 1,  # Faster greedy decoding instead of beam search
-            }
-        )["text"]
-
-        transcribe_time = time.time()
-        total_time = transcribe_time - start_time
-        print(f"[TIMING] Transcription: {transcribe_time - model_load_time:.2f}s")
+        prediction = result["text"]
+        total_time = time.time() - start_time
         print(f"[TIMING] TOTAL: {total_time:.2f}s")
         print(f"[Whisper] Transcription ({lang_code}): '{prediction}'")
 
@@ -326,23 +668,34 @@ async def transcribe_audio(
             raise HTTPException(status_code=422, detail="Empty transcription")
 
         # Generate paraphrases only for English
-        alternatives = paraphrase(text, n=3) if lang_code == "en" else [text] * 3
+        alternatives_ready = True
+        if lang_code != "en":
+            alternatives = [text] * 3
+        elif USE_ASYNC_PARAPHRASE:
+            # T5 runs in the background; clients poll GET /voice/alternatives
+            alternatives = request_alternatives(text)
+            alternatives_ready = alternatives is not None
+            if not alternatives_ready:
+                alternatives = [text] * 3
+        else:
+            alternatives = await asyncio.to_thread(paraphrase, text, 3)
 
         return {
             "text": text,
             "language": lang_code,
             "alternatives": alternatives,
+            "alternatives_ready": alternatives_ready,
             "original": text,
             "confidence": 1.0,
             "timing": {
                 "total": round(total_time, 2),
                 "audio_read": round(io_time - start_time, 2),
-                "audio_load": round(load_time - io_time, 2),
-                "model_load": round(model_load_time - load_time, 2),
-                "transcription": round(transcribe_time - model_load_time, 2)
+                **result["timing"],
             }
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         import traceback
         error_details = traceback.format_exc()
@@ -1,5 +1,23 @@
 """Services module for model management and other shared services."""
 
 from .model_manager import ModelManager, get_model_manager
+from .session_workers import SessionWorkerPool, get_session_worker_pool
+from .exec_pool import ExecPool, get_exec_pool
+from .micro_batcher import MicroBatcher
+from .inference_client import InferenceClient, get_inference_client
+from .ttl_cache import TTLCache
+from .http_clients import HTTPClientPool, get_http_pool
+from .turtle_renderer import run_turtle_lines, render_turtle_lines
+from .session_state import SessionStateStore, get_session_state_store
 
-__all__ = ['ModelManager', 'get_model_manager']
+__all__ = [
+    'ModelManager', 'get_model_manager',
+    'SessionWorkerPool', 'get_session_worker_pool',
+    'ExecPool', 'get_exec_pool',
+    'MicroBatcher',
+    'InferenceClient', 'get_inference_client',
+    'TTLCache',
+    'HTTPClientPool', 'get_http_pool',
+    'run_turtle_lines', 'render_turtle_lines',
+    'SessionStateStore', 'get_session_state_store',
+]
@@ -0,0 +1,204 @@
+"""
+Pre-forked interpreter pool for /execute_simple.
+
+Instead of starting a fresh `python` per request, a fixed number of warm
+runner_worker.py processes (isolated mode) take code over a pipe.
+Features:
+- Pre-warming: workers start up front and import EXEC_POOL_PREWARM modules once
+- Isolation: every job runs in a child forked from the warm worker (zygote),
+  so changes to pre-warmed modules, builtins or sys.path die with the job;
+  where os.fork is missing the worker is recycled after every job instead
+- Same timeout semantics: a job that overruns kills its worker and job child
+- Recycling: a worker is replaced after EXEC_POOL_MAX_JOBS jobs or when its
+  peak RSS grows beyond EXEC_POOL_MAX_RSS_MB
+- Bounded concurrency: bursts queue for a free worker instead of forking
+"""
+
+import os
+import time
+import queue
+import signal
+import tempfile
+import threading
+import subprocess
+from dataclasses import dataclass
+from typing import Optional, Dict, Any
+
+from .session_workers import WorkerFailed, spawn_worker, send_request
+
+# Feature flag
+FEATURE_EXEC_POOL = os.getenv("FEATURE_EXEC_POOL", "true").lower() == "true"
+
+# Configuration from environment
+POOL_SIZE = int(os.getenv("EXEC_POOL_SIZE", "4"))
+MAX_JOBS_PER_WORKER = int(os.getenv("EXEC_POOL_MAX_JOBS", "100"))
+MAX_RSS_MB = int(os.getenv("EXEC_POOL_MAX_RSS_MB", "256"))
+PREWARM_MODULES = os.getenv("EXEC_POOL_PREWARM", "math,random,json,time,collections,itertools")
+
+
+@dataclass
+class PooledWorker:
+    """One warm interpreter and its usage counters."""
+    process: Optional[subprocess.Popen] = None
+    jobs: int = 0
+    rss_mb: float = 0
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        self.stop()
+        self.process = spawn_worker(tempfile.gettempdir(), "--isolated", PREWARM_MODULES,
+                                    new_session=hasattr(os, "killpg"))
+        self.jobs = 0
+        self.rss_mb = 0
+
+    def stop(self):
+        if self.process is None:
+            return
+        try:
+            if hasattr(os, "killpg"):
+                # the zygote and a job child it may have forked
+                os.killpg(self.process.pid, signal.SIGKILL)
+            else:
+                self.process.kill()
+            self.process.wait(timeout=5)
+        except Exception:
+            pass
+        self.process = None
+
+
+class ExecPool:
+    """
+    Fixed-size pool of warm interpreters.
+
+    Usage:
+        pool = get_exec_pool()
+        result = pool.run(code, timeout=30)
+        # {"output": ..., "error": ..., "success": ...}  (same shape as before)
+    """
+
+    def __init__(self, size: int = POOL_SIZE, max_jobs: int = MAX_JOBS_PER_WORKER,
+                 max_rss_mb: int = MAX_RSS_MB):
+        self.size = size
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.idle: "queue.Queue[PooledWorker]" = queue.Queue()
+        self.lock = threading.Lock()
+        self.jobs_run = 0
+        self.timeouts = 0
+        self.recycled = 0
+        self._running = True
+
+        for _ in range(size):
+            worker = PooledWorker()
+            worker.start()
+            self.idle.put(worker)
+
+        print(f"[ExecPool] Initialized with size={size}, max_jobs={max_jobs}, max_rss={max_rss_mb}MB")
+
+    def run(self, code: str, timeout: float) -> Dict[str, Any]:
+        """
+        Execute `code` in a warm worker.
+        Raises subprocess.TimeoutExpired if no result within `timeout`
+        (time spent waiting for a free worker counts too).
+        """
+        deadline = time.time() + timeout
+        try:
+            worker = self.idle.get(timeout=timeout)
+        except queue.Empty:
+            raise subprocess.TimeoutExpired("execute_simple", timeout)
+
+        try:
+            if not worker.alive():
+                worker.start()
+
+            remaining = max(deadline - time.time(), 0.001)
+            try:
+                reply = send_request(worker.process, code, remaining)
+            except subprocess.TimeoutExpired:
+                with self.lock:
+                    self.timeouts += 1
+                worker.stop()
+                raise subprocess.TimeoutExpired("execute_simple", timeout)
+            except WorkerFailed as e:
+                worker.stop()
+                return {"output": "", "error": f"Execution error: {e}", "success": False}
+
+            worker.jobs += 1
+            worker.rss_mb = reply.get("rss_mb", 0)
+            with self.lock:
+                self.jobs_run += 1
+
+            # an in-process (not forked) job may have changed shared modules
+            if (not reply.get("forked") or worker.jobs >= self.max_jobs
+                    or worker.rss_mb > self.max_rss_mb):
+                with self.lock:
+                    self.recycled += 1
+                worker.stop()
+
+            output = reply.get("stdout", "")
+            error = reply.get("stderr", "")
+            success = reply.get("returncode", 1) == 0
+
+            # If there's an error but no stderr, include returncode info
+            if not success and not error:
+                error = f"Process exited with code {reply.get('returncode')}"
+
+            return {"output": output, "error": error, "success": success}
+        finally:
+            # stopped workers are restarted here, off the next job's clock
+            if not self._running:
+                worker.stop()
+            else:
+                if not worker.alive():
+                    worker.start()
+                self.idle.put(worker)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get statistics about the pool."""
+        with self.lock:
+            return {
+                "size": self.size,
+                "idle_workers": self.idle.qsize(),
+                "max_jobs_per_worker": self.max_jobs,
+                "max_rss_mb": self.max_rss_mb,
+                "jobs_run": self.jobs_run,
+                "timeouts": self.timeouts,
+                "recycled": self.recycled,
+            }
+
+    def shutdown(self):
+        """Stop all idle workers (busy ones are stopped when they finish)."""
+        self._running = False
+        while True:
+            try:
+                worker = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            worker.stop()
+
+
+# Global singleton instance
+_exec_pool: Optional[ExecPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_exec_pool() -> Optional[ExecPool]:
+    """
+    Get the global ExecPool instance.
+
+    Returns:
+        ExecPool singleton, or None when FEATURE_EXEC_POOL is off
+    """
+    global _exec_pool
+
+    if not FEATURE_EXEC_POOL:
+        return None
+
+    if _exec_pool is None:
+        with _pool_lock:
+            if _exec_pool is None:
+                _exec_pool = ExecPool()
+
+    return _exec_pool
@@ -0,0 +1,216 @@
+"""
+Shared keep-alive HTTP clients for outbound calls (LibreTranslate, the
+streaming Pi, the code API).
+
+Features:
+- One httpx.AsyncClient per (origin, verify): connections stay open between
+  requests, and the pool limits apply per host
+- Opt-in HTTP/2 (HTTP_POOL_HTTP2=true), which needs the `h2` package
+  (`pip install "httpx[http2]"`, not in requirements.txt); without it the
+  clients stay on HTTP/1.1
+- Per-host metrics: requests, errors, status classes, latency, clients opened
+- Lifespan managed: main.py closes every client on shutdown
+- FEATURE_SHARED_HTTP_CLIENT=false restores one short-lived client per request
+"""
+
+import os
+import time
+import threading
+import importlib.util
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+# Feature flag
+FEATURE_SHARED_HTTP_CLIENT = os.getenv("FEATURE_SHARED_HTTP_CLIENT", "true").lower() == "true"
+
+# Configuration from environment
+MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE_PER_HOST = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "10"))
+KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("HTTP_POOL_KEEPALIVE_EXPIRY", "60"))
+DEFAULT_TIMEOUT_SECONDS = float(os.getenv("HTTP_POOL_TIMEOUT", "30"))
+HTTP2_REQUESTED = os.getenv("HTTP_POOL_HTTP2", "false").lower() == "true"
+HTTP2_ENABLED = HTTP2_REQUESTED and importlib.util.find_spec("h2") is not None
+if HTTP2_REQUESTED and not HTTP2_ENABLED:
+    print("[HTTPPool] HTTP_POOL_HTTP2=true but the h2 package is missing "
+          "(pip install \"httpx[http2]\"); using HTTP/1.1")
+
+
+@dataclass
+class HostStats:
+    """Counters for one origin."""
+    requests: int = 0
+    errors: int = 0
+    status_2xx: int = 0
+    status_4xx: int = 0
+    status_5xx: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    clients_opened: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        completed = self.requests - self.errors
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "status_2xx": self.status_2xx,
+            "status_4xx": self.status_4xx,
+            "status_5xx": self.status_5xx,
+            "avg_ms": round(self.total_seconds / completed * 1000, 1) if completed else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 1),
+            "clients_opened": self.clients_opened,
+        }
+
+
+class HTTPClientPool:
+    """
+    Keeps one AsyncClient per origin alive for the lifetime of the app.
+
+    Usage:
+        http = get_http_pool()
+        response = await http.request("POST", url, json=payload, timeout=5.0)
+        response = await http.request("POST", pi_url, verify=False)
+    """
+
+    def __init__(self, shared: bool = FEATURE_SHARED_HTTP_CLIENT):
+        self.shared = shared
+        self.limits = httpx.Limits(
+            max_connections=MAX_CONNECTIONS_PER_HOST,
+            max_keepalive_connections=MAX_KEEPALIVE_PER_HOST,
+            keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+        )
+        self._clients: Dict[Tuple[str, bool], httpx.AsyncClient] = {}
+        self._stats: Dict[str, HostStats] = {}
+        self._lock = threading.Lock()
+
+        print(f"[HTTPPool] Initialized: shared={shared}, http2={HTTP2_ENABLED}, "
+              f"per-host limit={MAX_CONNECTIONS_PER_HOST} ({MAX_KEEPALIVE_PER_HOST} keep-alive)")
+
+    def _new_client(self, verify: bool) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            verify=verify,
+            http2=HTTP2_ENABLED,
+            limits=self.limits,
+            timeout=DEFAULT_TIMEOUT_SECONDS,
+        )
+
+    def _host_stats(self, origin: str) -> HostStats:
+        stats = self._stats.get(origin)
+        if stats is None:
+            stats = self._stats[origin] = HostStats()
+        return stats
+
+    def client(self, url: str, verify: bool = True) -> httpx.AsyncClient:
+        """The shared client for the origin of `url` (created on first use)."""
+        origin = _origin(url)
+        key = (origin, verify)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None or client.is_closed:
+                    client = self._clients[key] = self._new_client(verify)
+                    self._host_stats(origin).clients_opened += 1
+        return client
+
+    async def request(self, method: str, url: str, verify: bool = True, **kwargs) -> httpx.Response:
+        """
+        Send one request through the shared client for its host.
+        kwargs go to httpx (params, json, timeout, ...). Raises httpx.RequestError
+        like a plain client would.
+        """
+        origin = _origin(url)
+        start = time.perf_counter()
+        try:
+            if self.shared:
+                response = await self.client(url, verify).request(method, url, **kwargs)
+            else:
+                async with self._new_client(verify) as client:
+                    with self._lock:
+                        self._host_stats(origin).clients_opened += 1
+                    response = await client.request(method, url, **kwargs)
+        except httpx.RequestError:
+            with self._lock:
+                stats = self._host_stats(origin)
+                stats.requests += 1
+                stats.errors += 1
+            raise
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            stats = self._host_stats(origin)
+            stats.requests += 1
+            stats.total_seconds += elapsed
+            stats.max_seconds = max(stats.max_seconds, elapsed)
+            if response.status_code >= 500:
+                stats.status_5xx += 1
+            elif response.status_code >= 400:
+                stats.status_4xx += 1
+            else:
+                stats.status_2xx += 1
+        return response
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "shared": self.shared,
+                "http2": HTTP2_ENABLED,
+                "max_connections_per_host": MAX_CONNECTIONS_PER_HOST,
+                "max_keepalive_per_host": MAX_KEEPALIVE_PER_HOST,
+                "keepalive_expiry_seconds": KEEPALIVE_EXPIRY_SECONDS,
+                "open_clients": sum(1 for c in self._clients.values() if not c.is_closed),
+                "hosts": {origin: stats.as_dict() for origin, stats in self._stats.items()},
+            }
+
+    async def aclose(self):
+        """Close every shared client (app shutdown)."""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                print(f"[HTTPPool] Error closing client: {e}")
+        print(f"[HTTPPool] Closed {len(clients)} client(s)")
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+# Global singleton instance
+_http_pool: Optional[HTTPClientPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_http_pool() -> HTTPClientPool:
+    """
+    Get the global HTTPClientPool instance.
+
+    Always returns a pool; with FEATURE_SHARED_HTTP_CLIENT off it opens a
+    short-lived client per request but still records metrics.
+    """
+    global _http_pool
+
+    if _http_pool is None:
+        with _pool_lock:
+            if _http_pool is None:
+                _http_pool = HTTPClientPool()
+
+    return _http_pool
+
+
+async def close_http_pool():
+    """Close the shared clients if the pool was ever created."""
+    if _http_pool is not None:
+        await _http_pool.aclose()
@@ -0,0 +1,167 @@
+"""
+Client for the local speech inference server (app.routers.voice.inference_server).
+
+Web workers do not hold Whisper/T5 when FEATURE_INFERENCE_SERVER is on; they
+ship the raw upload over a Unix socket and await the result.
+Features:
+- Framed protocol: 4-byte length + JSON header, then an optional binary payload
+- Blocking and async API (async runs the round trip in a thread)
+- Connection reuse: a small pool of idle sockets per client
+- No ML imports: safe to use from parser/CRUD workers
+"""
+
+import os
+import json
+import queue
+import socket
+import struct
+import asyncio
+import threading
+from typing import Optional, Dict, Any, Tuple
+
+# Feature flag
+FEATURE_INFERENCE_SERVER = os.getenv("FEATURE_INFERENCE_SERVER", "false").lower() == "true"
+
+# Configuration from environment
+INFERENCE_SOCKET = os.getenv("INFERENCE_SOCKET", "/tmp/pytalk-inference.sock")
+INFERENCE_TIMEOUT_SECONDS = float(os.getenv("INFERENCE_TIMEOUT", "120"))
+POOL_SIZE = int(os.getenv("INFERENCE_CLIENT_POOL", "8"))
+
+_HEADER = struct.Struct("!I")
+
+
+class InferenceError(Exception):
+    """The inference server could not be reached or reported an error."""
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    chunks = []
+    while n:
+        chunk = sock.recv(min(n, 1 << 20))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_frame(sock: socket.socket, header: Dict[str, Any], payload: bytes = b""):
+    """Send one frame. header["nbytes"] tells the peer how much payload follows."""
+    header = dict(header, nbytes=len(payload))
+    raw = json.dumps(header).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(raw)) + raw)
+    if payload:
+        sock.sendall(payload)
+
+
+def recv_frame(sock: socket.socket) -> Tuple[Dict[str, Any], bytes]:
+    """Receive one frame: (header, payload)."""
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    header = json.loads(_recv_exact(sock, size).decode("utf-8"))
+    nbytes = header.get("nbytes", 0)
+    payload = _recv_exact(sock, nbytes) if nbytes else b""
+    return header, payload
+
+
+class InferenceClient:
+    """
+    Talks to the inference server.
+
+    Usage:
+        client = get_inference_client()
+        result = await client.transcribe_async(audio_bytes, "audio/webm", "en")
+        alternatives = client.paraphrase("turn on the light", n=3)
+    """
+
+    def __init__(self, socket_path: str = INFERENCE_SOCKET, timeout: float = INFERENCE_TIMEOUT_SECONDS,
+                 pool_size: int = POOL_SIZE):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[socket.socket]" = queue.LifoQueue(maxsize=pool_size)
+
+    def request(self, header: Dict[str, Any], payload: bytes = b"") -> Dict[str, Any]:
+        """One round trip. Raises InferenceError on transport or server errors."""
+        sock, reused = self._checkout()
+        try:
+            send_frame(sock, header, payload)
+            reply, _ = recv_frame(sock)
+        except (OSError, ValueError, ConnectionError) as e:
+            sock.close()
+            if not reused or isinstance(e, socket.timeout):
+                raise InferenceError(f"inference server at {self.socket_path}: {e}")
+            # pooled socket went stale (server restarted): one retry on a fresh one
+            sock, _ = self._checkout(fresh=True)
+            try:
+                send_frame(sock, header, payload)
+                reply, _ = recv_frame(sock)
+            except (OSError, ValueError, ConnectionError) as e:
+                sock.close()
+                raise InferenceError(f"inference server at {self.socket_path}: {e}")
+
+        self._checkin(sock)
+        if not reply.get("ok"):
+            raise InferenceError(reply.get("error", "inference failed"))
+        return reply
+
+    async def request_async(self, header: Dict[str, Any], payload: bytes = b"") -> Dict[str, Any]:
+        return await asyncio.to_thread(self.request, header, payload)
+
+    def transcribe(self, audio_bytes: bytes, content_type: Optional[str], lang_code: str) -> Dict[str, Any]:
+        """-> {"text": ..., "timing": {...}}"""
+        return self.request({"op": "transcribe", "lang": lang_code, "content_type": content_type}, audio_bytes)
+
+    async def transcribe_async(self, audio_bytes: bytes, content_type: Optional[str], lang_code: str) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.transcribe, audio_bytes, content_type, lang_code)
+
+    def paraphrase(self, text: str, n: int = 3):
+        return self.request({"op": "paraphrase", "text": text, "n": n})["alternatives"]
+
+    def stats(self) -> Dict[str, Any]:
+        return self.request({"op": "stats"})["stats"]
+
+    def _checkout(self, fresh: bool = False) -> Tuple[socket.socket, bool]:
+        """(socket, reused_from_pool)"""
+        if not fresh:
+            try:
+                return self._idle.get_nowait(), True
+            except queue.Empty:
+                pass
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError as e:
+            sock.close()
+            raise InferenceError(f"inference server at {self.socket_path} unavailable: {e}")
+        return sock, False
+
+    def _checkin(self, sock: socket.socket):
+        try:
+            self._idle.put_nowait(sock)
+        except queue.Full:
+            sock.close()
+
+
+# Global singleton instance
+_inference_client: Optional[InferenceClient] = None
+_client_lock = threading.Lock()
+
+
+def get_inference_client() -> Optional[InferenceClient]:
+    """
+    Get the global InferenceClient instance.
+
+    Returns:
+        InferenceClient singleton, or None when FEATURE_INFERENCE_SERVER is off
+    """
+    global _inference_client
+
+    if not FEATURE_INFERENCE_SERVER:
+        return None
+
+    if _inference_client is None:
+        with _client_lock:
+            if _inference_client is None:
+                _inference_client = InferenceClient()
+
+    return _inference_client
@@ -0,0 +1,165 @@
+"""
+Micro-batching scheduler for model inference.
+
+Concurrent callers submit single items; a worker thread collects them for a
+short window (or until the batch is full) and runs one batched forward pass.
+Features:
+- Time/size window: flush after `window_ms` or `max_batch` items, whichever first
+- Per-caller results: every submit() gets its own future back
+- Async friendly: `await batcher.submit_async(item)` does not block the event loop
+- Failure isolation: if a batch fails, each item is retried alone so one bad
+  input does not fail everyone else in the batch
+- Result check: a run_batch that returns the wrong number of results fails
+  the whole batch instead of handing callers misaligned results
+"""
+
+import time
+import queue
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+
+class BatchSizeMismatch(RuntimeError):
+    """run_batch returned a different number of results than it was given."""
+
+
+def _resolve(fut: Future, result: Any = None, error: Optional[BaseException] = None):
+    """Set a future once; later attempts are ignored."""
+    if fut.done():
+        return
+    if error is not None:
+        fut.set_exception(error)
+    else:
+        fut.set_result(result)
+
+
+class MicroBatcher:
+    """
+    Collects single items into batches for `run_batch(items) -> results`.
+
+    Usage:
+        batcher = MicroBatcher("whisper_en", run_batch=lambda items: pipe(items), window_ms=30, max_batch=8)
+        result = await batcher.submit_async(item)
+    """
+
+    def __init__(self, name: str, run_batch: Callable[[List[Any]], List[Any]],
+                 window_ms: float = 30, max_batch: int = 8):
+        self.name = name
+        self.run_batch = run_batch
+        self.window_s = window_ms / 1000.0
+        self.max_batch = max(1, max_batch)
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._running = True
+
+        # stats
+        self.batches = 0
+        self.items = 0
+        self.max_seen = 0
+        self.failures = 0
+
+        self._thread = threading.Thread(target=self._loop, name=f"batcher-{name}", daemon=True)
+        self._thread.start()
+
+        print(f"[MicroBatcher] '{name}' started (window={window_ms}ms, max_batch={self.max_batch})")
+
+    def submit(self, item: Any) -> Future:
+        """Queue one item; the future resolves to its own result."""
+        fut: Future = Future()
+        self._queue.put((item, fut))
+        return fut
+
+    async def submit_async(self, item: Any) -> Any:
+        return await asyncio.wrap_future(self.submit(item))
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "window_ms": round(self.window_s * 1000),
+                "max_batch": self.max_batch,
+                "queued": self._queue.qsize(),
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch": round(self.items / self.batches, 2) if self.batches else 0,
+                "max_batch_seen": self.max_seen,
+                "failures": self.failures,
+            }
+
+    def shutdown(self):
+        self._running = False
+        self._queue.put(None)
+
+    def _collect(self) -> List[tuple]:
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+
+        deadline = time.time() + self.window_s
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is None:
+                self._running = False
+                break
+            batch.append(entry)
+        return batch
+
+    def _loop(self):
+        while self._running:
+            batch = self._collect()
+            if not batch:
+                continue
+
+            # drop callers that gave up (cancelled futures)
+            batch = [(item, fut) for item, fut in batch if fut.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch)
+                self.max_seen = max(self.max_seen, len(batch))
+
+            items = [item for item, _ in batch]
+            try:
+                results = self._run(items)
+            except BatchSizeMismatch as e:
+                # a broken run_batch, not a bad input: retrying alone won't help
+                with self._lock:
+                    self.failures += 1
+                print(f"[MicroBatcher] '{self.name}' {e}")
+                for _, fut in batch:
+                    _resolve(fut, error=e)
+                continue
+            except Exception as e:
+                with self._lock:
+                    self.failures += 1
+                if len(batch) == 1:
+                    _resolve(batch[0][1], error=e)
+                    continue
+                print(f"[MicroBatcher] '{self.name}' batch of {len(batch)} failed ({e}), retrying one by one")
+                for item, fut in batch:
+                    try:
+                        _resolve(fut, self._run([item])[0])
+                    except Exception as item_error:
+                        _resolve(fut, error=item_error)
+                continue
+
+            for (_, fut), result in zip(batch, results):
+                _resolve(fut, result)
+
+    def _run(self, items: List[Any]) -> List[Any]:
+        results = list(self.run_batch(items))
+        if len(results) != len(items):
+            raise BatchSizeMismatch(
+                f"run_batch returned {len(results)} results for {len(items)} items"
+            )
+        return results
@@ -5,22 +5,30 @@ This module manages the lifecycle of ML models to control memory usage.
 Features:
 - Lazy loading: Models are only loaded when first accessed
 - LRU eviction: Least recently used models are unloaded when memory limit is reached
+- Measured memory: process RSS and parameter-tensor bytes are measured around
+  each load; eviction compares real process RSS against the budget, and the
+  measured footprint (not the registered estimate) is used for later loads
 - Idle timeout: Models unused for a period are automatically unloaded
-- Thread safety: Safe for concurrent access
+- Thread safety: Safe for concurrent access; loads run outside the manager
+  lock (one shared loading future per model), so a cold model never blocks
+  lookups of models that are already loaded
+- Load reservations: an in-flight load reserves its footprint when its future
+  is created, so concurrent cold loads evict against used + reserved memory
 """
 
 import os
 import gc
 import time
 import threading
-from typing import Optional, Dict, Callable, Any
+from concurrent.futures import Future
+from typing import Optional, Dict, Callable, Any, List, Tuple
 from dataclasses import dataclass, field
 
 # Feature flag
 FEATURE_MODEL_MANAGER = os.getenv("FEATURE_MODEL_MANAGER", "true").lower() == "true"
 
 # Configuration from environment
-MAX_MEMORY_MB = int(os.getenv("MODEL_MANAGER_MAX_MEMORY_MB", "6000"))
+MAX_MEMORY_MB = int(os.getenv("MODEL_MANAGER_MAX_MEMORY_MB", "6000"))  # process RSS budget
 IDLE_TIMEOUT_SECONDS = int(os.getenv("MODEL_MANAGER_IDLE_TIMEOUT", "300"))  # 5 minutes
 
 
@@ -29,11 +37,56 @@ class ManagedModel:
     """Container for a managed model with metadata."""
     name: str
     loader: Callable[[], Any]
-    size_mb: int
+    size_mb: int                # registered estimate
     model: Any = None
     last_used: float = 0
     load_count: int = 0
     unload_count: int = 0
+    measured_mb: float = 0      # footprint of the last load (0 = never measured)
+    rss_delta_mb: float = 0
+    param_mb: float = 0
+    load_seconds: float = 0
+    loading: Optional[Future] = None  # set while a load is in flight
+
+    @property
+    def footprint_mb(self) -> float:
+        """Best known memory cost of this model."""
+        return self.measured_mb or self.size_mb
+
+
+def get_rss_mb() -> Optional[float]:
+    """Current resident set size of this process, None if unavailable."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def get_param_mb(model: Any) -> float:
+    """Bytes held by parameter and buffer tensors (pipelines: their .model)."""
+    module = getattr(model, "model", model)
+    total = 0
+    for attr in ("parameters", "buffers"):
+        tensors = getattr(module, attr, None)
+        if not callable(tensors):
+            continue
+        try:
+            for t in tensors():
+                total += t.numel() * t.element_size()
+        except Exception:
+            pass
+    return total / (1024 * 1024)
+
+
+def _release_freed_memory():
+    """Ask glibc to hand freed heap pages back so RSS reflects an unload."""
+    try:
+        import ctypes
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except Exception:
+        pass
 
 
 class ModelManager:
@@ -62,7 +115,7 @@ class ModelManager:
         Initialize the model manager.
 
         Args:
-            max_memory_mb: Maximum total memory for all models
+            max_memory_mb: Process RSS budget; models are evicted to stay under it
             idle_timeout: Seconds of inactivity before model is unloaded
         """
         self.max_memory_mb = max_memory_mb
@@ -70,13 +123,14 @@ class ModelManager:
         self.models: Dict[str, ManagedModel] = {}
         self.lock = threading.RLock()
         self.total_memory_mb = 0
+        self.reserved_mb = 0        # footprints of loads still in flight
         self._running = True
 
         # Start background cleanup thread
         self._cleanup_thread = threading.Thread(target=self._cleanup_loop, daemon=True)
         self._cleanup_thread.start()
 
-        print(f"[ModelManager] Initialized with max_memory={max_memory_mb}MB, idle_timeout={idle_timeout}s")
+        print(f"[ModelManager] Initialized with max_memory={max_memory_mb}MB (process RSS), idle_timeout={idle_timeout}s")
 
     def register(self, name: str, loader: Callable[[], Any], size_mb: int):
         """
@@ -103,6 +157,10 @@ class ModelManager:
         """
         Get a model, loading if necessary.
 
+        The manager lock is only held for bookkeeping. Concurrent callers for
+        the same cold model wait on one shared load; other models are served
+        meanwhile.
+
         Args:
             name: Model identifier
 
@@ -118,14 +176,46 @@ class ModelManager:
 
             managed = self.models[name]
 
-            # Load if not already loaded
-            if managed.model is None:
-                self._ensure_memory(managed.size_mb)
-                self._load_model(managed)
+            # Fast path: already loaded
+            if managed.model is not None:
+                managed.last_used = time.time()
+                return managed.model
+
+            # Someone else is loading it: wait on their result
+            future = managed.loading
+            if future is None:
+                future = Future()
+                managed.loading = future
+                reserved = managed.footprint_mb
+                evicted = self._select_evictions(reserved, exclude=name)
+                self.reserved_mb += reserved
+                is_loader = True
+            else:
+                is_loader = False
 
-            # Update last used time
+        if not is_loader:
+            return future.result()
+
+        # Eviction and loading happen outside the critical section
+        self._release_models(evicted)
+
+        try:
+            model = self._load_model(managed)
+        except BaseException as e:
+            with self.lock:
+                managed.loading = None
+                self.reserved_mb = max(self.reserved_mb - reserved, 0)
+            future.set_exception(e)
+            raise
+
+        with self.lock:
+            managed.model = model
             managed.last_used = time.time()
-            return managed.model
+            managed.loading = None
+            # the load is now counted in RSS / total_memory_mb
+            self.reserved_mb = max(self.reserved_mb - reserved, 0)
+        future.set_result(model)
+        return model
 
     def is_loaded(self, name: str) -> bool:
         """Check if a model is currently loaded."""
@@ -152,94 +242,158 @@ class ModelManager:
             if managed.model is None:
                 return False
 
-            self._unload_model(managed)
-            return True
+            detached = [(name, self._detach_model(managed))]
+
+        self._release_models(detached)
+        return True
 
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about managed models."""
         with self.lock:
-            loaded = [(m.name, m.size_mb) for m in self.models.values() if m.model is not None]
+            loaded = [(m.name, round(m.footprint_mb)) for m in self.models.values() if m.model is not None]
             registered = [(m.name, m.size_mb) for m in self.models.values()]
+            rss = get_rss_mb()
 
             return {
                 "max_memory_mb": self.max_memory_mb,
-                "used_memory_mb": self.total_memory_mb,
+                "used_memory_mb": round(self.total_memory_mb),
+                "reserved_memory_mb": round(self.reserved_mb),
+                "process_rss_mb": round(rss) if rss is not None else None,
                 "idle_timeout_s": self.idle_timeout,
                 "registered_models": len(self.models),
                 "loaded_models": len(loaded),
                 "registered": registered,
                 "loaded": loaded,
+                "loading": [m.name for m in self.models.values() if m.loading is not None],
                 "load_counts": {m.name: m.load_count for m in self.models.values()},
                 "unload_counts": {m.name: m.unload_count for m in self.models.values()},
+                "measured": {
+                    m.name: {
+                        "estimate_mb": m.size_mb,
+                        "measured_mb": round(m.measured_mb, 1),
+                        "rss_delta_mb": round(m.rss_delta_mb, 1),
+                        "param_mb": round(m.param_mb, 1),
+                        "load_seconds": round(m.load_seconds, 2),
+                    }
+                    for m in self.models.values() if m.load_count
+                },
             }
 
     def shutdown(self):
         """Stop the cleanup thread and unload all models."""
         self._running = False
         with self.lock:
-            for managed in self.models.values():
-                if managed.model is not None:
-                    self._unload_model(managed)
-
-    def _ensure_memory(self, needed_mb: int):
-        """Evict models if needed to make room for a new model."""
-        while self.total_memory_mb + needed_mb > self.max_memory_mb:
+            detached = [
+                (managed.name, self._detach_model(managed))
+                for managed in self.models.values() if managed.model is not None
+            ]
+        self._release_models(detached)
+
+    def _used_memory_mb(self) -> float:
+        """Real process RSS, or the bookkeeping total if RSS cannot be read."""
+        rss = get_rss_mb()
+        return rss if rss is not None else self.total_memory_mb
+
+    def _select_evictions(self, needed_mb: float, exclude: str = "") -> List[Tuple[str, Any]]:
+        """
+        Detach least recently used models until the budget fits `needed_mb`
+        on top of used memory and the reservations of in-flight loads.
+        Called under the lock; the returned models are released by the caller
+        after the lock is dropped.
+        """
+        evicted = []
+        used_mb = self._used_memory_mb() + self.reserved_mb
+        while used_mb + needed_mb > self.max_memory_mb:
             # Find least recently used loaded model
             lru_model = None
             lru_time = float('inf')
 
             for managed in self.models.values():
-                if managed.model is not None and managed.last_used < lru_time:
+                if managed.name == exclude or managed.model is None:
+                    continue
+                if managed.last_used < lru_time:
                     lru_time = managed.last_used
                     lru_model = managed
 
             if lru_model is None:
                 # No models to evict - we're at capacity
-                print(f"[ModelManager] WARNING: Cannot free memory, at capacity ({self.total_memory_mb}MB)")
+                print(f"[ModelManager] WARNING: Cannot free memory, at capacity "
+                      f"({used_mb:.0f}MB used, {needed_mb:.0f}MB needed)")
                 break
 
-            self._unload_model(lru_model)
+            # RSS only drops after release, so count the freed footprint now
+            used_mb -= lru_model.footprint_mb
+            evicted.append((lru_model.name, self._detach_model(lru_model)))
 
-    def _load_model(self, managed: ManagedModel):
-        """Load a model into memory."""
-        print(f"[ModelManager] Loading '{managed.name}' (~{managed.size_mb}MB)...")
+        return evicted
+
+    def _load_model(self, managed: ManagedModel) -> Any:
+        """Run the loader (no lock held) and measure what the model actually costs."""
+        print(f"[ModelManager] Loading '{managed.name}' (~{managed.footprint_mb:.0f}MB)...")
         start_time = time.time()
+        rss_before = get_rss_mb()
 
         try:
-            managed.model = managed.loader()
-            managed.last_used = time.time()
-            managed.load_count += 1
-            self.total_memory_mb += managed.size_mb
-
-            elapsed = time.time() - start_time
-            print(f"[ModelManager] Loaded '{managed.name}' in {elapsed:.1f}s (total memory: {self.total_memory_mb}MB)")
+            model = managed.loader()
         except Exception as e:
             print(f"[ModelManager] ERROR loading '{managed.name}': {e}")
             raise
 
-    def _unload_model(self, managed: ManagedModel):
-        """Unload a model to free memory."""
-        print(f"[ModelManager] Unloading '{managed.name}' (freeing ~{managed.size_mb}MB)...")
-
-        # Try to move model to CPU first (for PyTorch models)
-        if hasattr(managed.model, 'to'):
-            try:
-                managed.model.to('cpu')
-            except Exception:
-                pass
-
-        # Try to delete model-specific caches
-        if hasattr(managed.model, 'clear_cache'):
-            try:
-                managed.model.clear_cache()
-            except Exception:
-                pass
-
-        # Delete the model
-        del managed.model
+        rss_after = get_rss_mb()
+        param_mb = get_param_mb(model)
+
+        with self.lock:
+            managed.load_count += 1
+            managed.load_seconds = time.time() - start_time
+            managed.param_mb = param_mb
+            if rss_before is not None and rss_after is not None:
+                # other loads may overlap; treat this as an upper estimate
+                managed.rss_delta_mb = max(rss_after - rss_before, 0)
+            # RSS delta also covers tokenizers/processors; params are the floor
+            managed.measured_mb = max(managed.rss_delta_mb, managed.param_mb) or managed.size_mb
+            self.total_memory_mb += managed.measured_mb
+
+        print(f"[ModelManager] Loaded '{managed.name}' in {managed.load_seconds:.1f}s "
+              f"(measured {managed.measured_mb:.0f}MB, params {managed.param_mb:.0f}MB, "
+              f"estimate {managed.size_mb}MB; process RSS {self._used_memory_mb():.0f}MB)")
+        return model
+
+    def _detach_model(self, managed: ManagedModel) -> Any:
+        """Drop the manager's reference (under the lock) and return the model."""
+        model = managed.model
         managed.model = None
         managed.unload_count += 1
-        self.total_memory_mb -= managed.size_mb
+        self.total_memory_mb = max(self.total_memory_mb - managed.footprint_mb, 0)
+        return model
+
+    def _release_models(self, detached: List[Tuple[str, Any]]):
+        """
+        Free detached models (no lock held). Empties `detached` so the last
+        references are really dropped before garbage collection.
+        """
+        if not detached:
+            return
+
+        while detached:
+            name, model = detached.pop()
+            print(f"[ModelManager] Unloading '{name}'...")
+
+            # Try to move model to CPU first (for PyTorch models)
+            if hasattr(model, 'to'):
+                try:
+                    model.to('cpu')
+                except Exception:
+                    pass
+
+            # Try to delete model-specific caches
+            if hasattr(model, 'clear_cache'):
+                try:
+                    model.clear_cache()
+                except Exception:
+                    pass
+
+            # Delete the model (callers still using it keep it alive until they finish)
+            del model
 
         # Force garbage collection
         gc.collect()
@@ -252,7 +406,9 @@ class ModelManager:
         except ImportError:
             pass
 
-        print(f"[ModelManager] Unloaded '{managed.name}' (total memory: {self.total_memory_mb}MB)")
+        _release_freed_memory()
+
+        print(f"[ModelManager] Unloaded models (process RSS: {self._used_memory_mb():.0f}MB)")
 
     def _cleanup_loop(self):
         """Background thread to unload idle models."""
@@ -265,12 +421,15 @@ class ModelManager:
             current_time = time.time()
 
             with self.lock:
+                idle = []
                 for managed in self.models.values():
                     if managed.model is not None:
                         idle_time = current_time - managed.last_used
                         if idle_time > self.idle_timeout:
                             print(f"[ModelManager] '{managed.name}' idle for {idle_time:.0f}s, unloading...")
-                            self._unload_model(managed)
+                            idle.append((managed.name, self._detach_model(managed)))
+
+            self._release_models(idle)
 
 
 # Global singleton instance
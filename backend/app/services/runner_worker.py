@@ -0,0 +1,243 @@
+"""
+Persistent runner worker process (started by session_workers and exec_pool).
+
+Reads one JSON request per line on stdin:
+
+    {"code": "<python source>"}
+
+executes it with stdout/stderr captured at the fd level (so output of
+os.system, subprocesses and C extensions is kept too), and writes one JSON
+reply per line on a private copy of the original stdout:
+
+    {"ok": true|false, "exited": true|false, "returncode": int,
+     "stdout": "...", "stderr": "...", "rss_mb": float, "forked": bool}
+
+"exited" means the code called sys.exit(); the parent then drops this worker.
+
+Modes:
+    runner_worker.py                   session mode: one namespace kept alive
+                                       across requests (runner.py semantics);
+                                       each request continues the source of
+                                       the previous ones, so tracebacks show
+                                       runner.py line numbers and lines
+    runner_worker.py --isolated [mods] zygote: comma separated `mods` are
+                                       imported once up front (pre-warm), then
+                                       every request runs in a child forked
+                                       from this process, so whatever a job
+                                       mutates (modules, builtins, sys.path)
+                                       dies with the child. Without os.fork the
+                                       job runs in-process ("forked": false) and
+                                       the parent must recycle the worker.
+"""
+
+import io
+import json
+import linecache
+import os
+import sys
+import tempfile
+import traceback
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def _new_namespace(filename):
+    return {"__name__": "__main__", "__file__": filename, "__builtins__": __builtins__}
+
+
+def _prewarm(modules):
+    for name in modules:
+        name = name.strip()
+        if not name:
+            continue
+        try:
+            __import__(name)
+        except Exception:
+            pass  # e.g. turtle without a display: just not pre-warmed
+
+
+def _rss_mb():
+    if resource is None:
+        return 0.0
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _exit_code(e):
+    if e.code is None:
+        return 0
+    if isinstance(e.code, int):
+        return e.code
+    print(e.code, file=sys.stderr)
+    return 1
+
+
+def _capture_fd(fd):
+    """Point `fd` at a fresh temp file; returns what _release_fd needs."""
+    saved = os.dup(fd)
+    capture = tempfile.TemporaryFile()
+    os.dup2(capture.fileno(), fd)
+    return saved, capture
+
+
+def _release_fd(fd, saved, capture):
+    """Restore `fd` and return the text written to it meanwhile."""
+    os.dup2(saved, fd)
+    os.close(saved)
+    capture.seek(0)
+    data = capture.read()
+    capture.close()
+    return data.decode("utf-8", "replace")
+
+
+class _UserStreams:
+    """
+    sys.stdout/sys.stderr for user code: text files on fds 1 and 2, which
+    point at per-run capture files while code runs. Created once per process,
+    so a handler that kept a reference to sys.stdout still writes into the
+    current run.
+    """
+
+    def __init__(self):
+        self.stdout = open(1, "w", encoding="utf-8", errors="backslashreplace", closefd=False)
+        self.stderr = open(2, "w", buffering=1, encoding="utf-8", errors="backslashreplace",
+                           closefd=False)
+
+    def flush(self):
+        for stream in (self.stdout, self.stderr):
+            try:
+                stream.flush()
+            except (OSError, ValueError):
+                pass
+
+
+def _run_code(code, namespace, filename, streams, proto_in, proto_out, prefix=""):
+    """
+    exec one request in `namespace` and build its reply. `prefix` is the
+    source already executed in this namespace: `code` is compiled at the
+    line where it continues it.
+    """
+    source = prefix + code
+    # tracebacks show source lines even though the file is not on disk
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+
+    out_fd = _capture_fd(1)
+    err_fd = _capture_fd(2)
+    # user code must never read the protocol stream
+    sys.stdin, sys.stdout, sys.stderr = io.StringIO(), streams.stdout, streams.stderr
+    returncode, exited = 0, False
+    try:
+        # leading newlines put the new lines at their runner.py line numbers
+        exec(compile("\n" * prefix.count("\n") + code, filename, "exec"), namespace)
+    except SystemExit as e:
+        returncode, exited = _exit_code(e), True
+    except BaseException as e:
+        # skip this frame so the traceback looks like a plain script run
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        returncode = 1
+    finally:
+        streams.flush()
+        sys.stdin, sys.stdout, sys.stderr = proto_in, proto_out, sys.__stderr__
+        stdout = _release_fd(1, *out_fd)
+        stderr = _release_fd(2, *err_fd)
+
+    return {
+        "ok": returncode == 0,
+        "exited": exited,
+        "returncode": returncode,
+        "stdout": stdout,
+        "stderr": stderr,
+        "rss_mb": _rss_mb(),
+        "forked": False,
+    }
+
+
+def _run_forked(code, filename, streams, proto_in, proto_out):
+    """Run one isolated request in a child process forked from this warm one."""
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(r)
+            reply = _run_code(code, _new_namespace(filename), filename, streams, proto_in, proto_out)
+            with os.fdopen(w, "wb") as f:
+                f.write(json.dumps(reply).encode("utf-8"))
+        finally:
+            os._exit(0)
+
+    os.close(w)
+    with os.fdopen(r, "rb") as f:
+        data = f.read()
+    _, status = os.waitpid(pid, 0)
+
+    try:
+        reply = json.loads(data)
+    except ValueError:
+        # the child died without a reply (os._exit, a signal, ...)
+        returncode = os.waitstatus_to_exitcode(status)
+        reply = {
+            "ok": False,
+            "exited": True,
+            "returncode": returncode,
+            "stdout": "",
+            "stderr": "",
+        }
+    reply["rss_mb"] = _rss_mb()   # this (zygote) process, which is what gets recycled
+    reply["forked"] = True
+    return reply
+
+
+def main():
+    isolated = len(sys.argv) > 1 and sys.argv[1] == "--isolated"
+    if isolated and len(sys.argv) > 2:
+        _prewarm(sys.argv[2].split(","))
+
+    # behave like `python <script>` started in the working dir
+    sys.path.insert(0, os.getcwd())
+    filename = "main.py" if isolated else "runner.py"
+    namespace = _new_namespace(filename)
+    base_modules = set(sys.modules)
+    base_path = list(sys.path)
+    fork = isolated and hasattr(os, "fork")
+    executed = ""   # session mode: source run so far in `namespace`
+
+    # keep the protocol on a private fd; fd 1 only ever points at a run's
+    # capture file or /dev/null, so nothing can corrupt the reply stream
+    proto_in = sys.stdin
+    proto_out = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+    streams = _UserStreams()
+
+    for line in proto_in:
+        line = line.strip()
+        if not line:
+            continue
+
+        try:
+            request = json.loads(line)
+        except ValueError:
+            continue
+
+        code = request.get("code", "")
+        if fork:
+            reply = _run_forked(code, filename, streams, proto_in, proto_out)
+        elif isolated:
+            reply = _run_code(code, _new_namespace(filename), filename, streams, proto_in, proto_out)
+            for name in set(sys.modules) - base_modules:
+                sys.modules.pop(name, None)
+            sys.path[:] = base_path
+        else:
+            reply = _run_code(code, namespace, filename, streams, proto_in, proto_out, executed)
+            executed += code if code.endswith("\n") else code + "\n"
+
+        proto_out.write(json.dumps(reply) + "\n")
+        proto_out.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+In-memory session state (state.json) with write-behind persistence.
+
+Features:
+- One cached state dict per session directory; loads are served from memory
+  while the file on disk is unchanged (checked with one stat, not a read)
+- Dirty tracking: save() only marks the entry dirty, and only when the state
+  actually changed
+- flush() does at most one write per request: compact JSON to a temp file,
+  then an atomic rename over state.json
+- Writers that bypass the store call invalidate(); external edits are also
+  noticed through the file's mtime/size
+- LRU bound on cached sessions (dirty entries are flushed before eviction)
+- FEATURE_STATE_STORE=false restores write-through (every save writes)
+"""
+
+import os
+import copy
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+# Feature flag
+FEATURE_STATE_STORE = os.getenv("FEATURE_STATE_STORE", "true").lower() == "true"
+
+# Configuration from environment
+MAX_CACHED_SESSIONS = int(os.getenv("SESSION_STATE_CACHE_MAX", "1024"))
+
+STATE_FILE = "state.json"
+
+
+class _Entry:
+    __slots__ = ("state", "dirty", "signature", "lock")
+
+    def __init__(self, state: dict, signature: Optional[Tuple[int, int]]):
+        self.state = state
+        self.dirty = False
+        self.signature = signature  # (mtime_ns, size) of the file we read or wrote
+        self.lock = threading.Lock()
+
+
+class SessionStateStore:
+    """
+    Usage:
+        store = get_session_state_store()
+        state = store.load(session_dir)        # private copy
+        state["active_object"] = "t1"
+        store.save(session_dir, state)          # memory only
+        store.flush(session_dir)                # once, at the end of the request
+    """
+
+    def __init__(self, write_behind: bool = FEATURE_STATE_STORE, max_sessions: int = MAX_CACHED_SESSIONS):
+        self.write_behind = write_behind
+        self.max_sessions = max_sessions
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_reads = 0
+        self.saves = 0
+        self.unchanged_saves = 0
+        self.disk_writes = 0
+        self.write_errors = 0
+
+        print(f"[SessionState] Initialized: write_behind={write_behind}, max_sessions={max_sessions}")
+
+    @staticmethod
+    def _signature(path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _entry(self, session_dir: Path) -> _Entry:
+        key = str(session_dir)
+        path = session_dir / STATE_FILE
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        # pending changes are newer than the file; otherwise the file must be unchanged
+        signature = None if entry is not None and entry.dirty else self._signature(path)
+        if entry is not None and (entry.dirty or entry.signature == signature):
+            with self._lock:
+                self.memory_hits += 1
+            return entry
+
+        state = {}
+        if signature is not None:
+            try:
+                state = json.loads(path.read_text(encoding="utf-8"))
+            except Exception:
+                state = {}
+
+        entry = _Entry(state, signature)
+        with self._lock:
+            self.disk_reads += 1
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            evicted = []
+            while len(self._entries) > self.max_sessions:
+                evicted.append(self._entries.popitem(last=False))
+        for old_key, old_entry in evicted:
+            if old_entry.dirty:
+                try:
+                    self._write(Path(old_key), old_entry)
+                except OSError:
+                    # keep the unsaved state cached; a later flush retries it
+                    with self._lock:
+                        self._entries.setdefault(old_key, old_entry)
+                        self._entries.move_to_end(old_key, last=False)
+        return entry
+
+    def load(self, session_dir: Path) -> dict:
+        """The session state ({} when there is none); callers get their own copy."""
+        entry = self._entry(session_dir)
+        with entry.lock:
+            return copy.deepcopy(entry.state)
+
+    def save(self, session_dir: Path, state: dict):
+        """Replace the session state in memory; written by the next flush()."""
+        entry = self._entry(session_dir)
+        with entry.lock:
+            unchanged = state == entry.state
+            if not unchanged:
+                entry.state = copy.deepcopy(state)
+                entry.dirty = True
+        with self._lock:
+            self.saves += 1
+            self.unchanged_saves += unchanged
+
+        if not self.write_behind:
+            self.flush(session_dir)
+
+    def flush(self, session_dir: Path) -> bool:
+        """Write the state if it changed since the last write. Returns True if it wrote."""
+        with self._lock:
+            entry = self._entries.get(str(session_dir))
+        if entry is None or not entry.dirty:
+            return False
+        return self._write(session_dir, entry)
+
+    def _write(self, session_dir: Path, entry: _Entry) -> bool:
+        path = session_dir / STATE_FILE
+        tmp_path = session_dir / f".{STATE_FILE}.{os.getpid()}.tmp"
+        with entry.lock:
+            if not entry.dirty:
+                return False
+            try:
+                session_dir.mkdir(parents=True, exist_ok=True)
+                tmp_path.write_text(
+                    json.dumps(entry.state, ensure_ascii=False, separators=(",", ":")),
+                    encoding="utf-8",
+                )
+                os.replace(tmp_path, path)
+            except OSError as e:
+                with self._lock:
+                    self.write_errors += 1
+                print(f"[SessionState] Failed to write {path}: {e}")
+                raise
+            entry.dirty = False
+            entry.signature = self._signature(path)
+        with self._lock:
+            self.disk_writes += 1
+        return True
+
+    def invalidate(self, session_dir: Path):
+        """Forget the cached state (state.json was rewritten outside the store)."""
+        with self._lock:
+            self._entries.pop(str(session_dir), None)
+
+    def flush_all(self):
+        """Write every dirty session (app shutdown)."""
+        with self._lock:
+            entries = list(self._entries.items())
+        for key, entry in entries:
+            if entry.dirty:
+                try:
+                    self._write(Path(key), entry)
+                except OSError:
+                    pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "write_behind": self.write_behind,
+                "cached_sessions": len(self._entries),
+                "dirty_sessions": sum(1 for e in self._entries.values() if e.dirty),
+                "max_sessions": self.max_sessions,
+                "memory_hits": self.memory_hits,
+                "disk_reads": self.disk_reads,
+                "saves": self.saves,
+                "unchanged_saves": self.unchanged_saves,
+                "disk_writes": self.disk_writes,
+                "write_errors": self.write_errors,
+            }
+
+
+# Global singleton instance
+_session_state_store: Optional[SessionStateStore] = None
+_store_lock = threading.Lock()
+
+
+def get_session_state_store() -> SessionStateStore:
+    """Get the global SessionStateStore instance."""
+    global _session_state_store
+
+    if _session_state_store is None:
+        with _store_lock:
+            if _session_state_store is None:
+                _session_state_store = SessionStateStore()
+
+    return _session_state_store
@@ -0,0 +1,371 @@
+"""
+Persistent runner workers for codespace sessions.
+
+Every /execute_command and /rerun_command used to start a fresh interpreter
+and replay the whole runner.py. This module keeps one worker process per
+conversation (see runner_worker.py) that holds the live namespace, so only
+the lines appended since the last run are executed.
+Features:
+- Incremental execution: only the new suffix of runner.py is sent to the worker
+- Safe fallback: edited runner.py, changed session modules or a dead worker
+  fall back to a clean full replay (same output as before)
+- Same rule as `python runner.py`: the script stops at the first exception.
+  A failing new line is reported on its own and the worker keeps its state,
+  so earlier lines (and their side effects, e.g. SmartHome HTTP calls) never
+  run twice; lines appended after the failure are not executed, exactly as a
+  full replay would never reach them
+- Tracebacks use runner.py line numbers (the worker compiles each new suffix
+  at its real offset)
+- Cumulative output: responses keep the "whole run" stdout/stderr shape
+- fresh=True (/rerun_command) always re-executes the whole runner.py
+- LRU cap + idle timeout: bounded number of live worker processes
+- Thread safety: one lock per worker, one lock for the pool
+"""
+
+import os
+import sys
+import json
+import time
+import select
+import hashlib
+import threading
+import subprocess
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+# Feature flag
+FEATURE_PERSISTENT_RUNNER = os.getenv("FEATURE_PERSISTENT_RUNNER", "true").lower() == "true"
+
+# Configuration from environment
+MAX_WORKERS = int(os.getenv("SESSION_WORKER_MAX", "16"))
+IDLE_TIMEOUT_SECONDS = int(os.getenv("SESSION_WORKER_IDLE_TIMEOUT", "300"))  # 5 minutes
+
+WORKER_SCRIPT = str(Path(__file__).resolve().parent / "runner_worker.py")
+RUNNER_FILE = "runner.py"
+
+
+class WorkerFailed(Exception):
+    """The worker died or answered with something that is not a reply."""
+
+
+@dataclass
+class SessionWorker:
+    """One live interpreter bound to a session directory."""
+    session_dir: str
+    process: Optional[subprocess.Popen] = None
+    executed: str = ""          # prefix of runner.py already executed
+    fingerprint: str = ""       # hash of the session modules at start
+    stdout: str = ""            # cumulative output since (re)start
+    stderr: str = ""
+    failed: str = ""            # error that stopped runner.py ("" while it runs cleanly)
+    last_used: float = 0
+    run_count: int = 0
+    restart_count: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        self.stop()
+        self.process = spawn_worker(self.session_dir)
+        self.executed = ""
+        self.stdout = ""
+        self.stderr = ""
+        self.failed = ""
+        self.fingerprint = _module_fingerprint(self.session_dir)
+        self.restart_count += 1
+
+    def stop(self):
+        if self.process is None:
+            return
+        try:
+            self.process.kill()
+            self.process.wait(timeout=5)
+        except Exception:
+            pass
+        self.process = None
+        self.executed = ""
+        self.failed = ""
+
+    def execute(self, code: str, timeout: float) -> Dict[str, Any]:
+        """Send one chunk to the worker and wait for its reply."""
+        if not self.alive():
+            raise WorkerFailed("worker not running")
+        try:
+            return send_request(self.process, code, timeout)
+        except (WorkerFailed, subprocess.TimeoutExpired):
+            self.stop()
+            raise
+
+    def absorb(self, reply: Dict[str, Any]):
+        """Add a reply to the cumulative output."""
+        self.stdout += reply.get("stdout", "")
+        self.stderr += reply.get("stderr", "")
+
+
+def spawn_worker(cwd: str, *args: str, new_session: bool = False) -> subprocess.Popen:
+    """
+    Start a runner_worker.py process in `cwd` (args select its mode).
+    new_session=True gives it its own process group, so killing the group
+    also kills the job children it forks.
+    """
+    return subprocess.Popen(
+        [sys.executable, "-u", WORKER_SCRIPT, *args],
+        cwd=cwd,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        encoding="utf-8",
+        start_new_session=new_session,
+    )
+
+
+def send_request(process: subprocess.Popen, code: str, timeout: float) -> Dict[str, Any]:
+    """
+    One request/reply round trip with a runner worker.
+    Raises subprocess.TimeoutExpired or WorkerFailed; the caller must then
+    kill the process, its protocol state is unknown.
+    """
+    try:
+        process.stdin.write(json.dumps({"code": code}) + "\n")
+        process.stdin.flush()
+    except (BrokenPipeError, OSError) as e:
+        raise WorkerFailed(str(e))
+
+    ready, _, _ = select.select([process.stdout], [], [], timeout)
+    if not ready:
+        raise subprocess.TimeoutExpired(RUNNER_FILE, timeout)
+
+    line = process.stdout.readline()
+    if not line:
+        raise WorkerFailed("worker exited")
+
+    try:
+        return json.loads(line)
+    except ValueError:
+        raise WorkerFailed("bad reply from worker")
+
+
+def _module_fingerprint(session_dir: str) -> str:
+    """
+    Hash of every session .py file except runner.py.
+    Content-based on purpose: /execute_command rewrites the module on each call.
+    """
+    h = hashlib.sha1()
+    try:
+        names = sorted(n for n in os.listdir(session_dir) if n.endswith(".py") and n != RUNNER_FILE)
+    except OSError:
+        return ""
+    for name in names:
+        h.update(name.encode("utf-8"))
+        try:
+            with open(os.path.join(session_dir, name), "rb") as f:
+                h.update(f.read())
+        except OSError:
+            pass
+    return h.hexdigest()
+
+
+def _cumulative_output(worker: SessionWorker) -> str:
+    return worker.stdout.strip() or worker.stderr.strip()
+
+
+def _error_output(reply: Dict[str, Any]) -> str:
+    return reply.get("stderr", "").strip() or reply.get("stdout", "").strip()
+
+
+class SessionWorkerPool:
+    """
+    Keeps one SessionWorker per session directory.
+
+    Usage:
+        pool = get_session_worker_pool()
+        output = pool.run(session_dir, timeout=30)   # same text as `python runner.py`
+        pool.discard(session_dir)                     # before deleting the session dir
+    """
+
+    def __init__(self, max_workers: int = MAX_WORKERS, idle_timeout: int = IDLE_TIMEOUT_SECONDS):
+        self.max_workers = max_workers
+        self.idle_timeout = idle_timeout
+        self.workers: "OrderedDict[str, SessionWorker]" = OrderedDict()
+        self.lock = threading.RLock()
+        self._running = True
+        self.incremental_runs = 0
+        self.full_runs = 0
+
+        self._cleanup_thread = threading.Thread(target=self._cleanup_loop, daemon=True)
+        self._cleanup_thread.start()
+
+        print(f"[SessionWorkers] Initialized with max_workers={max_workers}, idle_timeout={idle_timeout}s")
+
+    def run(self, session_dir, timeout: float = 30, fresh: bool = False) -> str:
+        """
+        Bring the session's worker up to date with runner.py and return the
+        cumulative output, or only the error when the new lines fail.
+        fresh=True re-executes the whole file in a new worker.
+        Raises subprocess.TimeoutExpired like subprocess.run.
+        """
+        session_dir = str(session_dir)
+        with open(os.path.join(session_dir, RUNNER_FILE), "r", encoding="utf-8") as f:
+            code = f.read()
+
+        worker = self._acquire(session_dir)
+        with worker.lock:
+            worker.last_used = time.time()
+            worker.run_count += 1
+
+            can_continue = (
+                not fresh
+                and worker.alive()
+                and worker.executed
+                and worker.executed.endswith("\n")
+                and code.startswith(worker.executed)
+                and worker.fingerprint == _module_fingerprint(session_dir)
+            )
+
+            if can_continue:
+                suffix = code[len(worker.executed):]
+                if not suffix:
+                    return _cumulative_output(worker)
+                if worker.failed:
+                    # runner.py already stops at an earlier exception: a full
+                    # replay would never reach these lines either
+                    worker.executed = code
+                    return worker.failed
+                self.incremental_runs += 1
+                try:
+                    reply = worker.execute(suffix, timeout)
+                except WorkerFailed as e:
+                    # the worker died on the new lines; the next run rebuilds it
+                    return f"Runner process exited unexpectedly: {e}"
+                return self._settle(worker, code, reply, _error_output(reply))
+
+            return self._full_run(worker, code, timeout)
+
+    def _full_run(self, worker: SessionWorker, code: str, timeout: float) -> str:
+        self.full_runs += 1
+        worker.start()
+        try:
+            reply = worker.execute(code, timeout)
+        except WorkerFailed:
+            worker.stop()
+            return _cumulative_output(worker)
+
+        # a failing script prints like `python runner.py`: stdout, else the traceback
+        return self._settle(worker, code, reply, reply.get("stdout", "").strip() or _error_output(reply))
+
+    def _settle(self, worker: SessionWorker, code: str, reply: Dict[str, Any], error_output: str) -> str:
+        """Record a reply; the worker keeps its namespace unless the script exited."""
+        if reply.get("exited"):
+            worker.absorb(reply)
+            output = _cumulative_output(worker)
+            worker.stop()
+            return output
+
+        worker.executed = code
+        worker.absorb(reply)
+        if reply.get("ok"):
+            return _cumulative_output(worker)
+
+        # like `python runner.py`, the script stops here: later lines never run
+        worker.failed = _error_output(reply)
+        return error_output
+
+    def discard(self, session_dir) -> bool:
+        """Stop and forget the worker of a session (e.g. before rmtree)."""
+        with self.lock:
+            worker = self.workers.pop(str(session_dir), None)
+        if worker is None:
+            return False
+        with worker.lock:
+            worker.stop()
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get statistics about live workers."""
+        with self.lock:
+            return {
+                "max_workers": self.max_workers,
+                "idle_timeout_s": self.idle_timeout,
+                "workers": len(self.workers),
+                "alive": sum(1 for w in self.workers.values() if w.alive()),
+                "incremental_runs": self.incremental_runs,
+                "full_runs": self.full_runs,
+                "restart_counts": {k: w.restart_count for k, w in self.workers.items()},
+            }
+
+    def shutdown(self):
+        """Stop the cleanup thread and all workers."""
+        self._running = False
+        with self.lock:
+            workers = list(self.workers.values())
+            self.workers.clear()
+        for worker in workers:
+            worker.stop()
+
+    def _acquire(self, session_dir: str) -> SessionWorker:
+        evicted = []
+        with self.lock:
+            worker = self.workers.get(session_dir)
+            if worker is None:
+                worker = SessionWorker(session_dir=session_dir)
+                self.workers[session_dir] = worker
+            self.workers.move_to_end(session_dir)
+
+            while len(self.workers) > self.max_workers:
+                _, lru = self.workers.popitem(last=False)
+                evicted.append(lru)
+
+        for lru in evicted:
+            print(f"[SessionWorkers] Evicting worker for {lru.session_dir}")
+            with lru.lock:
+                lru.stop()
+        return worker
+
+    def _cleanup_loop(self):
+        """Background thread to stop idle workers."""
+        while self._running:
+            time.sleep(60)  # Check every minute
+
+            if not self._running:
+                break
+
+            current_time = time.time()
+
+            with self.lock:
+                idle = [
+                    key for key, w in self.workers.items()
+                    if current_time - w.last_used > self.idle_timeout
+                ]
+            for key in idle:
+                print(f"[SessionWorkers] Worker for {key} idle, stopping...")
+                self.discard(key)
+
+
+# Global singleton instance
+_session_worker_pool: Optional[SessionWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_session_worker_pool() -> Optional[SessionWorkerPool]:
+    """
+    Get the global SessionWorkerPool instance.
+
+    Returns:
+        SessionWorkerPool singleton, or None when FEATURE_PERSISTENT_RUNNER is off
+    """
+    global _session_worker_pool
+
+    if not FEATURE_PERSISTENT_RUNNER:
+        return None
+
+    if _session_worker_pool is None:
+        with _pool_lock:
+            if _session_worker_pool is None:
+                _session_worker_pool = SessionWorkerPool()
+
+    return _session_worker_pool
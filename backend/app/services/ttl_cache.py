@@ -0,0 +1,232 @@
+"""
+Bounded TTL cache with an optional SQLite tier and async single-flight.
+
+Features:
+- LRU bound: at most `max_size` entries in memory
+- TTL: entries expire after `ttl_seconds` (memory and SQLite)
+- Persistent tier: JSON values in SQLite survive restarts (memory miss -> SQLite);
+  expired rows and rows beyond `max_size` are pruned on open and every
+  PRUNE_EVERY writes, and get_or_compute() does its SQLite I/O in a thread
+- Single-flight: concurrent get_or_compute() calls for one key share one
+  upstream call, run as its own task so a cancelled caller does not cancel
+  it for the others
+- Counters: hits (memory / persistent), misses, upstream calls, errors
+"""
+
+import json
+import time
+import sqlite3
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+PRUNE_EVERY = 100  # SQLite writes between prunes
+
+
+class TTLCache:
+    """
+    Usage:
+        cache = TTLCache("paraphrase", max_size=1000, ttl_seconds=86400, db_path="cache.sqlite")
+        value = await cache.get_or_compute(key, lambda: fetch_upstream(...))
+    """
+
+    def __init__(self, name: str, max_size: int = 1000, ttl_seconds: float = 86400,
+                 db_path: Optional[str] = None):
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path or None
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()  # key -> (expires_at, value)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()  # SQLite I/O never holds the memory-tier lock
+        self._writes_since_prune = 0
+
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.upstream_calls = 0
+        self.shared_waits = 0
+        self.errors = 0
+
+        if self.db_path:
+            try:
+                self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS cache ("
+                    " key TEXT PRIMARY KEY,"
+                    " value TEXT NOT NULL,"
+                    " expires_at REAL NOT NULL)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires_at)")
+                self._prune_persistent()
+            except sqlite3.Error as e:
+                print(f"[TTLCache] '{name}': could not open {self.db_path}: {e}")
+                self._db = None
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value or None (memory first, then the SQLite tier)."""
+        value = self._get_memory(key)
+        if value is None:
+            value = self._get_persistent(key)
+        if value is None:
+            with self._lock:
+                self.misses += 1
+        return value
+
+    def set(self, key: str, value: Any):
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, value)
+        self._store_persistent(key, value, expires_at)
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Cached value, or the result of one shared `compute()` call for this key.
+        compute() runs as its own task and every caller (the first one too)
+        awaits it through a shield, so a cancelled caller never cancels the
+        computation for the others.
+        """
+        value = self._get_memory(key)
+        if value is not None:
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load_or_compute(key, compute))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            with self._lock:
+                self.shared_waits += 1
+        return await asyncio.shield(task)
+
+    async def _load_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        if self._db is not None:
+            value = await asyncio.to_thread(self._get_persistent, key)
+            if value is not None:
+                return value
+
+        with self._lock:
+            self.misses += 1
+            self.upstream_calls += 1
+        try:
+            value = await compute()
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, expires_at, value)
+        if self._db is not None:
+            await asyncio.to_thread(self._store_persistent, key, value, expires_at)
+        return value
+
+    def _finish(self, key: str, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved when every caller gave up
+
+    def get_stats(self) -> Dict[str, Any]:
+        """In-memory counters only (no SQLite I/O; see get_stats_async)."""
+        with self._lock:
+            lookups = self.memory_hits + self.persistent_hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "persistent": self.db_path,
+                "memory_hits": self.memory_hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.persistent_hits) / lookups, 3) if lookups else 0.0,
+                "upstream_calls": self.upstream_calls,
+                "shared_waits": self.shared_waits,
+                "errors": self.errors,
+                "inflight": len(self._inflight),
+            }
+
+    async def get_stats_async(self) -> Dict[str, Any]:
+        """get_stats() plus the SQLite row count, counted in a thread."""
+        stats = self.get_stats()
+        stats["persistent_size"] = await asyncio.to_thread(self._persistent_size)
+        return stats
+
+    def _persistent_size(self) -> Optional[int]:
+        if self._db is None:
+            return None
+        try:
+            with self._db_lock:
+                return self._db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        except sqlite3.Error:
+            return None
+
+    def _get_memory(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self.memory_hits += 1
+            return entry[1]
+
+    def _get_persistent(self, key: str) -> Optional[Any]:
+        if self._db is None:
+            return None
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None or row[1] <= time.time():
+            return None
+        value = json.loads(row[0])
+        with self._lock:
+            self._remember(key, row[1], value)
+            self.persistent_hits += 1
+        return value
+
+    def _store_persistent(self, key: str, value: Any, expires_at: float):
+        if self._db is None:
+            return
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires_at),
+                )
+                self._db.commit()
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= PRUNE_EVERY:
+                    self._prune_persistent()
+        except sqlite3.Error:
+            pass  # read-only volume: memory tier still works
+
+    def _prune_persistent(self):
+        """Drop expired rows, then all but the `max_size` latest. Called with _db_lock held (or on open)."""
+        self._db.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        self._db.execute(
+            "DELETE FROM cache WHERE key NOT IN"
+            " (SELECT key FROM cache ORDER BY expires_at DESC LIMIT ?)",
+            (self.max_size,),
+        )
+        self._db.commit()
+        self._writes_since_prune = 0
+
+    def _remember(self, key: str, expires_at: float, value: Any):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
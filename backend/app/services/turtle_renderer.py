@@ -0,0 +1,834 @@
+"""
+Headless turtle renderer: runs runner.py turtle lines on the backend and
+renders the result as SVG or PNG, without Tk, a display or the streaming Pi.
+
+Features:
+- Same calls as domains/turtle_app.TurtleApp: turtle.Turtle() objects,
+  module-level turtle.* calls on the anonymous turtle, screen calls
+  (bgcolor, setup, clearscreen, ...)
+- Safe interpreter: each line is parsed with `ast` and only literals,
+  arithmetic, variables and calls on turtle/screen objects are evaluated
+  (no exec of user code in the web worker)
+- Per-line errors like the Pi batch endpoint: a bad line is reported and
+  the rest still draws
+- SVG output, and PNG output from a pure-Python rasterizer (zlib only, no
+  Pillow); PNG leaves out write() text since there is no font rasterizer
+- No third-party imports, so it runs offline in CI
+
+Usage:
+    screen, errors = run_turtle_lines(["t1 = turtle.Turtle()", "t1.forward(100)"])
+    svg = screen.to_svg()
+    png = screen.to_png()
+"""
+
+import os
+import ast
+import html
+import math
+import zlib
+import struct
+import operator
+from typing import Any, Dict, List, Optional, Tuple
+
+# Configuration from environment
+DEFAULT_CANVAS_SIZE = 800           # the Pi runtime window is 800x800
+MAX_CANVAS_SIZE = int(os.getenv("TURTLE_RENDER_MAX_SIZE", "2000"))
+MAX_CIRCLE_STEPS = 360              # bounds circle(r, steps=...) per line
+MAX_COORDINATE = 1e9                # far off any canvas; keeps raster maths finite
+
+DEFAULT_FONT = ("Arial", 8, "normal")
+
+# Tk 8.6 colour names used most often in the playground
+COLOR_NAMES = {
+    "black": "#000000", "white": "#ffffff", "red": "#ff0000", "green": "#008000",
+    "blue": "#0000ff", "yellow": "#ffff00", "orange": "#ffa500", "purple": "#800080",
+    "pink": "#ffc0cb", "brown": "#a52a2a", "gray": "#808080", "grey": "#808080",
+    "cyan": "#00ffff", "magenta": "#ff00ff", "lime": "#00ff00", "navy": "#000080",
+    "teal": "#008080", "maroon": "#800000", "olive": "#808000", "gold": "#ffd700",
+    "violet": "#ee82ee", "indigo": "#4b0082", "silver": "#c0c0c0", "turquoise": "#40e0d0",
+    "skyblue": "#87ceeb", "lightblue": "#add8e6", "darkblue": "#00008b",
+    "lightgreen": "#90ee90", "darkgreen": "#006400", "darkred": "#8b0000",
+    "lightgray": "#d3d3d3", "lightgrey": "#d3d3d3", "darkgray": "#a9a9a9",
+    "darkgrey": "#a9a9a9", "coral": "#ff7f50", "salmon": "#fa8072", "tan": "#d2b48c",
+    "beige": "#f5f5dc", "khaki": "#f0e68c", "crimson": "#dc143c", "orchid": "#da70d6",
+    "lavender": "#e6e6fa", "chocolate": "#d2691e", "tomato": "#ff6347",
+    "hotpink": "#ff69b4", "aqua": "#00ffff", "fuchsia": "#ff00ff",
+}
+
+# turtle.py shape polygons: (x, y) with the turtle pointing along +y
+SHAPES = {
+    "classic": ((0, 0), (-5, -9), (0, -7), (5, -9)),
+    "arrow": ((-10, 0), (10, 0), (0, 10)),
+    "triangle": ((10, -5.77), (0, 11.55), (-10, -5.77)),
+    "square": ((10, -10), (10, 10), (-10, 10), (-10, -10)),
+    "turtle": (
+        (0, 16), (-2, 14), (-1, 10), (-4, 7), (-7, 9), (-9, 8), (-6, 5), (-7, 1), (-5, -3), (-8, -6),
+        (-6, -8), (-4, -5), (0, -7), (4, -5), (6, -8), (8, -6), (5, -3), (7, 1), (6, 5), (9, 8),
+        (7, 9), (4, 7), (1, 10), (2, 14),
+    ),
+    "circle": tuple(
+        (round(10 * math.cos(math.radians(a)), 2), round(10 * math.sin(math.radians(a)), 2))
+        for a in range(0, 360, 18)
+    ),
+}
+
+TEXT_ANCHORS = {"left": "start", "center": "middle", "right": "end"}
+
+
+class TurtleRenderError(Exception):
+    """A runner line the headless renderer cannot run (bad call, colour, syntax)."""
+
+
+def _finite(value, what: str) -> float:
+    """A coordinate/size/angle the renderer can draw, or a line error (inf, nan, 1e308...)."""
+    value = float(value)
+    if not math.isfinite(value) or abs(value) > MAX_COORDINATE:
+        raise TurtleRenderError(f"{what} out of range: {value!r}")
+    return value
+
+
+class Vec2D(tuple):
+    """Position value, printed like turtle's Vec2D."""
+
+    def __new__(cls, x, y):
+        return tuple.__new__(cls, (x, y))
+
+    def __repr__(self):
+        return "(%.2f,%.2f)" % self
+
+
+# ------------------------------------------------------------
+# Turtle and screen
+# ------------------------------------------------------------
+
+class HeadlessTurtle:
+    """turtle.Turtle() stand-in that records drawing items on its screen."""
+
+    def __init__(self, screen: "HeadlessScreen"):
+        self._screen = screen
+        self._screen._turtles.append(self)
+        self._shape = "classic"
+        self._fullcircle = 360.0
+        self._stamps: List[int] = []
+        self._init_state()
+
+    def _init_state(self):
+        self._x = 0.0
+        self._y = 0.0
+        self._heading = 0.0           # degrees, counter-clockwise from east
+        self._drawing = True
+        self._visible = True
+        self._pencolor = "#000000"
+        self._fillcolor = "#000000"
+        self._pensize = 1
+        self._stretch = None           # (stretch_wid, stretch_len, outline) after shapesize()
+        self._fillitem = None
+        self._fillpath = None
+
+    # -- helpers --------------------------------------------------
+
+    def _to_degrees(self, angle) -> float:
+        return float(angle) * 360.0 / self._fullcircle
+
+    def _from_degrees(self, degrees: float) -> float:
+        return degrees * self._fullcircle / 360.0
+
+    def _goto(self, x: float, y: float):
+        x, y = _finite(x, "x coordinate"), _finite(y, "y coordinate")
+        if self._drawing:
+            self._screen._items.append(
+                ["line", self, self._x, self._y, x, y, self._pencolor, self._pensize]
+            )
+        self._x, self._y = x, y
+        if self._fillpath is not None:
+            self._fillpath.append((x, y))
+
+    def _shape_polygon(self) -> Optional[List[Tuple[float, float]]]:
+        poly = SHAPES.get(self._shape)
+        if poly is None:
+            return None
+        wid, length = (self._stretch[0], self._stretch[1]) if self._stretch else (1, 1)
+        e0 = math.cos(math.radians(self._heading))
+        e1 = math.sin(math.radians(self._heading))
+        # turtle.py _polytrafo: shape +y follows the heading
+        return [
+            (self._x + e1 * px * wid + e0 * py * length, self._y - e0 * px * wid + e1 * py * length)
+            for px, py in poly
+        ]
+
+    # -- movement -------------------------------------------------
+
+    def forward(self, distance):
+        rad = math.radians(self._heading)
+        self._goto(self._x + distance * math.cos(rad), self._y + distance * math.sin(rad))
+
+    def backward(self, distance):
+        self.forward(-distance)
+
+    def left(self, angle):
+        self._heading = (self._heading + self._to_degrees(_finite(angle, "angle"))) % 360.0
+
+    def right(self, angle):
+        self.left(-angle)
+
+    def goto(self, x, y=None):
+        if y is None:
+            x, y = x
+        self._goto(float(x), float(y))
+
+    def setx(self, x):
+        self._goto(float(x), self._y)
+
+    def sety(self, y):
+        self._goto(self._x, float(y))
+
+    def setheading(self, to_angle):
+        self._heading = self._to_degrees(_finite(to_angle, "angle")) % 360.0
+
+    def home(self):
+        self._goto(0.0, 0.0)
+        self._heading = 0.0
+
+    def circle(self, radius, extent=None, steps=None):
+        # same polygon approximation as turtle.py
+        radius = _finite(radius, "radius")
+        if extent is None:
+            extent = self._fullcircle
+        extent = _finite(extent, "extent")
+        if steps is None:
+            frac = abs(extent) / self._fullcircle
+            steps = 1 + int(min(11 + abs(radius) / 6.0, 59.0) * frac)
+        steps = max(1, min(int(steps), MAX_CIRCLE_STEPS))
+        w = 1.0 * extent / steps
+        w2 = 0.5 * w
+        length = 2.0 * radius * math.sin(math.radians(self._to_degrees(w2)))
+        if radius < 0:
+            length, w, w2 = -length, -w, -w2
+        self.left(w2)
+        for _ in range(steps):
+            self.forward(length)
+            self.left(w)
+        self.left(-w2)
+
+    def degrees(self, fullcircle=360.0):
+        self._fullcircle = float(fullcircle)
+
+    def radians(self):
+        self._fullcircle = 2 * math.pi
+
+    def speed(self, speed=None):
+        return 3 if speed is None else None
+
+    # -- state queries --------------------------------------------
+
+    def position(self):
+        return Vec2D(self._x, self._y)
+
+    def xcor(self):
+        return self._x
+
+    def ycor(self):
+        return self._y
+
+    def heading(self):
+        return self._from_degrees(self._heading)
+
+    def towards(self, x, y=None):
+        if y is None:
+            x, y = x
+        angle = math.degrees(math.atan2(y - self._y, x - self._x)) % 360.0
+        return self._from_degrees(angle)
+
+    def distance(self, x, y=None):
+        if y is None:
+            x, y = x
+        return math.hypot(x - self._x, y - self._y)
+
+    def isdown(self):
+        return self._drawing
+
+    def isvisible(self):
+        return self._visible
+
+    def filling(self):
+        return self._fillpath is not None
+
+    # -- pen ------------------------------------------------------
+
+    def penup(self):
+        self._drawing = False
+
+    def pendown(self):
+        self._drawing = True
+
+    def pensize(self, width=None):
+        if width is None:
+            return self._pensize
+        _finite(width, "pen size")
+        self._pensize = width
+
+    def pencolor(self, *args):
+        if not args:
+            return self._pencolor
+        self._pencolor = self._screen._color(args)
+
+    def fillcolor(self, *args):
+        if not args:
+            return self._fillcolor
+        self._fillcolor = self._screen._color(args)
+
+    def color(self, *args):
+        if not args:
+            return self._pencolor, self._fillcolor
+        if len(args) == 2:
+            self._pencolor = self._screen._color(args[:1])
+            self._fillcolor = self._screen._color(args[1:])
+        else:
+            self._pencolor = self._fillcolor = self._screen._color(args)
+
+    def begin_fill(self):
+        # the fill polygon sits in the drawing order where begin_fill was called
+        self._fillitem = ["fill", self, None, self._fillcolor]
+        self._screen._items.append(self._fillitem)
+        self._fillpath = [(self._x, self._y)]
+
+    def end_fill(self):
+        if self._fillpath is not None and len(self._fillpath) > 2:
+            self._fillitem[2] = list(self._fillpath)
+            self._fillitem[3] = self._fillcolor
+        self._fillitem = None
+        self._fillpath = None
+
+    def dot(self, size=None, *color):
+        if size is None or isinstance(size, (str, tuple)):
+            if size is not None:
+                color = (size,) + color
+            size = max(self._pensize + 4, 2 * self._pensize)
+        _finite(size, "dot size")
+        colour = self._screen._color(color) if color else self._pencolor
+        self._screen._items.append(["dot", self, self._x, self._y, size, colour])
+
+    def write(self, arg, move=False, align="left", font=DEFAULT_FONT):
+        self._screen._items.append(
+            ["text", self, self._x, self._y, str(arg), self._pencolor, align, tuple(font)]
+        )
+
+    # -- drawing management ---------------------------------------
+
+    def clear(self):
+        self._screen._items = [item for item in self._screen._items if item[1] is not self]
+        self._stamps = []
+        self._fillitem = None
+        self._fillpath = None
+
+    def reset(self):
+        self.clear()
+        self._init_state()
+
+    def stamp(self):
+        polygon = self._shape_polygon()
+        stamp_id = self._screen._next_stamp
+        self._screen._next_stamp += 1
+        if polygon is not None:
+            self._screen._items.append(
+                ["stamp", self, stamp_id, polygon, self._pencolor, self._fillcolor]
+            )
+        self._stamps.append(stamp_id)
+        return stamp_id
+
+    def clearstamp(self, stampid):
+        self._screen._items = [
+            item for item in self._screen._items if not (item[0] == "stamp" and item[2] == stampid)
+        ]
+        if stampid in self._stamps:
+            self._stamps.remove(stampid)
+
+    def clearstamps(self, n=None):
+        if n is None:
+            doomed = list(self._stamps)
+        elif n >= 0:
+            doomed = self._stamps[:n]
+        else:
+            doomed = self._stamps[n:]
+        for stamp_id in doomed:
+            self.clearstamp(stamp_id)
+
+    # -- appearance -----------------------------------------------
+
+    def hideturtle(self):
+        self._visible = False
+
+    def showturtle(self):
+        self._visible = True
+
+    def shape(self, name=None):
+        if name is None:
+            return self._shape
+        if name not in SHAPES and name != "blank":
+            raise TurtleRenderError(f"There is no shape named {name}")
+        self._shape = name
+
+    def shapesize(self, stretch_wid=None, stretch_len=None, outline=None):
+        if stretch_wid is None and stretch_len is None and outline is None:
+            return self._stretch or (1.0, 1.0, 1)
+        wid, length, width = self._stretch or (1.0, 1.0, 1)
+        for value in (stretch_wid, stretch_len, outline):
+            if value is not None:
+                _finite(value, "shape size")
+        if stretch_wid is not None:
+            wid = stretch_wid
+            length = stretch_wid if stretch_len is None else stretch_len
+        elif stretch_len is not None:
+            length = stretch_len
+        self._stretch = (wid, length, width if outline is None else outline)
+
+    def getscreen(self):
+        return self._screen
+
+    # turtle.py aliases
+    fd = forward
+    bk = back = backward
+    lt = left
+    rt = right
+    setpos = setposition = goto
+    seth = setheading
+    pos = position
+    pu = up = penup
+    pd = down = pendown
+    width = pensize
+    ht = hideturtle
+    st = showturtle
+    turtlesize = shapesize
+
+
+class HeadlessScreen:
+    """Background, canvas size and every drawing item in drawing order."""
+
+    def __init__(self):
+        self._turtles: List[HeadlessTurtle] = []
+        self._anonymous: Optional[HeadlessTurtle] = None
+        self._init_screen()
+
+    def _init_screen(self):
+        self._items: List[list] = []
+        self._width = DEFAULT_CANVAS_SIZE
+        self._height = DEFAULT_CANVAS_SIZE
+        self._bg = "#ffffff"
+        self._colormode = 1.0
+        self._title = ""
+        self._next_stamp = 1
+
+    def _color(self, args) -> str:
+        """turtle colour arguments ("red", "#f00", (r, g, b) or r, g, b) -> "#rrggbb"."""
+        color = args[0] if len(args) == 1 else tuple(args)
+        if isinstance(color, str):
+            name = color.strip().lower().replace(" ", "")
+            digits = name[1:]
+            if name.startswith("#") and all(c in "0123456789abcdef" for c in digits):
+                if len(digits) == 3:
+                    return "#" + "".join(c * 2 for c in digits)
+                if len(digits) == 6:
+                    return name
+                if len(digits) == 12:
+                    return "#" + digits[0:2] + digits[4:6] + digits[8:10]
+            elif name in COLOR_NAMES:
+                return COLOR_NAMES[name]
+            raise TurtleRenderError(f"bad color string: {color}")
+
+        if isinstance(color, tuple) and len(color) == 3:
+            try:
+                rgb = [float(c) / self._colormode * 255 for c in color]
+            except (TypeError, ValueError):
+                raise TurtleRenderError(f"bad color arguments: {color}")
+            if all(0 <= c <= 255 for c in rgb):
+                return "#%02x%02x%02x" % tuple(int(round(c)) for c in rgb)
+        raise TurtleRenderError(f"bad color sequence: {color}")
+
+    def _anonymous_turtle(self) -> HeadlessTurtle:
+        if self._anonymous is None:
+            self._anonymous = HeadlessTurtle(self)
+        return self._anonymous
+
+    # -- screen calls ---------------------------------------------
+
+    def bgcolor(self, *args):
+        if not args:
+            return self._bg
+        self._bg = self._color(args)
+
+    def title(self, titlestring):
+        self._title = str(titlestring)
+
+    def setup(self, width=None, height=None, startx=None, starty=None):
+        # fractions of the screen are relative to the default window
+        if width is not None:
+            self._width = _canvas_size(width)
+        if height is not None:
+            self._height = _canvas_size(height)
+
+    def screensize(self, canvwidth=None, canvheight=None, bg=None):
+        if canvwidth is None and canvheight is None and bg is None:
+            return self._width, self._height
+        self.setup(canvwidth, canvheight)
+        if bg is not None:
+            self.bgcolor(bg)
+
+    def colormode(self, cmode=None):
+        if cmode is None:
+            return self._colormode
+        if cmode not in (1.0, 255):
+            raise TurtleRenderError(f"colormode must be 1.0 or 255, not {cmode}")
+        self._colormode = float(cmode) if cmode == 1.0 else 255
+
+    def window_width(self):
+        return self._width
+
+    def window_height(self):
+        return self._height
+
+    def turtles(self):
+        return list(self._turtles)
+
+    def clearscreen(self):
+        # drawings and turtles are gone; existing Turtle objects draw on a fresh screen
+        self._init_screen()
+        for t in self._turtles:
+            t._stamps = []
+            t._fillitem = t._fillpath = None
+        self._turtles = []
+        self._anonymous = None
+
+    def resetscreen(self):
+        for t in self._turtles:
+            t.reset()
+
+    def tracer(self, n=None, delay=None):
+        return 1 if n is None else None
+
+    def update(self):
+        pass
+
+    def delay(self, delay=None):
+        return 0 if delay is None else None
+
+    def listen(self, xdummy=None, ydummy=None):
+        pass
+
+    def mainloop(self):
+        pass
+
+    clear = clearscreen
+    reset = resetscreen
+    done = exitonclick = bye = mainloop
+
+    # -- output ---------------------------------------------------
+
+    def to_svg(self) -> str:
+        w, h = self._width, self._height
+
+        def sx(x):
+            return _n(w / 2 + x)
+
+        def sy(y):
+            return _n(h / 2 - y)
+
+        def pt(x, y):
+            return f"{sx(x)},{sy(y)}"
+
+        out = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{w}" height="{h}" viewBox="0 0 {w} {h}">',
+            f'<rect width="{w}" height="{h}" fill="{self._bg}"/>',
+        ]
+        for item in self._items:
+            kind = item[0]
+            if kind == "line":
+                _, _, x0, y0, x1, y1, color, width = item
+                out.append(
+                    f'<line x1="{sx(x0)}" y1="{sy(y0)}" x2="{sx(x1)}" y2="{sy(y1)}" stroke="{color}" '
+                    f'stroke-width="{_n(max(width, 1))}" stroke-linecap="round"/>'
+                )
+            elif kind == "fill" and item[2]:
+                points = " ".join(pt(x, y) for x, y in item[2])
+                out.append(f'<polygon points="{points}" fill="{item[3]}" fill-rule="evenodd"/>')
+            elif kind == "dot":
+                _, _, x, y, size, color = item
+                out.append(f'<circle cx="{sx(x)}" cy="{sy(y)}" r="{_n(size / 2)}" fill="{color}"/>')
+            elif kind == "text":
+                _, _, x, y, text, color, align, font = item
+                family, size, style = (tuple(font) + DEFAULT_FONT[len(font):])[:3]
+                weight = ' font-weight="bold"' if "bold" in str(style) else ""
+                italic = ' font-style="italic"' if "italic" in str(style) else ""
+                out.append(
+                    f'<text x="{sx(x)}" y="{sy(y)}" fill="{color}" text-anchor="{TEXT_ANCHORS.get(align, "start")}" '
+                    f'font-family="{html.escape(str(family))}" font-size="{size}pt"{weight}{italic}>'
+                    f'{html.escape(text)}</text>'
+                )
+            elif kind == "stamp":
+                points = " ".join(pt(x, y) for x, y in item[3])
+                out.append(f'<polygon points="{points}" fill="{item[5]}" stroke="{item[4]}"/>')
+
+        # turtles on top of the drawing
+        for t in self._turtles:
+            polygon = t._shape_polygon() if t._visible else None
+            if polygon:
+                points = " ".join(pt(x, y) for x, y in polygon)
+                out.append(f'<polygon points="{points}" fill="{t._fillcolor}" stroke="{t._pencolor}"/>')
+
+        out.append("</svg>")
+        return "\n".join(out)
+
+    def to_png(self) -> bytes:
+        raster = _Raster(self._width, self._height, self._bg)
+        for item in self._items:
+            kind = item[0]
+            if kind == "line":
+                _, _, x0, y0, x1, y1, color, width = item
+                raster.stroke(x0, y0, x1, y1, max(width, 1), color)
+            elif kind == "fill" and item[2]:
+                raster.fill_polygon(item[2], item[3])
+            elif kind == "dot":
+                _, _, x, y, size, color = item
+                raster.fill_disc(x, y, size / 2, color)
+            elif kind == "stamp":
+                raster.shape(item[3], item[4], item[5])
+
+        for t in self._turtles:
+            polygon = t._shape_polygon() if t._visible else None
+            if polygon:
+                raster.shape(polygon, t._pencolor, t._fillcolor)
+        return raster.to_png()
+
+
+def _canvas_size(value) -> int:
+    if isinstance(value, float) and 0 < value <= 1:
+        value = value * DEFAULT_CANVAS_SIZE
+    return max(1, min(int(value), MAX_CANVAS_SIZE))
+
+
+def _n(value: float) -> str:
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+# ------------------------------------------------------------
+# PNG rasterizer
+# ------------------------------------------------------------
+
+class _Raster:
+    """RGB pixel buffer in turtle coordinates (origin at the centre, y up)."""
+
+    def __init__(self, width: int, height: int, bg: str):
+        self.width = width
+        self.height = height
+        self.buf = bytearray(_rgb(bg) * (width * height))
+
+    def _span(self, row: int, xa: float, xb: float, rgb: bytes):
+        a = max(0, math.ceil(xa - 0.5))
+        b = min(self.width, math.ceil(xb - 0.5))
+        if b > a:
+            start = (row * self.width + a) * 3
+            self.buf[start:start + (b - a) * 3] = rgb * (b - a)
+
+    def fill_polygon(self, points, color: str):
+        """Even-odd scanline fill, sampling pixel centres."""
+        if len(points) < 3:
+            return
+        pts = [(self.width / 2 + x, self.height / 2 - y) for x, y in points]
+        edges = list(zip(pts, pts[1:] + pts[:1]))
+        ys = [y for _, y in pts]
+        rgb = _rgb(color)
+        for row in range(max(0, math.floor(min(ys))), min(self.height, math.ceil(max(ys)) + 1)):
+            cy = row + 0.5
+            xs = sorted(
+                ax + (cy - ay) * (bx - ax) / (by - ay)
+                for (ax, ay), (bx, by) in edges
+                if (ay <= cy < by) or (by <= cy < ay)
+            )
+            for i in range(0, len(xs) - 1, 2):
+                self._span(row, xs[i], xs[i + 1], rgb)
+
+    def fill_disc(self, x: float, y: float, radius: float, color: str):
+        cx, cy = self.width / 2 + x, self.height / 2 - y
+        rgb = _rgb(color)
+        for row in range(max(0, math.floor(cy - radius)), min(self.height, math.ceil(cy + radius) + 1)):
+            dy = row + 0.5 - cy
+            if abs(dy) <= radius:
+                half = math.sqrt(radius * radius - dy * dy)
+                self._span(row, cx - half, cx + half, rgb)
+
+    def stroke(self, x0: float, y0: float, x1: float, y1: float, width: float, color: str):
+        """Line as a quad of the pen width, with round caps like Tk."""
+        length = math.hypot(x1 - x0, y1 - y0)
+        if length:
+            nx = -(y1 - y0) / length * width / 2
+            ny = (x1 - x0) / length * width / 2
+            self.fill_polygon(
+                [(x0 + nx, y0 + ny), (x1 + nx, y1 + ny), (x1 - nx, y1 - ny), (x0 - nx, y0 - ny)], color
+            )
+        if width > 2 or not length:
+            self.fill_disc(x0, y0, width / 2, color)
+            self.fill_disc(x1, y1, width / 2, color)
+
+    def shape(self, polygon, outline: str, fill: str):
+        self.fill_polygon(polygon, fill)
+        for (ax, ay), (bx, by) in zip(polygon, polygon[1:] + polygon[:1]):
+            self.stroke(ax, ay, bx, by, 1, outline)
+
+    def to_png(self) -> bytes:
+        stride = self.width * 3
+        raw = b"".join(
+            b"\x00" + bytes(self.buf[row * stride:(row + 1) * stride]) for row in range(self.height)
+        )
+
+        def chunk(tag: bytes, data: bytes) -> bytes:
+            return (struct.pack("!I", len(data)) + tag + data
+                    + struct.pack("!I", zlib.crc32(tag + data) & 0xFFFFFFFF))
+
+        header = struct.pack("!IIBBBBB", self.width, self.height, 8, 2, 0, 0, 0)
+        return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+                + chunk(b"IDAT", zlib.compress(raw, 6)) + chunk(b"IEND", b""))
+
+
+def _rgb(color: str) -> bytes:
+    return bytes.fromhex(color[1:7])
+
+
+# ------------------------------------------------------------
+# `turtle` module stand-in and the line interpreter
+# ------------------------------------------------------------
+
+_SCREEN_CALLS = {
+    "bgcolor", "title", "setup", "screensize", "colormode", "window_width", "window_height",
+    "turtles", "clearscreen", "resetscreen", "tracer", "update", "delay", "listen",
+    "mainloop", "done", "exitonclick", "bye",
+}
+
+class HeadlessTurtleModule:
+    """What the name `turtle` refers to in runner lines."""
+
+    def __init__(self, screen: HeadlessScreen):
+        self._screen = screen
+
+    def Turtle(self):
+        return HeadlessTurtle(self._screen)
+
+    def Screen(self):
+        return self._screen
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name in _SCREEN_CALLS:
+            return getattr(self._screen, name)
+        if callable(getattr(HeadlessTurtle, name, None)):
+            return getattr(self._screen._anonymous_turtle(), name)
+        raise TurtleRenderError(f"module 'turtle' has no attribute '{name}'")
+
+    Pen = RawTurtle = Turtle
+
+
+_BINARY_OPS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod,
+}
+_UNARY_OPS = {ast.USub: operator.neg, ast.UAdd: operator.pos}
+_SAFE_TYPES = (HeadlessTurtle, HeadlessScreen, HeadlessTurtleModule)
+
+
+class _LineRunner:
+    """Evaluates one parsed runner line against the headless objects."""
+
+    def __init__(self, screen: HeadlessScreen):
+        self.names: Dict[str, Any] = {"turtle": HeadlessTurtleModule(screen)}
+        self.output: List[str] = []
+
+    def run(self, line: str):
+        try:
+            tree = ast.parse(line)
+        except SyntaxError as e:
+            raise TurtleRenderError(f"SyntaxError: {e.msg}")
+
+        for stmt in tree.body:
+            if isinstance(stmt, (ast.Import, ast.ImportFrom, ast.Pass)):
+                continue
+            if isinstance(stmt, ast.Assign) and all(isinstance(t, ast.Name) for t in stmt.targets):
+                value = self.eval(stmt.value)
+                for target in stmt.targets:
+                    self.names[target.id] = value
+            elif isinstance(stmt, ast.Expr):
+                self.eval(stmt.value)
+            else:
+                raise TurtleRenderError(f"unsupported statement: {type(stmt).__name__}")
+
+    def eval(self, node) -> Any:
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, (ast.Tuple, ast.List)):
+            return tuple(self.eval(e) for e in node.elts)
+        if isinstance(node, ast.Name):
+            if node.id not in self.names:
+                raise TurtleRenderError(f"name '{node.id}' is not defined")
+            return self.names[node.id]
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+            return _UNARY_OPS[type(node.op)](self._number(node.operand))
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+            return _BINARY_OPS[type(node.op)](self._number(node.left), self._number(node.right))
+        if isinstance(node, ast.Attribute):
+            obj = self.eval(node.value)
+            if not isinstance(obj, _SAFE_TYPES) or node.attr.startswith("_"):
+                raise TurtleRenderError(f"attribute '{node.attr}' is not available")
+            try:
+                return getattr(obj, node.attr)
+            except AttributeError:
+                raise TurtleRenderError(f"'{type(obj).__name__}' object has no attribute '{node.attr}'")
+        if isinstance(node, ast.Call):
+            args = [self.eval(a) for a in node.args]
+            kwargs = {kw.arg: self.eval(kw.value) for kw in node.keywords if kw.arg}
+            if isinstance(node.func, ast.Name) and node.func.id == "print":
+                self.output.append(" ".join(str(a) for a in args))
+                return None
+            func = self.eval(node.func)
+            if not callable(func) or not isinstance(getattr(func, "__self__", None), _SAFE_TYPES):
+                raise TurtleRenderError(f"'{ast.unparse(node.func)}' is not a turtle call")
+            try:
+                return func(*args, **kwargs)
+            except TurtleRenderError:
+                raise
+            except (TypeError, ValueError, ZeroDivisionError) as e:
+                raise TurtleRenderError(f"{type(e).__name__}: {e}")
+        raise TurtleRenderError(f"unsupported expression: {ast.unparse(node)}")
+
+    def _number(self, node):
+        value = self.eval(node)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise TurtleRenderError(f"expected a number: {ast.unparse(node)}")
+        return value
+
+
+def run_turtle_lines(lines: List[str]) -> Tuple[HeadlessScreen, List[Dict[str, Any]]]:
+    """
+    Run runner.py lines on a fresh headless screen.
+
+    Returns (screen, errors); errors are {"line", "command", "error"} for the
+    lines that failed, the other lines still draw.
+    """
+    screen = HeadlessScreen()
+    runner = _LineRunner(screen)
+    errors = []
+    for number, line in enumerate(lines, 1):
+        try:
+            runner.run(line)
+        except TurtleRenderError as e:
+            errors.append({"line": number, "command": line, "error": str(e)})
+        except Exception as e:
+            errors.append({"line": number, "command": line, "error": f"{type(e).__name__}: {e}"})
+    return screen, errors
+
+
+def render_turtle_lines(lines: List[str], fmt: str = "svg") -> Tuple[bytes, str, List[Dict[str, Any]]]:
+    """runner.py lines -> (image bytes, media type, errors) with fmt "svg" or "png"."""
+    screen, errors = run_turtle_lines(lines)
+    if fmt == "png":
+        return screen.to_png(), "image/png", errors
+    if fmt == "svg":
+        return screen.to_svg().encode("utf-8"), "image/svg+xml", errors
+    raise ValueError(f"unknown format: {fmt}")
@@ -0,0 +1,147 @@
+# backend/scripts/benchmark_inference.py
+# ============================================================
+# fp32 vs int8 CPU inference benchmark for the voice models
+#
+#   cd backend
+#   python -m scripts.benchmark_inference clip1.wav clip2.webm \
+#       --lang en --refs refs.txt --runs 3
+#
+# For each mode: load time, model size, mean transcription latency,
+# word error rate (against --refs, one line per clip, or against the fp32
+# output when no refs are given) and the same for T5 paraphrasing.
+# Both models run with the generation kwargs production uses.
+# ============================================================
+import argparse
+import io
+import time
+
+import torch
+
+from app.routers.voice import voice
+
+MODES = ("fp32", "int8")
+
+DEFAULT_SENTENCES = [
+    "turn on the light in the kitchen",
+    "add 5 and 3",
+    "move the turtle forward 100 steps",
+]
+
+
+def model_mb(model):
+    """Serialized state_dict size (parameters() misses int8 packed weights)."""
+    module = getattr(model, "model", model)
+    buf = io.BytesIO()
+    torch.save(module.state_dict(), buf)
+    return buf.tell() / (1024 * 1024)
+
+
+def word_error_rate(reference, hypothesis):
+    ref = reference.lower().split()
+    hyp = hypothesis.lower().split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    # Levenshtein over words
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h))
+        prev = cur
+    return prev[-1] / len(ref)
+
+
+def bench_whisper(mode, clips, lang, runs):
+    factory = voice._create_thai_pipeline if lang == "th" else voice._create_english_pipeline
+
+    t0 = time.time()
+    pipe = factory(mode)
+    load_s = time.time() - t0
+
+    texts, latencies = [], []
+    for audio in clips:
+        for run in range(runs):
+            t0 = time.time()
+            text = pipe(
+                {"array": audio, "sampling_rate": voice.WHISPER_SAMPLE_RATE},
+                return_timestamps=False,
+                generate_kwargs=voice._whisper_generate_kwargs(lang),
+            )["text"].strip()
+            latencies.append(time.time() - t0)
+        texts.append(text)
+
+    return {
+        "load_s": load_s,
+        "model_mb": model_mb(pipe),
+        "latency_s": sum(latencies) / len(latencies),
+        "texts": texts,
+    }
+
+
+def bench_t5(mode, sentences, runs):
+    t0 = time.time()
+    tokenizer, model = voice._create_t5_model(mode)
+    load_s = time.time() - t0
+
+    outputs, latencies = [], []
+    for sentence in sentences:
+        for run in range(runs):
+            t0 = time.time()
+            encoding = tokenizer([f"paraphrase: {sentence} </s>"], return_tensors="pt", padding=True)
+            generated = model.generate(**encoding, **voice._t5_generate_kwargs(3))
+            latencies.append(time.time() - t0)
+        outputs.append([tokenizer.decode(g, skip_special_tokens=True) for g in generated])
+
+    return {
+        "load_s": load_s,
+        "model_mb": model_mb(model),
+        "latency_s": sum(latencies) / len(latencies),
+        "outputs": outputs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fp32 vs int8 CPU inference benchmark")
+    parser.add_argument("audio", nargs="*", help="audio files to transcribe")
+    parser.add_argument("--lang", default="en", choices=["en", "th"])
+    parser.add_argument("--refs", help="reference transcripts, one line per audio file")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--skip-t5", action="store_true")
+    args = parser.parse_args()
+
+    refs = None
+    if args.refs:
+        with open(args.refs, "r", encoding="utf-8") as f:
+            refs = [line.strip() for line in f]
+
+    clips = []
+    for path in args.audio:
+        with open(path, "rb") as f:
+            audio, _ = voice.decode_audio(f.read())
+        clips.append(audio)
+
+    if clips:
+        results = {mode: bench_whisper(mode, clips, args.lang, args.runs) for mode in MODES}
+        baseline = refs or results["fp32"]["texts"]
+        print(f"\nWhisper ({args.lang}), {len(clips)} clip(s) x {args.runs} run(s)")
+        print(f"{'mode':<6} {'load s':>8} {'model MB':>10} {'latency s':>10} {'WER':>6}")
+        for mode, r in results.items():
+            wer = sum(word_error_rate(b, t) for b, t in zip(baseline, r["texts"])) / len(clips)
+            print(f"{mode:<6} {r['load_s']:>8.1f} {r['model_mb']:>10.0f} {r['latency_s']:>10.3f} {wer:>6.3f}")
+        fp32, int8 = results["fp32"], results["int8"]
+        print(f"int8 vs fp32: latency x{int8['latency_s'] / fp32['latency_s']:.2f}, "
+              f"memory x{int8['model_mb'] / max(fp32['model_mb'], 1e-9):.2f}")
+
+    if not args.skip_t5:
+        results = {mode: bench_t5(mode, DEFAULT_SENTENCES, args.runs) for mode in MODES}
+        print(f"\nT5 paraphrase, {len(DEFAULT_SENTENCES)} sentence(s) x {args.runs} run(s)")
+        print(f"{'mode':<6} {'load s':>8} {'model MB':>10} {'latency s':>10} {'same top-1':>11}")
+        for mode, r in results.items():
+            same = sum(a[0] == b[0] for a, b in zip(results["fp32"]["outputs"], r["outputs"]))
+            print(f"{mode:<6} {r['load_s']:>8.1f} {r['model_mb']:>10.0f} {r['latency_s']:>10.3f} "
+                  f"{same}/{len(DEFAULT_SENTENCES):>9}")
+
+
+if __name__ == "__main__":
+    main()
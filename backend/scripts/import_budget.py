@@ -0,0 +1,91 @@
+# backend/scripts/import_budget.py
+# ============================================================
+# Import-time budget check
+#
+#   cd backend
+#   python -m scripts.import_budget                 # checks app.main
+#   python -m scripts.import_budget app.parser_engine.api --budget 0.5
+#
+# Imports the given modules in a fresh interpreter with -X importtime and
+# fails (exit 1) if that takes longer than the budget or if any of the
+# heavy ML modules got imported (they must load lazily on first /voice use).
+# Note: importing app.main runs Base.metadata.create_all, so it needs the DB.
+# ============================================================
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "1.0"))
+HEAVY_MODULES = ("torch", "transformers", "librosa")
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def measure(modules):
+    """Import `modules` in a subprocess. Returns (seconds, heavy modules loaded, top imports)."""
+    code = (
+        "import sys, json\n"
+        + "".join(f"import {m}\n" for m in modules)
+        + f"print(json.dumps(sorted(m for m in {list(HEAVY_MODULES)!r} if m in sys.modules)))\n"
+    )
+    start = time.time()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=BACKEND_DIR,
+    )
+    elapsed = time.time() - start
+
+    if result.returncode != 0:
+        tail = "\n".join(result.stderr.strip().splitlines()[-5:])
+        raise RuntimeError(f"import failed:\n{tail}")
+
+    heavy = json.loads(result.stdout.strip().splitlines()[-1])
+
+    # "import time: self [us] | cumulative | imported package"
+    top = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        parts = line.split("|")
+        if len(parts) != 3:
+            continue
+        name = parts[2].rstrip()
+        if name.startswith("  "):  # nested import, counted in its parent
+            continue
+        top.append((int(parts[1].strip()) / 1e6, name.strip()))
+    top.sort(reverse=True)
+
+    return elapsed, heavy, top[:10]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import time of the API modules")
+    parser.add_argument("modules", nargs="*", default=["app.main"])
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET_SECONDS)
+    args = parser.parse_args()
+
+    elapsed, heavy, top = measure(args.modules)
+
+    print(f"[IMPORT_BUDGET] {', '.join(args.modules)}: {elapsed:.2f}s (budget {args.budget:.2f}s)")
+    for seconds, name in top:
+        print(f"    {seconds:6.3f}s  {name}")
+
+    ok = True
+    if heavy:
+        print(f"[IMPORT_BUDGET] FAIL: heavy modules imported eagerly: {', '.join(heavy)}")
+        ok = False
+    if elapsed > args.budget:
+        print("[IMPORT_BUDGET] FAIL: over budget")
+        ok = False
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 // not used
 import { ref } from 'vue'
+import { createFrameDecoder } from '@/shared/utils/streamFrames'
 
 const STREAM_DEVICE_BASE_URL = import.meta.env.VITE_STREAM_DEVICE_BASE_URL || 'https://192.168.4.228:8001'
 const STREAM_WS_BASE_URL = import.meta.env.VITE_STREAM_WS_BASE_URL || 'wss://192.168.4.228:443'
@@ -12,6 +13,10 @@ export function useTurtleStream() {
   let reconnectTimer = null
   let manuallyClosed = false
 
+  const frameDecoder = createFrameDecoder((src) => {
+    streamFrame.value = src
+  })
+
   const connectStream = (channelId) => {
     if (!channelId) return
 
@@ -27,15 +32,17 @@ export function useTurtleStream() {
     manuallyClosed = false
 
     const ws = new WebSocket(wsUrl)
+    ws.binaryType = 'arraybuffer'
 
     ws.onopen = () => {
       console.log('[STREAM] connected')
+      frameDecoder.reset()
       isStreaming.value = true
       clearTimeout(reconnectTimer)
     }
 
     ws.onmessage = (event) => {
-      streamFrame.value = `data:image/jpeg;base64,${event.data}`
+      frameDecoder.push(event.data)
     }
 
     ws.onerror = (err) => {
@@ -0,0 +1,169 @@
+import { applyVectorMessage, createVectorScene, renderVectorScene } from './turtleVector'
+
+// Turtle screen stream frames (see streamer_raspberrypi_code/api_server.py):
+//   text            legacy base64 JPEG
+//   JSON text       {"type": "vector", ...} drawing ops (vector stream mode)
+//   binary JPEG     full frame
+//   "KEYF" header + JPEG
+//                   keyframe (dirty-tile mode)
+//   "PTCH" header + JPEG
+//                   everything that changed since keyframe <id>, at x, y
+// header: 4-byte magic, then keyframe id, x, y, w, h as uint16 big-endian
+const HEADER_BYTES = 14
+
+const magicOf = (buffer) => {
+  if (buffer.byteLength < HEADER_BYTES) return null
+  return String.fromCharCode(...new Uint8Array(buffer, 0, 4))
+}
+
+const jpegBlob = (buffer, offset = 0) =>
+  new Blob([offset ? buffer.slice(offset) : buffer], { type: 'image/jpeg' })
+
+// onFrame(src) receives an <img> src for every decoded frame
+export function createFrameDecoder(onFrame) {
+  let objectUrl = null
+  let keyframeId = null
+  let keyframeBlob = null
+  let keyframeBitmap = null // decoded on the first patch after a keyframe
+  let canvas = null
+  // latest-frame-wins like the relay: while a frame decodes, only the newest
+  // keyframe and the newest patch after it wait (patches are cumulative)
+  let busy = false
+  let pendingKeyframe = null
+  let pendingPatch = null
+  let resetPending = false
+  let vectorScene = null
+  let vectorCanvas = null
+  let vectorPending = false
+
+  const show = (src, isObjectUrl) => {
+    const previous = objectUrl
+    objectUrl = isObjectUrl ? src : null
+    onFrame(src)
+    if (previous) URL.revokeObjectURL(previous)
+  }
+
+  const setKeyframe = (id, blob) => {
+    if (keyframeBitmap) keyframeBitmap.close()
+    keyframeId = id
+    keyframeBlob = blob
+    keyframeBitmap = null
+    show(URL.createObjectURL(blob), true)
+  }
+
+  // patches are cumulative, so keyframe + latest patch is the whole picture
+  const applyPatch = async (buffer) => {
+    const view = new DataView(buffer)
+    if (keyframeBlob === null || view.getUint16(4) !== keyframeId) return
+
+    if (!keyframeBitmap) {
+      keyframeBitmap = await createImageBitmap(keyframeBlob)
+      canvas = document.createElement('canvas')
+      canvas.width = keyframeBitmap.width
+      canvas.height = keyframeBitmap.height
+    }
+
+    const ctx = canvas.getContext('2d')
+    ctx.drawImage(keyframeBitmap, 0, 0)
+    if (buffer.byteLength > HEADER_BYTES) {
+      const patch = await createImageBitmap(jpegBlob(buffer, HEADER_BYTES))
+      ctx.drawImage(patch, view.getUint16(6), view.getUint16(8))
+      patch.close()
+    }
+
+    const blob = await new Promise((resolve) => canvas.toBlob(resolve, 'image/jpeg', 0.9))
+    if (blob) show(URL.createObjectURL(blob), true)
+  }
+
+  // vector mode: draw the scene client-side, at most once per animation frame
+  const handleVector = (msg) => {
+    if (!vectorScene) vectorScene = createVectorScene()
+    if (!applyVectorMessage(vectorScene, msg) || vectorPending) return
+
+    vectorPending = true
+    requestAnimationFrame(() => {
+      vectorPending = false
+      if (!vectorCanvas) vectorCanvas = document.createElement('canvas')
+      renderVectorScene(vectorCanvas, vectorScene)
+      vectorCanvas.toBlob((blob) => {
+        if (blob) show(URL.createObjectURL(blob), true)
+      }, 'image/png')
+    })
+  }
+
+  const handle = async (data) => {
+    if (typeof data === 'string') {
+      keyframeBlob = null
+      show(`data:image/jpeg;base64,${data}`, false)
+      return
+    }
+
+    const magic = magicOf(data)
+    if (magic === 'PTCH') {
+      await applyPatch(data)
+    } else if (magic === 'KEYF') {
+      setKeyframe(new DataView(data).getUint16(4), jpegBlob(data, HEADER_BYTES))
+    } else {
+      setKeyframe(null, jpegBlob(data))
+    }
+  }
+
+  const drain = async () => {
+    busy = true
+    while (resetPending || pendingKeyframe !== null || pendingPatch !== null) {
+      if (resetPending) {
+        resetPending = false
+        keyframeId = null
+        keyframeBlob = null
+        continue
+      }
+
+      let data = pendingKeyframe
+      if (data !== null) {
+        pendingKeyframe = null
+      } else {
+        data = pendingPatch
+        pendingPatch = null
+      }
+      try {
+        await handle(data)
+      } catch (err) {
+        console.warn('[STREAM] frame decode failed', err)
+      }
+    }
+    busy = false
+  }
+
+  const push = (data) => {
+    if (typeof data === 'string' && data.startsWith('{')) {
+      // vector ops are incremental and cheap: never dropped, never queued
+      try {
+        const msg = JSON.parse(data)
+        if (msg.type === 'vector') handleVector(msg)
+      } catch (err) {
+        console.warn('[STREAM] bad vector message', err)
+      }
+      return
+    }
+
+    if (typeof data !== 'string' && magicOf(data) === 'PTCH') {
+      pendingPatch = data
+    } else {
+      // anything that replaces the picture makes older pending frames stale
+      pendingKeyframe = data
+      pendingPatch = null
+    }
+    if (!busy) drain()
+  }
+
+  // new connection: ignore patches until its first keyframe
+  const reset = () => {
+    pendingKeyframe = null
+    pendingPatch = null
+    vectorScene = null
+    resetPending = true
+    if (!busy) drain()
+  }
+
+  return { push, reset }
+}
@@ -0,0 +1,165 @@
+// Client-side renderer for the turtle vector stream
+// (streamer_raspberrypi_code/turtle_vector.py documents the ops).
+// Messages: { type: 'vector', seq, ops, snapshot? }. A snapshot replaces the
+// scene; a delta must follow the previous seq, otherwise the scene is stale
+// until the next snapshot (the relay may drop frames for slow viewers).
+
+// turtle.py shape polygons: (x, y) with the turtle pointing along +y
+const SHAPES = {
+  classic: [[0, 0], [-5, -9], [0, -7], [5, -9]],
+  arrow: [[-10, 0], [10, 0], [0, 10]],
+  triangle: [[10, -5.77], [0, 11.55], [-10, -5.77]],
+  square: [[10, -10], [10, 10], [-10, 10], [-10, -10]],
+  turtle: [
+    [0, 16], [-2, 14], [-1, 10], [-4, 7], [-7, 9], [-9, 8], [-6, 5], [-7, 1], [-5, -3], [-8, -6],
+    [-6, -8], [-4, -5], [0, -7], [4, -5], [6, -8], [8, -6], [5, -3], [7, 1], [6, 5], [9, 8],
+    [7, 9], [4, 7], [1, 10], [2, 14]
+  ]
+}
+
+const DRAWING_TID = { line: 1, dot: 1, text: 1, fill: 2, stamp: 2 }
+
+export function createVectorScene() {
+  return { ops: [], seq: null, stale: true }
+}
+
+// -> true when the scene changed and needs a redraw
+export function applyVectorMessage(scene, msg) {
+  if (msg.snapshot) {
+    scene.ops = []
+    scene.stale = false
+  } else if (scene.stale || msg.seq !== scene.seq + 1) {
+    scene.stale = true
+    return false
+  }
+  scene.seq = msg.seq
+
+  for (const op of msg.ops) {
+    if (op[0] === 'reset') {
+      scene.ops = [op]
+    } else if (op[0] === 'clear') {
+      scene.ops = scene.ops.filter((o) => DRAWING_TID[o[0]] === undefined || o[DRAWING_TID[o[0]]] !== op[1])
+    } else if (op[0] === 'pose') {
+      scene.ops = scene.ops.filter((o) => o[0] !== 'pose' || o[1] !== op[1])
+      scene.ops.push(op)
+    } else {
+      scene.ops.push(op)
+    }
+  }
+  return true
+}
+
+const drawShape = (ctx, toCanvas, shape, x, y, heading, outline, fill) => {
+  if (shape === 'blank') return
+  const rad = (heading * Math.PI) / 180
+  const cos = Math.cos(rad)
+  const sin = Math.sin(rad)
+
+  ctx.beginPath()
+  if (shape === 'circle') {
+    const [cx, cy] = toCanvas(x, y)
+    ctx.arc(cx, cy, 10, 0, 2 * Math.PI)
+  } else {
+    const poly = SHAPES[shape] || SHAPES.classic
+    poly.forEach(([px, py], i) => {
+      // shape frame -> heading 0 (east): (py, -px), then rotate by heading
+      const lx = py
+      const ly = -px
+      const [cx, cy] = toCanvas(x + lx * cos - ly * sin, y + lx * sin + ly * cos)
+      if (i === 0) ctx.moveTo(cx, cy)
+      else ctx.lineTo(cx, cy)
+    })
+    ctx.closePath()
+  }
+  ctx.fillStyle = fill
+  ctx.fill()
+  ctx.lineWidth = 1
+  ctx.strokeStyle = outline
+  ctx.stroke()
+}
+
+export function renderVectorScene(canvas, scene) {
+  let width = 800
+  let height = 800
+  let bg = 'white'
+  const fills = new Map()
+  const clearedStamps = new Set()
+  for (const op of scene.ops) {
+    if (op[0] === 'setup') [, width, height] = op
+    else if (op[0] === 'bg') bg = op[1]
+    else if (op[0] === 'fill') fills.set(op[1], op)
+    else if (op[0] === 'clearstamp') clearedStamps.add(op[1])
+  }
+
+  canvas.width = width
+  canvas.height = height
+  const ctx = canvas.getContext('2d')
+  const toCanvas = (x, y) => [width / 2 + x, height / 2 - y]
+
+  ctx.fillStyle = bg
+  ctx.fillRect(0, 0, width, height)
+  ctx.lineCap = 'round'
+  ctx.lineJoin = 'round'
+
+  const poses = []
+  for (const op of scene.ops) {
+    switch (op[0]) {
+      case 'line': {
+        const [, , x0, y0, x1, y1, color, lineWidth] = op
+        ctx.beginPath()
+        ctx.moveTo(...toCanvas(x0, y0))
+        ctx.lineTo(...toCanvas(x1, y1))
+        ctx.strokeStyle = color
+        ctx.lineWidth = lineWidth
+        ctx.stroke()
+        break
+      }
+      case 'fillslot': {
+        const fill = fills.get(op[1])
+        if (!fill) break
+        ctx.beginPath()
+        fill[3].forEach(([x, y], i) => {
+          if (i === 0) ctx.moveTo(...toCanvas(x, y))
+          else ctx.lineTo(...toCanvas(x, y))
+        })
+        ctx.closePath()
+        ctx.fillStyle = fill[4]
+        ctx.fill()
+        break
+      }
+      case 'dot': {
+        const [, , x, y, size, color] = op
+        ctx.beginPath()
+        ctx.arc(...toCanvas(x, y), size / 2, 0, 2 * Math.PI)
+        ctx.fillStyle = color
+        ctx.fill()
+        break
+      }
+      case 'text': {
+        const [, , x, y, text, color, align, font] = op
+        const [family = 'Arial', size = 8, style = 'normal'] = font || []
+        ctx.font = `${style === 'normal' ? '' : style} ${size}pt ${family}`
+        ctx.textAlign = align
+        ctx.textBaseline = 'alphabetic'
+        ctx.fillStyle = color
+        ctx.fillText(text, ...toCanvas(x, y))
+        break
+      }
+      case 'stamp': {
+        const [, sid, , x, y, heading, shape, color, fillcolor] = op
+        if (!clearedStamps.has(sid)) drawShape(ctx, toCanvas, shape, x, y, heading, color, fillcolor)
+        break
+      }
+      case 'pose':
+        poses.push(op)
+        break
+      default:
+        break
+    }
+  }
+
+  // turtles on top of the drawing
+  for (const [, , x, y, heading, visible, shape, color, fillcolor] of poses) {
+    if (visible) drawShape(ctx, toCanvas, shape, x, y, heading, color, fillcolor)
+  }
+}
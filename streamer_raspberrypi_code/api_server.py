@@ -3,22 +3,39 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 import subprocess
 import os
+import shutil
+import time
+import resource
 import asyncio
 import ssl
 import websockets
 import cv2
 import mss
 import numpy as np
-import base64
 import signal
 import logging
 import threading
+import json
+import struct
+from typing import List
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pydantic import BaseModel
 
 TURTLE_PROCESSES = {}
 TURTLE_STDIN = {}
 STREAM_TASKS = {}
-CURRENT_CID = None
+SESSIONS = OrderedDict()  # cid -> session info, least recently used first
 DONE_EVENTS = {}
+READY_EVENTS = {}
+BATCH_RESULTS = {}
+COMMAND_LOCKS = {}
+VECTOR_FEEDS = {}  # cid -> (event loop, asyncio.Queue of op lists)
+START_LOCK = asyncio.Lock()
+
+COMMAND_TIMEOUT = 15.0
+READY_TIMEOUT = 10.0
+BATCH_SECONDS_PER_LINE = 2.0
 
 app = FastAPI(title="Pi Turtle Streaming Server")
 
@@ -38,6 +55,43 @@ os.makedirs(BASE_SESSION_DIR, exist_ok=True)
 WS_PUBLISH_BASE = "wss://192.168.4.228:443/publish"
 RUNTIME_PATH = "/home/pi/Desktop/GUI_Stream/turtle_runtime.py"
 
+# screen stream: binary JPEG frames, quality/scale adapt to the link
+STREAM_INTERVAL = 0.05          # around 20 FPS
+JPEG_QUALITY_START = 65
+JPEG_QUALITY_MAX = 80
+JPEG_QUALITY_MIN = 35
+JPEG_QUALITY_STEP = 5
+QUALITY_PER_EXTRA_SUBSCRIBER = 5
+SCALE_MIN = 0.5
+SCALE_STEP = 0.1
+ADAPT_COOLDOWN_FRAMES = 5
+STATS_EVERY_FRAMES = 200
+
+# unchanged frames are skipped; a full frame still goes out this often
+KEYFRAME_INTERVAL = 2.0
+# send only the changed region ("KEYF"/"PTCH" framing, see FrameGrabber)
+STREAM_DIRTY_TILES = os.getenv("STREAM_DIRTY_TILES", "false").lower() == "true"
+TILE_SIZE = 64
+PATCH_MAX_AREA = 0.5            # bigger changes go out as a keyframe
+FRAME_HEADER = struct.Struct("!4sHHHHH")  # magic, keyframe id, x, y, w, h
+
+# "pixels": real Tk turtle, screen-scraped JPEG frames
+# "vector": headless runtime (turtle_vector.py), drawing ops rendered by the browser
+TURTLE_STREAM_MODE = os.getenv("TURTLE_STREAM_MODE", "pixels")
+VECTOR_SNAPSHOT_IDLE = 1.0      # quiet this long after deltas -> resend the full scene
+
+# several runtimes per Pi: each pixel session gets its own Xvfb display (vector
+# sessions need none), its own CPU core and a memory cap; past
+# TURTLE_MAX_SESSIONS the least recently used session is stopped.
+# Without Xvfb, pixel sessions share the desktop display, so only one can run.
+TURTLE_MAX_SESSIONS = int(os.getenv("TURTLE_MAX_SESSIONS", "4"))
+TURTLE_NICE = int(os.getenv("TURTLE_NICE", "10"))
+TURTLE_MEMORY_MB = int(os.getenv("TURTLE_MEMORY_MB", "512"))
+XVFB_BIN = shutil.which("Xvfb")
+XVFB_DISPLAY_BASE = 100
+XVFB_START_TIMEOUT = 5.0
+CAPTURE_SIZE = 1000             # runtime window is 800x800 at (50, 50)
+
 
 def _pipe_reader(prefix: str, pipe, cid: int):
     try:
@@ -46,8 +100,26 @@ def _pipe_reader(prefix: str, pipe, cid: int):
                 break
 
             line = line.rstrip()
+
+            if line.startswith("[RUNTIME] OPS "):
+                ops = json.loads(line[len("[RUNTIME] OPS "):])
+                print(f"{prefix} [RUNTIME] OPS x{len(ops)}", flush=True)
+                feed = VECTOR_FEEDS.get(cid)
+                if feed:
+                    loop, queue = feed
+                    loop.call_soon_threadsafe(queue.put_nowait, ops)
+                continue
+
             print(f"{prefix} {line}", flush=True)
 
+            if line == "[RUNTIME] Ready":
+                evt = READY_EVENTS.get(cid)
+                if evt:
+                    evt.set()
+
+            if line.startswith("[RUNTIME] BATCH ["):
+                BATCH_RESULTS[cid] = json.loads(line[len("[RUNTIME] BATCH "):])
+
             if line == "[RUNTIME] OK":
                 evt = DONE_EVENTS.get(cid)
                 if evt:
@@ -56,19 +128,300 @@ def _pipe_reader(prefix: str, pipe, cid: int):
     except Exception as e:
         print(f"{prefix} reader error: {e}", flush=True)
 
-async def stream_screen_loop(region, turtle_process, ws_url, cid: int):
+class StreamQuality:
+    """
+    JPEG quality and scale for the screen stream.
+    Steps down while frames back up (slow ws.send, or the relay reports
+    subscriber drops), steps back up after ~1 s of headroom, and caps quality
+    lower the more viewers the relay has to fan out to.
+    """
+
+    def __init__(self):
+        self.quality = JPEG_QUALITY_START
+        self.scale = 1.0
+        self.subscribers = 1  # until the relay reports a count
+        self.drop_ratio = 0.0
+        self.send_ewma = 0.0
+        self._headroom_frames = 0
+        self._cooldown = 0
+
+    def quality_cap(self):
+        extra = max(self.subscribers - 1, 0)
+        return max(JPEG_QUALITY_MIN, JPEG_QUALITY_MAX - QUALITY_PER_EXTRA_SUBSCRIBER * extra)
+
+    def record_feedback(self, message):
+        self.subscribers = int(message.get("count", self.subscribers))
+        self.drop_ratio = float(message.get("drop_ratio", 0.0))
+
+    def record_send(self, seconds):
+        self.send_ewma = 0.8 * self.send_ewma + 0.2 * seconds
+
+        congested = self.send_ewma > 0.5 * STREAM_INTERVAL or self.drop_ratio > 0.25
+        headroom = self.send_ewma < 0.2 * STREAM_INTERVAL and self.drop_ratio < 0.05
+
+        if self._cooldown:
+            self._cooldown -= 1
+        elif congested:
+            self._headroom_frames = 0
+            self._cooldown = ADAPT_COOLDOWN_FRAMES
+            if self.quality > JPEG_QUALITY_MIN:
+                self.quality = max(JPEG_QUALITY_MIN, self.quality - JPEG_QUALITY_STEP)
+            elif self.scale > SCALE_MIN:
+                self.scale = round(max(SCALE_MIN, self.scale - SCALE_STEP), 2)
+        elif headroom:
+            self._headroom_frames += 1
+            if self._headroom_frames >= int(1.0 / STREAM_INTERVAL):
+                self._headroom_frames = 0
+                if self.scale < 1.0:
+                    self.scale = round(min(1.0, self.scale + SCALE_STEP), 2)
+                else:
+                    self.quality = min(self.quality_cap(), self.quality + JPEG_QUALITY_STEP)
+        else:
+            self._headroom_frames = 0
+
+        self.quality = min(self.quality, self.quality_cap())
+
+
+def dirty_box(before, after):
+    """Tile-aligned (x, y, w, h) around the pixels that differ, or None."""
+    changed = before != after  # uint32 views: one compare per BGRA pixel
+    rows = np.flatnonzero(changed.any(axis=1))
+    if rows.size == 0:
+        return None
+    cols = np.flatnonzero(changed.any(axis=0))
+    height, width = after.shape
+    y0 = rows[0] // TILE_SIZE * TILE_SIZE
+    x0 = cols[0] // TILE_SIZE * TILE_SIZE
+    y1 = min(height, (rows[-1] // TILE_SIZE + 1) * TILE_SIZE)
+    x1 = min(width, (cols[-1] // TILE_SIZE + 1) * TILE_SIZE)
+    return int(x0), int(y0), int(x1 - x0), int(y1 - y0)
+
+
+class FrameGrabber:
+    """Grab + diff + resize + JPEG encode on one worker thread, off the event loop.
+    mss handles are per thread, so the handle lives on that worker.
+
+    grab() returns None when the screen has not changed since the last frame.
+    With STREAM_DIRTY_TILES, frames are "KEYF" keyframes or "PTCH" patches
+    holding everything that changed since the keyframe they name, so a patch
+    dropped by the relay is repaired by the next one. Patches are full
+    resolution, so they are only sent against a keyframe sent at scale 1.0;
+    any scale change forces a keyframe."""
+
+    def __init__(self, region, display=None):
+        self.region = region
+        self.display = display
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stream-grab")
+        self._local = threading.local()
+        self._last_raw = None
+        self._key_pixels = None
+        self._key_scale = None  # scale the current keyframe was encoded at
+        self._key_id = 0
+
+    def _encode(self, img, quality, scale=1.0):
+        frame = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+        if scale < 1.0:
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        _, buf = cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+        return buf.tobytes()
+
+    def _grab(self, quality, scale, keyframe):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = self._local.sct = mss.mss(display=self.display) if self.display else mss.mss()
+
+        shot = sct.grab(self.region)
+        raw = bytes(shot.raw)
+        if not keyframe and raw == self._last_raw:
+            return None, False
+        self._last_raw = raw
+
+        img = np.frombuffer(raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        if not STREAM_DIRTY_TILES:
+            return self._encode(img, quality, scale), True
+
+        pixels = np.frombuffer(raw, dtype=np.uint32).reshape(shot.height, shot.width)
+        if (not keyframe and self._key_pixels is not None
+                and scale == self._key_scale == 1.0):
+            box = dirty_box(self._key_pixels, pixels)
+            if box is None:
+                # back to exactly the keyframe: an empty patch restores it
+                box = (0, 0, 0, 0)
+            x, y, w, h = box
+            if w * h <= PATCH_MAX_AREA * pixels.size:
+                jpg = self._encode(img[y:y + h, x:x + w], quality) if w and h else b""
+                return FRAME_HEADER.pack(b"PTCH", self._key_id, x, y, w, h) + jpg, False
+
+        self._key_pixels = pixels
+        self._key_scale = scale
+        self._key_id = (self._key_id + 1) % 65536
+        jpg = self._encode(img, quality, scale)
+        width, height = int(shot.width * scale), int(shot.height * scale)
+        return FRAME_HEADER.pack(b"KEYF", self._key_id, 0, 0, width, height) + jpg, True
+
+    async def grab(self, quality, scale, keyframe=False):
+        """-> (frame bytes or None when unchanged, is_keyframe)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._grab, quality, scale, keyframe)
+
+    def _close_sct(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is not None:
+            sct.close()
+
+    def close(self):
+        self._executor.submit(self._close_sct)
+        self._executor.shutdown(wait=False)
+
+
+async def _read_relay_feedback(ws, quality: StreamQuality):
+    """The relay sends {"type": "subscribers", "count", "drop_ratio"} text messages."""
+    async for message in ws:
+        if not isinstance(message, str):
+            continue
+        try:
+            data = json.loads(message)
+        except ValueError:
+            continue
+        if data.get("type") == "subscribers":
+            quality.record_feedback(data)
+
+
+async def stream_screen_loop(region, turtle_process, ws_url, cid: int, display=None):
     print(f"[STREAM] LOOP START CID={cid}", flush=True)
 
     ssl_ctx = ssl._create_unverified_context()
     max_retries = 5
+    grabber = FrameGrabber(region, display)
+    quality = StreamQuality()
+    loop = asyncio.get_running_loop()
+
+    try:
+        for attempt in range(max_retries):
+            if turtle_process.poll() is not None:
+                print(f"[STREAM] Turtle process already dead, stopping CID={cid}", flush=True)
+                break
+
+            print(f"[STREAM] Connecting to {ws_url} (attempt {attempt + 1}/{max_retries})", flush=True)
+
+            try:
+                async with websockets.connect(
+                    ws_url,
+                    ssl=ssl_ctx,
+                    ping_interval=20,
+                    ping_timeout=20,
+                    max_size=None,
+                ) as ws:
+                    print(f"[STREAM] WebSocket connected for CID={cid}", flush=True)
+                    feedback = asyncio.create_task(_read_relay_feedback(ws, quality))
+                    frames = 0
+                    skipped = 0
+                    last_keyframe = None  # new connection: start with a keyframe
+                    last_subscribers = quality.subscribers
+
+                    try:
+                        while True:
+                            if turtle_process.poll() is not None:
+                                print(f"[STREAM] Turtle process finished for CID={cid}", flush=True)
+                                return  # process done, exit completely
+
+                            started = loop.time()
+
+                            if quality.subscribers == 0:
+                                # nobody watching: the relay would drop the frame anyway
+                                await asyncio.sleep(STREAM_INTERVAL)
+                                continue
+
+                            # keyframes: periodically, and right away for a new viewer
+                            force_keyframe = (
+                                last_keyframe is None
+                                or started - last_keyframe >= KEYFRAME_INTERVAL
+                                or quality.subscribers > last_subscribers
+                            )
+                            last_subscribers = quality.subscribers
+
+                            jpg, is_keyframe = await grabber.grab(quality.quality, quality.scale, force_keyframe)
+                            if jpg is None:
+                                # idle turtle: nothing changed since the last frame
+                                skipped += 1
+                                await asyncio.sleep(max(0.0, STREAM_INTERVAL - (loop.time() - started)))
+                                continue
+                            if is_keyframe:
+                                last_keyframe = started
+
+                            sent_at = loop.time()
+                            await ws.send(jpg)  # binary frame
+                            quality.record_send(loop.time() - sent_at)
+
+                            frames += 1
+                            if frames % STATS_EVERY_FRAMES == 0:
+                                print(
+                                    f"[STREAM] CID={cid} q={quality.quality} scale={quality.scale} "
+                                    f"subs={quality.subscribers} {len(jpg) // 1024}KB "
+                                    f"send={quality.send_ewma * 1000:.0f}ms drop={quality.drop_ratio:.2f} "
+                                    f"skipped={skipped}",
+                                    flush=True,
+                                )
+
+                            await asyncio.sleep(max(0.0, STREAM_INTERVAL - (loop.time() - started)))
+                    finally:
+                        feedback.cancel()
+
+            except asyncio.CancelledError:
+                print(f"[STREAM] LOOP CANCELLED CID={cid}", flush=True)
+                raise
+            except Exception as e:
+                print(f"[STREAM] LOOP ERROR CID={cid} (attempt {attempt + 1}): {e}", flush=True)
+                if attempt < max_retries - 1:
+                    backoff = min(2 ** attempt, 10)
+                    print(f"[STREAM] Retrying in {backoff}s...", flush=True)
+                    await asyncio.sleep(backoff)
+                else:
+                    print(f"[STREAM] Max retries reached for CID={cid}, giving up", flush=True)
+    finally:
+        grabber.close()
+
+    print(f"[STREAM] LOOP END CID={cid}", flush=True)
+
+
+def apply_vector_ops(scene, ops):
+    """Fold ops into the scene a late subscriber needs (mirrors turtleVector.js)."""
+    for op in ops:
+        kind = op[0]
+        if kind == "reset":
+            scene[:] = [op]
+        elif kind == "clear":
+            scene[:] = [o for o in scene
+                        if o[0] not in ("line", "dot", "text", "fill", "stamp")
+                        or o[2 if o[0] in ("fill", "stamp") else 1] != op[1]]
+        elif kind == "pose":
+            scene[:] = [o for o in scene if o[0] != "pose" or o[1] != op[1]]
+            scene.append(op)
+        else:
+            scene.append(op)
+
+
+async def vector_stream_loop(turtle_process, ws_url, cid: int):
+    """
+    Publish the runtime's drawing ops as JSON text messages:
+    {"type": "vector", "seq": n, "ops": [...]} per executed command, and
+    {"type": "vector", "seq": n, "snapshot": true, "ops": scene} on connect,
+    for a new viewer, and once things go quiet after deltas (repairs deltas
+    the relay dropped for slow viewers).
+    """
+    print(f"[VECTOR] LOOP START CID={cid}", flush=True)
+
+    ssl_ctx = ssl._create_unverified_context()
+    max_retries = 5
+    _, queue = VECTOR_FEEDS[cid]
+    scene = []
+    seq = 0
 
     for attempt in range(max_retries):
         if turtle_process.poll() is not None:
-            print(f"[STREAM] Turtle process already dead, stopping CID={cid}", flush=True)
             break
 
-        print(f"[STREAM] Connecting to {ws_url} (attempt {attempt + 1}/{max_retries})", flush=True)
-
         try:
             async with websockets.connect(
                 ws_url,
@@ -77,48 +430,62 @@ async def stream_screen_loop(region, turtle_process, ws_url, cid: int):
                 ping_timeout=20,
                 max_size=None,
             ) as ws:
-                print(f"[STREAM] WebSocket connected for CID={cid}", flush=True)
-
-                with mss.mss() as sct:
-                    while True:
-                        if turtle_process.poll() is not None:
-                            print(f"[STREAM] Turtle process finished for CID={cid}", flush=True)
-                            return  # process done, exit completely
+                print(f"[VECTOR] WebSocket connected for CID={cid}", flush=True)
+                viewers = StreamQuality()  # only the relay's subscriber count is used
+                feedback = asyncio.create_task(_read_relay_feedback(ws, viewers))
 
-                        img = np.array(sct.grab(region))
-                        frame = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+                async def send_snapshot():
+                    await ws.send(json.dumps({"type": "vector", "seq": seq, "snapshot": True, "ops": scene},
+                                             separators=(",", ":")))
 
-                        _, buf = cv2.imencode(
-                            ".jpg",
-                            frame,
-                            [int(cv2.IMWRITE_JPEG_QUALITY), 65],
-                        )
-                        jpg_text = base64.b64encode(buf).decode("utf-8")
-                        await ws.send(jpg_text)
+                try:
+                    await send_snapshot()
+                    last_subscribers = viewers.subscribers
+                    deltas_since_snapshot = False
 
-                        await asyncio.sleep(0.05)   # around 20 FPS
+                    while True:
+                        if turtle_process.poll() is not None:
+                            print(f"[VECTOR] Turtle process finished for CID={cid}", flush=True)
+                            return
+
+                        try:
+                            ops = await asyncio.wait_for(queue.get(), VECTOR_SNAPSHOT_IDLE)
+                        except asyncio.TimeoutError:
+                            ops = None
+
+                        new_viewer = viewers.subscribers > last_subscribers
+                        last_subscribers = viewers.subscribers
+
+                        if ops is not None:
+                            apply_vector_ops(scene, ops)
+                            seq += 1
+                            await ws.send(json.dumps({"type": "vector", "seq": seq, "ops": ops},
+                                                     separators=(",", ":")))
+                            deltas_since_snapshot = True
+
+                        if new_viewer or (ops is None and deltas_since_snapshot):
+                            await send_snapshot()
+                            deltas_since_snapshot = False
+                finally:
+                    feedback.cancel()
 
         except asyncio.CancelledError:
-            print(f"[STREAM] LOOP CANCELLED CID={cid}", flush=True)
+            print(f"[VECTOR] LOOP CANCELLED CID={cid}", flush=True)
             raise
         except Exception as e:
-            print(f"[STREAM] LOOP ERROR CID={cid} (attempt {attempt + 1}): {e}", flush=True)
+            print(f"[VECTOR] LOOP ERROR CID={cid} (attempt {attempt + 1}): {e}", flush=True)
             if attempt < max_retries - 1:
-                backoff = min(2 ** attempt, 10)
-                print(f"[STREAM] Retrying in {backoff}s...", flush=True)
-                await asyncio.sleep(backoff)
-            else:
-                print(f"[STREAM] Max retries reached for CID={cid}, giving up", flush=True)
+                await asyncio.sleep(min(2 ** attempt, 10))
 
-    print(f"[STREAM] LOOP END CID={cid}", flush=True)
+    print(f"[VECTOR] LOOP END CID={cid}", flush=True)
 
 
 def start_stream_loop(cid: int, proc):
     region = {
         "left": 0,
         "top": 0,
-        "width": 1000,
-        "height": 1000,
+        "width": CAPTURE_SIZE,
+        "height": CAPTURE_SIZE,
     }
 
     old_task = STREAM_TASKS.get(cid)
@@ -126,8 +493,13 @@ def start_stream_loop(cid: int, proc):
         return
 
     ws_url = f"{WS_PUBLISH_BASE}/{cid}"
+    if cid in VECTOR_FEEDS:
+        STREAM_TASKS[cid] = asyncio.create_task(vector_stream_loop(proc, ws_url, cid))
+        return
+
+    display = SESSIONS[cid]["display"] if cid in SESSIONS else None
     STREAM_TASKS[cid] = asyncio.create_task(
-        stream_screen_loop(region, proc, ws_url, cid)
+        stream_screen_loop(region, proc, ws_url, cid, display)
     )
 
 
@@ -141,9 +513,75 @@ async def stop_stream_loop(cid: int):
             pass
 
 
-async def stop_turtle_session(cid: int):
-    global CURRENT_CID
+def session_cap() -> int:
+    if TURTLE_STREAM_MODE == "vector" or XVFB_BIN:
+        return max(1, TURTLE_MAX_SESSIONS)
+    return 1
+
+
+def touch_session(cid: int):
+    info = SESSIONS.get(cid)
+    if info:
+        info["last_used"] = time.time()
+        SESSIONS.move_to_end(cid)
+
+
+def _free_slot() -> int:
+    used = {info["slot"] for info in SESSIONS.values()}
+    return min(set(range(session_cap())) - used)
+
+
+async def _start_display(slot: int):
+    """-> (DISPLAY value, Xvfb process or None)"""
+    if TURTLE_STREAM_MODE == "vector":
+        return None, None
+    if not XVFB_BIN:
+        return os.environ.get("DISPLAY", ":0"), None
+
+    number = XVFB_DISPLAY_BASE + slot
+    xvfb = subprocess.Popen(
+        [XVFB_BIN, f":{number}", "-screen", "0", f"{CAPTURE_SIZE}x{CAPTURE_SIZE}x24", "-nolisten", "tcp"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+    socket_path = f"/tmp/.X11-unix/X{number}"
+    deadline = time.time() + XVFB_START_TIMEOUT
+    while not os.path.exists(socket_path):
+        if xvfb.poll() is not None or time.time() > deadline:
+            _kill_group(xvfb)
+            raise HTTPException(500, f"Xvfb :{number} did not start")
+        await asyncio.sleep(0.05)
+
+    return f":{number}", xvfb
+
+
+def _kill_group(proc):
+    try:
+        if proc.poll() is None:
+            os.killpg(os.getpgid(proc.pid), signal.SIGTERM)
+    except Exception:
+        pass
+
+
+def _apply_runtime_limits(pid: int, slot: int):
+    """Lower priority, one CPU core and a memory cap for a runtime, applied
+    from here right after spawn: preexec_fn is not safe in this threaded server."""
+    try:
+        priority = os.getpriority(os.PRIO_PROCESS, pid)
+        os.setpriority(os.PRIO_PROCESS, pid, min(19, priority + TURTLE_NICE))
+        if session_cap() > 1:
+            cpus = sorted(os.sched_getaffinity(0))
+            os.sched_setaffinity(pid, {cpus[slot % len(cpus)]})
+        if TURTLE_MEMORY_MB > 0:
+            limit = TURTLE_MEMORY_MB * 1024 * 1024
+            resource.prlimit(pid, resource.RLIMIT_AS, (limit, limit))
+    except (OSError, ValueError) as e:
+        print(f"[API] Could not apply runtime limits to pid {pid}: {e}", flush=True)
+
 
+async def stop_turtle_session(cid: int):
     proc = TURTLE_PROCESSES.get(cid)
 
     if proc:
@@ -156,20 +594,21 @@ async def stop_turtle_session(cid: int):
 
         await asyncio.sleep(0.2)
 
-        try:
-            if proc.poll() is None:
-                os.killpg(os.getpgid(proc.pid), signal.SIGTERM)
-        except Exception:
-            pass
+        _kill_group(proc)
 
     TURTLE_PROCESSES.pop(cid, None)
     TURTLE_STDIN.pop(cid, None)
     DONE_EVENTS.pop(cid, None)
+    READY_EVENTS.pop(cid, None)
+    VECTOR_FEEDS.pop(cid, None)
+    BATCH_RESULTS.pop(cid, None)
+    COMMAND_LOCKS.pop(cid, None)
 
     await stop_stream_loop(cid)
 
-    if CURRENT_CID == cid:
-        CURRENT_CID = None
+    info = SESSIONS.pop(cid, None)
+    if info and info["xvfb"] is not None:
+        _kill_group(info["xvfb"])
 
 
 @app.get("/")
@@ -177,44 +616,84 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/sessions")
+def list_sessions():
+    now = time.time()
+    return {
+        "max_sessions": session_cap(),
+        "stream_mode": TURTLE_STREAM_MODE,
+        "xvfb": XVFB_BIN is not None,
+        "sessions": [
+            {
+                "conversation_id": cid,
+                "slot": info["slot"],
+                "display": info["display"],
+                "pid": TURTLE_PROCESSES[cid].pid if cid in TURTLE_PROCESSES else None,
+                "age_s": round(now - info["started_at"], 1),
+                "idle_s": round(now - info["last_used"], 1),
+            }
+            for cid, info in SESSIONS.items()
+        ],
+    }
+
+
 @app.post("/start_turtle/{cid}")
 async def start_turtle(cid: int):
-    global CURRENT_CID
+    async with START_LOCK:
+        return await _start_turtle(cid)
 
-    if CURRENT_CID is not None and CURRENT_CID != cid:
-        await stop_turtle_session(CURRENT_CID)
 
+async def _start_turtle(cid: int):
     if cid in TURTLE_PROCESSES:
         proc = TURTLE_PROCESSES[cid]
         if proc.poll() is None:
-            CURRENT_CID = cid
+            touch_session(cid)
             start_stream_loop(cid, proc)
             return {
                 "status": "already_running",
                 "conversation_id": cid,
                 "fresh_runtime": False,
+                "stream_mode": "vector" if cid in VECTOR_FEEDS else "pixels",
             }
         else:
             await stop_turtle_session(cid)
 
+    # LRU cap: make room by stopping the least recently used sessions
+    while len(SESSIONS) >= session_cap():
+        lru_cid = next(iter(SESSIONS))
+        print(f"[API] Session cap {session_cap()} reached, stopping LRU CID={lru_cid}", flush=True)
+        await stop_turtle_session(lru_cid)
+
+    slot = _free_slot()
+    display, xvfb = await _start_display(slot)
+
     env = os.environ.copy()
-    env["DISPLAY"] = env.get("DISPLAY", ":0")
+    if display:
+        env["DISPLAY"] = display
+
+    vector = TURTLE_STREAM_MODE == "vector"
+    cmd = ["python3", RUNTIME_PATH] + (["--vector"] if vector else [])
 
     proc = subprocess.Popen(
-        ["python3", RUNTIME_PATH],
+        cmd,
         stdin=subprocess.PIPE,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
-        preexec_fn=os.setsid,
+        start_new_session=True,  # own process group, see _kill_group
         text=True,
         bufsize=1,
         env=env,
     )
+    _apply_runtime_limits(proc.pid, slot)
 
+    now = time.time()
+    SESSIONS[cid] = {"slot": slot, "display": display, "xvfb": xvfb, "started_at": now, "last_used": now}
     TURTLE_PROCESSES[cid] = proc
     TURTLE_STDIN[cid] = proc.stdin
+    if vector:
+        VECTOR_FEEDS[cid] = (asyncio.get_running_loop(), asyncio.Queue())
     DONE_EVENTS[cid] = threading.Event()
-    CURRENT_CID = cid
+    READY_EVENTS[cid] = ready = threading.Event()
 
     threading.Thread(
         target=_pipe_reader,
@@ -228,7 +707,8 @@ async def start_turtle(cid: int):
         daemon=True,
     ).start()
 
-    await asyncio.sleep(1.0)
+    # the runtime prints "[RUNTIME] Ready" once its window is up
+    await asyncio.to_thread(ready.wait, READY_TIMEOUT)
 
     if proc.poll() is not None:
         await stop_turtle_session(cid)
@@ -243,11 +723,31 @@ async def start_turtle(cid: int):
         "status": "started",
         "conversation_id": cid,
         "fresh_runtime": True,
+        "stream_mode": TURTLE_STREAM_MODE,
+        "display": display,
     }
 
 
-@app.post("/turtle_command/{cid}")
-async def turtle_command(cid: int, command: str):
+class TurtleBatch(BaseModel):
+    commands: List[str]
+
+
+def _is_ignored(line: str) -> bool:
+    return not line or line.startswith("#")
+
+
+async def _send_and_wait(cid: int, proc, message: str, timeout: float) -> bool:
+    """Write one protocol line to the runtime and wait for its [RUNTIME] OK."""
+    evt = DONE_EVENTS.setdefault(cid, threading.Event())
+    evt.clear()
+
+    proc.stdin.write(message + "\n")
+    proc.stdin.flush()
+
+    return await asyncio.to_thread(evt.wait, timeout)
+
+
+async def _get_running_proc(cid: int):
     proc = TURTLE_PROCESSES.get(cid)
     if not proc:
         raise HTTPException(404, "Turtle not running")
@@ -256,19 +756,22 @@ async def turtle_command(cid: int, command: str):
         await stop_turtle_session(cid)
         raise HTTPException(500, "Turtle process already exited")
 
+    touch_session(cid)
+    return proc
+
+
+@app.post("/turtle_command/{cid}")
+async def turtle_command(cid: int, command: str):
+    proc = await _get_running_proc(cid)
+
     clean_line = command.strip()
-    if not clean_line or clean_line.startswith("#"):
+    if _is_ignored(clean_line):
         return {"status": "ignored", "reason": "comment_or_empty"}
 
     try:
-        evt = DONE_EVENTS.setdefault(cid, threading.Event())
-        evt.clear()
-
-        print(f"[API] Sending command to CID={cid}: {clean_line}", flush=True)
-        proc.stdin.write(clean_line + "\n")
-        proc.stdin.flush()
-
-        done = await asyncio.to_thread(evt.wait, 15.0)
+        async with COMMAND_LOCKS.setdefault(cid, asyncio.Lock()):
+            print(f"[API] Sending command to CID={cid}: {clean_line}", flush=True)
+            done = await _send_and_wait(cid, proc, clean_line, COMMAND_TIMEOUT)
         if not done:
             raise HTTPException(504, f"Turtle command timed out: {clean_line}")
 
@@ -280,6 +783,62 @@ async def turtle_command(cid: int, command: str):
     return {"status": "sent", "command": clean_line}
 
 
+@app.post("/turtle_commands/{cid}")
+async def turtle_commands(cid: int, batch: TurtleBatch, replay: bool = False):
+    """
+    Run many lines in one runtime round trip (session replay).
+    The runtime execs them in order with a single screen.update();
+    returns one status per submitted line.
+    replay=true draws with the tracer off (no animation), for restoring a
+    session on a fresh runtime.
+    """
+    proc = await _get_running_proc(cid)
+
+    lines = [c.strip() for c in batch.commands]
+    runnable = [line for line in lines if not _is_ignored(line)]
+
+    runtime_results = []
+    if runnable:
+        timeout = max(COMMAND_TIMEOUT, BATCH_SECONDS_PER_LINE * len(runnable))
+        try:
+            async with COMMAND_LOCKS.setdefault(cid, asyncio.Lock()):
+                verb = "__REPLAY__" if replay else "__BATCH__"
+                print(f"[API] Sending {verb} to CID={cid}: {len(runnable)} lines", flush=True)
+                BATCH_RESULTS.pop(cid, None)
+                done = await _send_and_wait(cid, proc, f"{verb} {json.dumps(runnable)}", timeout)
+                runtime_results = BATCH_RESULTS.pop(cid, None)
+            if not done:
+                raise HTTPException(504, f"Turtle batch timed out after {timeout:.0f}s")
+            if runtime_results is None or len(runtime_results) != len(runnable):
+                raise HTTPException(500, "Turtle runtime did not report batch results")
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(500, f"Failed to send batch: {e}")
+
+    results = []
+    executed = iter(runtime_results)
+    for line in lines:
+        if _is_ignored(line):
+            results.append({"command": line, "status": "ignored"})
+            continue
+        outcome = next(executed)
+        if outcome.get("ok"):
+            results.append({"command": line, "status": "ok"})
+        else:
+            results.append({"command": line, "status": "error", "error": outcome.get("error")})
+
+    return {
+        "status": "sent",
+        "conversation_id": cid,
+        "replay": replay,
+        "commands_sent": len(runnable),
+        "errors": sum(1 for r in results if r["status"] == "error"),
+        "results": results,
+    }
+
+
 @app.post("/kill/{cid}")
 async def kill_turtle(cid: int):
     proc = TURTLE_PROCESSES.get(cid)
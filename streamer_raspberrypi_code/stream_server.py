@@ -1,48 +1,184 @@
 # code in pi5 : stream_server.py
+#
+# Fan-out relay: /publish/<channel> -> every /subscribe/<channel>.
+# Each subscriber has a one-slot "latest frame wins" queue and its own sender
+# task, so a slow browser only drops its own frames and never holds up the
+# publisher or the other viewers.
+# Publishers get {"type": "subscribers", "count": n, "drop_ratio": r} text
+# messages when the viewer count changes and every FEEDBACK_INTERVAL seconds
+# (api_server adapts JPEG quality to them).
+# GET /stats returns per-channel fan-out counters as JSON.
 import asyncio
+import json
+import time
 import websockets
 import ssl
+from http import HTTPStatus
 
-publishers = set()
-subscribers = {}
+SUBSCRIBER_QUEUE_SIZE = 1
+FEEDBACK_INTERVAL = 1.0
 
 ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
 ssl_context.load_cert_chain("server.crt", "server.key")
 
-async def publish(websocket, channel):
-    print(f"[PUBLISH] {channel}")
-    publishers.add(websocket)
+
+class Subscriber:
+    def __init__(self, websocket, channel):
+        self.websocket = websocket
+        self.channel = channel
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.sent = 0
+        self.dropped = 0
+        self.task = asyncio.create_task(self._sender())
+
+    def offer(self, message):
+        """Queue a frame without waiting; a full queue drops its oldest frame."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            self.channel.frames_dropped += 1
+        self.queue.put_nowait(message)
+
+    async def _sender(self):
+        try:
+            while True:
+                message = await self.queue.get()
+                await self.websocket.send(message)
+                self.sent += 1
+                self.channel.frames_sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # dead connection: subscribe() cleans up once wait_closed returns
+            print(f"[SUBSCRIBE] send failed on {self.channel.name}, dropping subscriber")
+            await self.websocket.close()
+
+
+class Channel:
+    def __init__(self, name):
+        self.name = name
+        self.publishers = set()
+        self.subscribers = {}
+        self.frames_in = 0
+        self.bytes_in = 0
+        self.frames_offered = 0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.last_frame_at = None
+        self._feedback_mark = (0, 0)  # (frames offered, frames dropped) at the last feedback
+
+    def fan_out(self, message):
+        self.frames_in += 1
+        self.bytes_in += len(message)
+        self.last_frame_at = time.time()
+        for sub in self.subscribers.values():
+            sub.offer(message)
+        self.frames_offered += len(self.subscribers)
+
+    def feedback(self):
+        """Viewer count and the share of frames dropped since the last call."""
+        offered, dropped = self.frames_offered, self.frames_dropped
+        last_offered, last_dropped = self._feedback_mark
+        self._feedback_mark = (offered, dropped)
+        delta = offered - last_offered
+        ratio = (dropped - last_dropped) / delta if delta else 0.0
+        return json.dumps({"type": "subscribers", "count": len(self.subscribers),
+                           "drop_ratio": round(ratio, 3)})
+
+    async def notify_publishers(self):
+        message = self.feedback()
+        for ws in list(self.publishers):
+            try:
+                await ws.send(message)
+            except Exception:
+                pass
+
+    def stats(self):
+        return {
+            "publishers": len(self.publishers),
+            "subscribers": len(self.subscribers),
+            "frames_in": self.frames_in,
+            "bytes_in": self.bytes_in,
+            "frames_offered": self.frames_offered,
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+            "seconds_since_last_frame": (
+                round(time.time() - self.last_frame_at, 1) if self.last_frame_at else None
+            ),
+            "per_subscriber": [
+                {"remote": str(sub.websocket.remote_address), "sent": sub.sent,
+                 "dropped": sub.dropped, "queued": sub.queue.qsize()}
+                for sub in self.subscribers.values()
+            ],
+        }
+
+
+channels = {}
+
+
+def get_channel(name):
+    channel = channels.get(name)
+    if channel is None:
+        channel = channels[name] = Channel(name)
+    return channel
+
+
+def release_channel(channel):
+    if not channel.publishers and not channel.subscribers:
+        channels.pop(channel.name, None)
+
+
+async def _feedback_loop(websocket, channel):
+    try:
+        while True:
+            await websocket.send(channel.feedback())
+            await asyncio.sleep(FEEDBACK_INTERVAL)
+    except websockets.ConnectionClosed:
+        pass
+
+
+async def publish(websocket, channel_name):
+    print(f"[PUBLISH] {channel_name}")
+    channel = get_channel(channel_name)
+    channel.publishers.add(websocket)
+    feedback = asyncio.create_task(_feedback_loop(websocket, channel))
     try:
         async for message in websocket:
-            if channel in subscribers and subscribers[channel]:
-                subs = list(subscribers[channel])
-                results = await asyncio.gather(
-                    *[ws.send(message) for ws in subs],
-                    return_exceptions=True
-                )
-                # clean up dead subscribers
-                for ws, result in zip(subs, results):
-                    if isinstance(result, Exception):
-                        print(f"[PUBLISH] removing dead subscriber from {channel}")
-                        subscribers[channel].discard(ws)
-            await asyncio.sleep(0.01)
+            channel.fan_out(message)
     except Exception as e:
         print("Publish error:", e)
     finally:
-        publishers.discard(websocket)
-        print(f"[PUBLISH CLOSED] {channel}")
+        feedback.cancel()
+        channel.publishers.discard(websocket)
+        release_channel(channel)
+        print(f"[PUBLISH CLOSED] {channel_name}")
+
 
-async def subscribe(websocket, channel):
-    print(f"[SUBSCRIBE] {channel}")
-    subscribers.setdefault(channel, set()).add(websocket)
+async def subscribe(websocket, channel_name):
+    print(f"[SUBSCRIBE] {channel_name}")
+    channel = get_channel(channel_name)
+    sub = Subscriber(websocket, channel)
+    channel.subscribers[websocket] = sub
+    await channel.notify_publishers()
     try:
         await websocket.wait_closed()
     finally:
-        subscribers[channel].discard(websocket)
-        print(f"[SUBSCRIBE CLOSED] {channel}")
+        sub.task.cancel()
+        channel.subscribers.pop(websocket, None)
+        await channel.notify_publishers()
+        release_channel(channel)
+        print(f"[SUBSCRIBE CLOSED] {channel_name} (sent={sub.sent}, dropped={sub.dropped})")
+
+
+async def process_request(path, request_headers):
+    if path == "/stats":
+        body = json.dumps({name: ch.stats() for name, ch in channels.items()}).encode("utf-8")
+        return HTTPStatus.OK, [("Content-Type", "application/json")], body
+    return None
+
 
 async def handler(websocket):
-    path = websocket.path 
+    path = websocket.path
     parts = path.split("/")
 
     if len(parts) < 3:
@@ -64,8 +200,10 @@ async def main():
         ssl=ssl_context,
         ping_interval=20,
         ping_timeout=20,
+        max_size=None,
+        process_request=process_request,
     ):
         print("WSS stream server running on :443")
         await asyncio.Future()
 
-asyncio.run(main())
\ No newline at end of file
+asyncio.run(main())
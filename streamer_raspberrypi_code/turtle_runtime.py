@@ -1,11 +1,33 @@
 # code in pi5 : turtle_runtime.py
+#
+# stdin protocol (one message per line):
+#   <python line>              exec it, then "[RUNTIME] OK"
+#   __BATCH__ <json list>      exec every line, one screen.update(), then
+#                              "[RUNTIME] BATCH <json results>" and "[RUNTIME] OK"
+#   __REPLAY__ <json list>     same as __BATCH__ with animation off (tracer(0)):
+#                              the whole drawing appears at once, then live
+#                              commands animate again
+#   __EXIT__                   quit
+#
+# --vector: no window; `turtle` is the turtle_vector shim and every message
+# also prints "[RUNTIME] OPS <json ops>" (before OK) for api_server to publish.
 import sys
-import turtle
+import json
+
+VECTOR_MODE = "--vector" in sys.argv
+if VECTOR_MODE:
+    import turtle_vector
+    sys.modules["turtle"] = turtle_vector
+
+import turtle  # noqa: E402  (the shim in vector mode)
 
 screen = turtle.Screen()
 screen.setup(width=800, height=800, startx=50, starty=50)
 screen.screensize(700, 700)
-screen.tracer(1, 20)
+
+# live commands animate; replays draw with the tracer off
+LIVE_TRACER = (1, 20)
+screen.tracer(*LIVE_TRACER)
 
 exec_globals = {
     "__name__": "__main__",
@@ -13,6 +35,35 @@ exec_globals = {
     "screen": screen,
 }
 
+
+def run_batch(lines, animate=True):
+    """Exec each line in order; a failing line does not stop the rest."""
+    if not animate:
+        screen.tracer(0)
+    results = []
+    try:
+        for line in lines:
+            try:
+                exec(line, exec_globals, exec_globals)
+                results.append({"ok": True})
+            except Exception as e:
+                results.append({"ok": False, "error": f"{type(e).__name__}: {e}"})
+    finally:
+        screen.update()
+        if not animate:
+            # a replayed line may have changed the tracer itself; live mode wins
+            screen.tracer(*LIVE_TRACER)
+    return results
+
+
+
+def publish_ops():
+    if VECTOR_MODE:
+        ops = turtle_vector.drain()
+        if ops:
+            print(f"[RUNTIME] OPS {json.dumps(ops, separators=(',', ':'))}", flush=True)
+
+
 print("[RUNTIME] Ready", flush=True)
 
 while True:
@@ -31,12 +82,25 @@ while True:
             print("[RUNTIME] Exiting", flush=True)
             break
 
+        if line.startswith(("__BATCH__ ", "__REPLAY__ ")):
+            verb, payload = line.split(" ", 1)
+            lines = json.loads(payload)
+            animate = verb == "__BATCH__"
+            print(f"[RUNTIME] {verb.strip('_')} EXEC: {len(lines)} lines", flush=True)
+            results = run_batch(lines, animate=animate)
+            publish_ops()
+            print(f"[RUNTIME] BATCH {json.dumps(results)}", flush=True)
+            print("[RUNTIME] OK", flush=True)
+            continue
+
         print(f"[RUNTIME] EXEC: {line}", flush=True)
         exec(line, exec_globals, exec_globals)
         screen.update()
+        publish_ops()
         print("[RUNTIME] OK", flush=True)
 
     except Exception as e:
+        publish_ops()  # a failing line may have drawn before it raised
         print(f"[RUNTIME] ERROR: {e}", flush=True)
         # signal OK even on error so api_server doesn't wait 15s
-        print("[RUNTIME] OK", flush=True)
\ No newline at end of file
+        print("[RUNTIME] OK", flush=True)
@@ -0,0 +1,486 @@
+# code in pi5 : turtle_vector.py
+#
+# Headless stand-in for the `turtle` module (turtle_runtime.py --vector).
+# Turtles keep real turtle geometry (heading, circle steps, fills, stamps) but
+# nothing is drawn: every visible change is recorded as a compact op that the
+# browser replays on a canvas. No Tk, no display.
+#
+# Ops (JSON lists; tid = turtle id, coordinates in turtle space, y up):
+#   ["line", tid, x0, y0, x1, y1, color, width]
+#   ["fillslot", fid]                     where a fill sits in drawing order
+#   ["fill", fid, tid, [[x, y], ...], color]
+#   ["dot", tid, x, y, size, color]
+#   ["text", tid, x, y, text, color, align, font]
+#   ["stamp", sid, tid, x, y, heading, shape, color, fillcolor]
+#   ["clearstamp", sid]
+#   ["clear", tid]                        drop that turtle's drawings
+#   ["pose", tid, x, y, heading, visible, shape, color, fillcolor]
+#   ["bg", color]
+#   ["setup", width, height]
+#   ["reset"]                             clear everything
+import math
+
+_ops = []
+_log = []  # drawing since the last ["reset"] (clearstamps looks stamps up here)
+_turtles = []
+_next_stamp = [1]
+_next_fill = [1]
+_colormode = [1.0]
+
+
+_TID_INDEX = {"line": 1, "dot": 1, "text": 1, "fill": 2, "stamp": 2}
+
+
+def _emit(op):
+    _ops.append(op)
+    kind = op[0]
+    if kind == "reset":
+        _log.clear()
+    elif kind == "clear":
+        # compact the snapshot: that turtle's drawings are gone for good
+        tid = op[1]
+        _log[:] = [o for o in _log if _TID_INDEX.get(o[0]) is None or o[_TID_INDEX[o[0]]] != tid]
+        return
+    _log.append(op)
+
+
+def drain():
+    """Ops recorded since the last drain (poses of moved turtles last)."""
+    for t in _turtles:
+        if t._pose_dirty:
+            t._pose_dirty = False
+            _emit(["pose", t._id, round(t._x, 2), round(t._y, 2), round(t._heading, 2),
+                   t._visible, t._shape, t._pencolor, t._fillcolor])
+    ops = list(_ops)
+    _ops.clear()
+    return ops
+
+
+def _color(args):
+    """turtle colour arguments -> CSS colour string"""
+    if len(args) == 1:
+        args = args[0]
+    if isinstance(args, str):
+        return args
+    r, g, b = args
+    scale = 255.0 / _colormode[0]
+    return "#%02x%02x%02x" % tuple(max(0, min(255, int(round(c * scale)))) for c in (r, g, b))
+
+
+class Turtle:
+    def __init__(self, shape="classic", undobuffersize=1000, visible=True):
+        self._id = len(_turtles)
+        _turtles.append(self)
+        self._shape = shape
+        self._visible = visible
+        self._reset_state()
+
+    def _reset_state(self):
+        self._x = 0.0
+        self._y = 0.0
+        self._heading = 0.0
+        self._fullcircle = 360.0
+        self._pendown = True
+        self._pensize = 1
+        self._pencolor = "black"
+        self._fillcolor = "black"
+        self._speed = 3
+        self._fill = None  # (fid, points) while filling
+        self._stretch = (1, 1, 1)
+        self._pose_dirty = True
+
+    # --- movement -------------------------------------------------------
+
+    def _moveto(self, x, y):
+        x, y = float(x), float(y)
+        if self._pendown:
+            _emit(["line", self._id, round(self._x, 2), round(self._y, 2), round(x, 2), round(y, 2),
+                   self._pencolor, self._pensize])
+        if self._fill is not None:
+            self._fill[1].append([round(x, 2), round(y, 2)])
+        self._x, self._y = x, y
+        self._pose_dirty = True
+
+    def forward(self, distance):
+        rad = math.radians(self._heading)
+        self._moveto(self._x + distance * math.cos(rad), self._y + distance * math.sin(rad))
+
+    def backward(self, distance):
+        self.forward(-distance)
+
+    def _turn(self, angle):
+        self._heading = (self._heading + angle * 360.0 / self._fullcircle) % 360.0
+        self._pose_dirty = True
+
+    def left(self, angle):
+        self._turn(angle)
+
+    def right(self, angle):
+        self._turn(-angle)
+
+    def goto(self, x, y=None):
+        if y is None:
+            x, y = x
+        self._moveto(x, y)
+
+    def setx(self, x):
+        self._moveto(x, self._y)
+
+    def sety(self, y):
+        self._moveto(self._x, y)
+
+    def setheading(self, to_angle):
+        self._heading = (to_angle * 360.0 / self._fullcircle) % 360.0
+        self._pose_dirty = True
+
+    def home(self):
+        self.goto(0, 0)
+        self.setheading(0)
+
+    def circle(self, radius, extent=None, steps=None):
+        # same polygon approximation as turtle.RawTurtle.circle
+        fullcircle = self._fullcircle
+        if extent is None:
+            extent = fullcircle
+        if steps is None:
+            frac = abs(extent) / fullcircle
+            steps = 1 + int(min(11 + abs(radius) / 6.0, 59.0) * frac)
+        w = 1.0 * extent / steps
+        w2 = 0.5 * w
+        length = 2.0 * radius * math.sin(math.radians(w2 * 360.0 / fullcircle))
+        if radius < 0:
+            length, w, w2 = -length, -w, -w2
+        self._turn(w2)
+        for _ in range(steps):
+            self.forward(length)
+            self._turn(w)
+        self._turn(-w2)
+
+    def teleport(self, x=None, y=None, **kwargs):
+        down = self._pendown
+        self._pendown = False
+        self._moveto(self._x if x is None else x, self._y if y is None else y)
+        self._pendown = down
+
+    fd = forward
+    bk = back = backward
+    lt = left
+    rt = right
+    setpos = setposition = goto
+    seth = setheading
+
+    # --- state queries ---------------------------------------------------
+
+    def position(self):
+        return (round(self._x, 10), round(self._y, 10))
+
+    pos = position
+
+    def xcor(self):
+        return self._x
+
+    def ycor(self):
+        return self._y
+
+    def heading(self):
+        return self._heading * self._fullcircle / 360.0
+
+    def towards(self, x, y=None):
+        if y is None:
+            x, y = x
+        angle = math.degrees(math.atan2(y - self._y, x - self._x)) % 360.0
+        return angle * self._fullcircle / 360.0
+
+    def distance(self, x, y=None):
+        if y is None:
+            x, y = x
+        return math.hypot(x - self._x, y - self._y)
+
+    def isdown(self):
+        return self._pendown
+
+    def isvisible(self):
+        return self._visible
+
+    def degrees(self, fullcircle=360.0):
+        self._fullcircle = float(fullcircle)
+
+    def radians(self):
+        self._fullcircle = 2 * math.pi
+
+    # --- pen ---------------------------------------------------------------
+
+    def penup(self):
+        self._pendown = False
+
+    def pendown(self):
+        self._pendown = True
+
+    pu = up = penup
+    pd = down = pendown
+
+    def pensize(self, width=None):
+        if width is None:
+            return self._pensize
+        self._pensize = width
+
+    width = pensize
+
+    def speed(self, speed=None):
+        if speed is None:
+            return self._speed
+        self._speed = speed
+
+    def pencolor(self, *args):
+        if not args:
+            return self._pencolor
+        self._pencolor = _color(args)
+        self._pose_dirty = True
+
+    def fillcolor(self, *args):
+        if not args:
+            return self._fillcolor
+        self._fillcolor = _color(args)
+        self._pose_dirty = True
+
+    def color(self, *args):
+        if not args:
+            return self._pencolor, self._fillcolor
+        if len(args) == 2:
+            self.pencolor(args[0])
+            self.fillcolor(args[1])
+        else:
+            self.pencolor(*args)
+            self.fillcolor(*args)
+
+    def begin_fill(self):
+        fid = _next_fill[0]
+        _next_fill[0] += 1
+        _emit(["fillslot", fid])
+        self._fill = (fid, [[round(self._x, 2), round(self._y, 2)]])
+
+    def end_fill(self):
+        if self._fill is None:
+            return
+        fid, points = self._fill
+        self._fill = None
+        if len(points) > 2:
+            _emit(["fill", fid, self._id, points, self._fillcolor])
+
+    def filling(self):
+        return self._fill is not None
+
+    def dot(self, size=None, *color):
+        if size is None:
+            size = max(self._pensize + 4, 2 * self._pensize)
+        _emit(["dot", self._id, round(self._x, 2), round(self._y, 2), size,
+               _color(color) if color else self._pencolor])
+
+    def write(self, arg, move=False, align="left", font=("Arial", 8, "normal")):
+        _emit(["text", self._id, round(self._x, 2), round(self._y, 2), str(arg),
+               self._pencolor, align, list(font)])
+
+    def stamp(self):
+        sid = _next_stamp[0]
+        _next_stamp[0] += 1
+        _emit(["stamp", sid, self._id, round(self._x, 2), round(self._y, 2), round(self._heading, 2),
+               self._shape, self._pencolor, self._fillcolor])
+        return sid
+
+    def clearstamp(self, stampid):
+        _emit(["clearstamp", stampid])
+
+    def clearstamps(self, n=None):
+        stamps = [op[1] for op in _log if op[0] == "stamp" and op[2] == self._id]
+        cleared = {op[1] for op in _log if op[0] == "clearstamp"}
+        stamps = [s for s in stamps if s not in cleared]
+        if n is not None:
+            stamps = stamps[:n] if n >= 0 else stamps[n:]
+        for sid in stamps:
+            self.clearstamp(sid)
+
+    def clear(self):
+        _emit(["clear", self._id])
+
+    def reset(self):
+        self.clear()
+        self._reset_state()
+
+    # --- appearance ----------------------------------------------------------
+
+    def hideturtle(self):
+        self._visible = False
+        self._pose_dirty = True
+
+    def showturtle(self):
+        self._visible = True
+        self._pose_dirty = True
+
+    ht = hideturtle
+    st = showturtle
+
+    def shape(self, name=None):
+        if name is None:
+            return self._shape
+        self._shape = name
+        self._pose_dirty = True
+
+    def shapesize(self, stretch_wid=None, stretch_len=None, outline=None):
+        if stretch_wid is None and stretch_len is None and outline is None:
+            return self._stretch
+        self._stretch = (stretch_wid or 1, stretch_len or stretch_wid or 1, outline or 1)
+
+    turtlesize = shapesize
+
+    def getscreen(self):
+        return _screen
+
+
+Pen = RawTurtle = Turtle
+
+
+class _Screen:
+    def __init__(self):
+        self._bg = "white"
+        self._title = "Python Turtle Graphics"
+        self._size = (800, 800)
+
+    def setup(self, width=800, height=800, startx=None, starty=None):
+        self._size = (int(width), int(height))
+        _emit(["setup", int(width), int(height)])
+
+    def screensize(self, canvwidth=None, canvheight=None, bg=None):
+        if bg is not None:
+            self.bgcolor(bg)
+        return self._size
+
+    def bgcolor(self, *args):
+        if not args:
+            return self._bg
+        self._bg = _color(args)
+        _emit(["bg", self._bg])
+
+    def title(self, text):
+        self._title = str(text)
+
+    def colormode(self, cmode=None):
+        if cmode is None:
+            return _colormode[0]
+        _colormode[0] = float(cmode)
+
+    def clearscreen(self):
+        _emit(["reset"])
+        _emit(["setup", *self._size])
+        self._bg = "white"
+        for t in _turtles:
+            t._reset_state()
+
+    clear = clearscreen
+
+    def resetscreen(self):
+        for t in _turtles:
+            t.reset()
+
+    reset = resetscreen
+
+    def turtles(self):
+        return list(_turtles)
+
+    def window_width(self):
+        return self._size[0]
+
+    def window_height(self):
+        return self._size[1]
+
+    # animation / event loop: nothing to do without a window
+    def tracer(self, n=None, delay=None):
+        return 0
+
+    def update(self):
+        pass
+
+    def delay(self, delay=None):
+        return 0
+
+    def mainloop(self):
+        pass
+
+    done = exitonclick = bye = listen = mainloop
+
+    def onclick(self, *args, **kwargs):
+        pass
+
+    onscreenclick = onkey = onkeypress = onkeyrelease = ontimer = onclick
+
+
+_screen = _Screen()
+_default = []
+
+
+def Screen():
+    return _screen
+
+
+def getscreen():
+    return _screen
+
+
+def _default_turtle():
+    if not _default:
+        _default.append(Turtle())
+    return _default[0]
+
+
+def getturtle():
+    return _default_turtle()
+
+
+getpen = getturtle
+
+
+_TURTLE_FUNCS = [
+    "forward", "fd", "backward", "bk", "back", "left", "lt", "right", "rt",
+    "goto", "setpos", "setposition", "setx", "sety", "setheading", "seth",
+    "home", "circle", "teleport", "position", "pos", "xcor", "ycor", "heading",
+    "towards", "distance", "isdown", "isvisible", "degrees", "radians",
+    "penup", "pu", "up", "pendown", "pd", "down", "pensize", "width", "speed",
+    "pencolor", "fillcolor", "color", "begin_fill", "end_fill", "filling",
+    "dot", "write", "stamp", "clearstamp", "clearstamps", "clear", "reset",
+    "hideturtle", "ht", "showturtle", "st", "shape", "shapesize", "turtlesize",
+]
+
+_SCREEN_FUNCS = [
+    "setup", "screensize", "bgcolor", "title", "colormode", "clearscreen",
+    "resetscreen", "turtles", "window_width", "window_height", "tracer", "update",
+    "delay", "mainloop", "done", "exitonclick", "bye", "listen", "onclick",
+    "onscreenclick", "onkey", "onkeypress", "onkeyrelease", "ontimer",
+]
+
+
+def _make_turtle_func(name):
+    def func(*args, **kwargs):
+        return getattr(_default_turtle(), name)(*args, **kwargs)
+    func.__name__ = name
+    return func
+
+
+def _make_screen_func(name):
+    def func(*args, **kwargs):
+        return getattr(_screen, name)(*args, **kwargs)
+    func.__name__ = name
+    return func
+
+
+for _name in _TURTLE_FUNCS:
+    globals()[_name] = _make_turtle_func(_name)
+
+for _name in _SCREEN_FUNCS:
+    globals()[_name] = _make_screen_func(_name)
+
+
+class Terminator(Exception):
+    pass
+
+
+class TurtleGraphicsError(Exception):
+    pass
@@ -0,0 +1,131 @@
+import importlib.util
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+# load the module by path: importing it through app.services also imports
+# http_clients, which needs httpx
+SESSION_WORKERS_PATH = Path(__file__).resolve().parent.parent / "backend/app/services/session_workers.py"
+spec = importlib.util.spec_from_file_location("session_workers", SESSION_WORKERS_PATH)
+session_workers = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(session_workers)
+
+HEADER = "import sys\n\n"
+LINES = [
+    "open('log.txt', 'a').write('a\\n'); print('a', 1)",
+    "open('log.txt', 'a').write('b\\n'); print('b', 2)",
+    "1/0",
+    "open('log.txt', 'a').write('c\\n'); print('c', 2)",
+]
+
+
+def new_session():
+    session_dir = Path(tempfile.mkdtemp(prefix="session_"))
+    (session_dir / "runner.py").write_text(HEADER, encoding="utf-8")
+    return session_dir
+
+
+def append(session_dir, line):
+    with open(session_dir / "runner.py", "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+def log(session_dir):
+    path = session_dir / "log.txt"
+    return path.read_text(encoding="utf-8").split() if path.exists() else []
+
+
+def python_runner(session_dir):
+    """Baseline: a plain `python runner.py` (what FEATURE_PERSISTENT_RUNNER=false does)."""
+    result = subprocess.run([sys.executable, "runner.py"], capture_output=True, text=True,
+                            cwd=session_dir, timeout=30)
+    return result.stdout.strip() or result.stderr.strip()
+
+
+pool = session_workers.SessionWorkerPool(max_workers=4, idle_timeout=300)
+
+
+def check_execute_and_rerun_agree():
+    # /execute_command: one appended line per run
+    incremental = new_session()
+    replies = []
+    pool.run(incremental)
+    for line in LINES:
+        append(incremental, line)
+        replies.append(pool.run(incremental))
+    incremental_log = log(incremental)
+    worker_stdout = pool.workers[str(incremental)].stdout.strip()
+
+    # /rerun_command on the same runner.py
+    rerun = new_session()
+    for line in LINES:
+        append(rerun, line)
+    rerun_output = pool.run(rerun, fresh=True)
+
+    baseline = new_session()
+    for line in LINES:
+        append(baseline, line)
+    baseline_output = python_runner(baseline)
+
+    return (
+        incremental_log == ["a", "b"]            # no replay, stops at 1/0
+        and log(rerun) == ["a", "b"]
+        and log(baseline) == ["a", "b"]
+        and worker_stdout == rerun_output == baseline_output == "a 1\nb 2"
+        and "ZeroDivisionError" in replies[2]
+        and "ZeroDivisionError" in replies[3]     # the line after it never ran
+    )
+
+
+def check_traceback_line_numbers():
+    session_dir = new_session()
+    pool.run(session_dir)
+    for line in LINES[:3]:
+        append(session_dir, line)
+        output = pool.run(session_dir)
+    # 1/0 is runner.py line 5 (two header lines, two commands before it)
+    return 'File "runner.py", line 5' in output and "1/0" in output
+
+
+def check_fd_output_is_kept():
+    session_dir = new_session()
+    pool.run(session_dir)
+    append(session_dir, "import os; os.system('echo from-shell')")
+    return "from-shell" in pool.run(session_dir)
+
+
+tests = [
+    ("/execute_command and /rerun_command stop at the same failing line", check_execute_and_rerun_agree),
+    ("tracebacks use runner.py line numbers", check_traceback_line_numbers),
+    ("fd-level output (os.system) is kept", check_fd_output_is_kept),
+]
+
+passed = 0
+failed = 0
+
+for name, check in tests:
+    try:
+        ok = check()
+        detail = ""
+    except Exception as e:
+        ok = False
+        detail = f"{type(e).__name__}: {e}"
+
+    print("=" * 60)
+    print("TEST    :", name)
+    print("STATUS  :", "PASS" if ok else "FAIL")
+    if detail:
+        print("ERROR   :", detail)
+
+    if ok:
+        passed += 1
+    else:
+        failed += 1
+
+pool.shutdown()
+
+print("\nSUMMARY")
+print("PASS:", passed)
+print("FAIL:", failed)
+sys.exit(1 if failed else 0)
@@ -0,0 +1,153 @@
+import importlib.util
+import struct
+import sys
+import zlib
+from pathlib import Path
+
+# load the renderer by path: it is stdlib-only, while importing it through
+# app.services also imports http_clients, which needs httpx
+RENDERER_PATH = Path(__file__).resolve().parent.parent / "backend/app/services/turtle_renderer.py"
+spec = importlib.util.spec_from_file_location("turtle_renderer", RENDERER_PATH)
+turtle_renderer = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(turtle_renderer)
+
+run_turtle_lines = turtle_renderer.run_turtle_lines
+render_turtle_lines = turtle_renderer.render_turtle_lines
+
+
+def items(screen, kind):
+    return [item for item in screen._items if item[0] == kind]
+
+
+def check_square():
+    lines = ["import turtle", "t1 = turtle.Turtle()"]
+    lines += ["t1.forward(100)", "t1.left(90)"] * 4
+    screen, errors = run_turtle_lines(lines)
+    t1 = screen.turtles()[0]
+    return (
+        errors == []
+        and len(items(screen, "line")) == 4
+        and round(t1.xcor(), 6) == 0 and round(t1.ycor(), 6) == 0
+        and round(t1.heading(), 6) == 0
+    )
+
+
+def check_fill():
+    screen, errors = run_turtle_lines([
+        "t1 = turtle.Turtle()",
+        "t1.fillcolor('red')",
+        "t1.begin_fill()",
+        "t1.forward(50)", "t1.left(120)", "t1.forward(50)", "t1.left(120)", "t1.forward(50)",
+        "t1.end_fill()",
+    ])
+    fills = items(screen, "fill")
+    return errors == [] and len(fills) == 1 and len(fills[0][2]) >= 3 and fills[0][3] == "#ff0000"
+
+
+def check_circle():
+    screen, errors = run_turtle_lines(["t1 = turtle.Turtle()", "t1.circle(50)"])
+    t1 = screen.turtles()[0]
+    return (
+        errors == []
+        and len(items(screen, "line")) > 8
+        and abs(t1.xcor()) < 1e-6 and abs(t1.ycor()) < 1e-6
+    )
+
+
+def check_errors_per_line():
+    screen, errors = run_turtle_lines([
+        "t1 = turtle.Turtle()",
+        "for i in range(4): t1.forward(10)",
+        "__import__('os').system('echo hi')",
+        "t1.forward(100)",
+    ])
+    return (
+        [e["line"] for e in errors] == [2, 3]
+        and "For" in errors[0]["error"]
+        and "__import__" in errors[1]["error"]
+        and len(items(screen, "line")) == 1
+    )
+
+
+def check_out_of_range():
+    lines = ["t1 = turtle.Turtle()", "t1.circle(1e308)", "t1.forward(1e999)", "t1.dot(1e999)", "t1.forward(50)"]
+    screen, errors = run_turtle_lines(lines)
+    png, media_type, png_errors = render_turtle_lines(lines, "png")
+    return (
+        [e["line"] for e in errors] == [2, 3, 4]
+        and all("out of range" in e["error"] for e in errors)
+        and len(items(screen, "line")) == 1
+        and png[:8] == b"\x89PNG\r\n\x1a\n"
+        and png_errors == errors
+    )
+
+
+def check_svg():
+    content, media_type, errors = render_turtle_lines(
+        ["turtle.bgcolor('black')", "t1 = turtle.Turtle()", "t1.pencolor('yellow')", "t1.forward(100)"], "svg"
+    )
+    svg = content.decode("utf-8")
+    return (
+        media_type == "image/svg+xml"
+        and errors == []
+        and svg.startswith("<svg ")
+        and svg.rstrip().endswith("</svg>")
+        and 'fill="#000000"' in svg
+        and "<line " in svg and 'stroke="#ffff00"' in svg
+    )
+
+
+def check_png():
+    content, media_type, errors = render_turtle_lines(["t1 = turtle.Turtle()", "t1.forward(100)"], "png")
+    if media_type != "image/png" or errors or content[:8] != b"\x89PNG\r\n\x1a\n":
+        return False
+    length, chunk_type = struct.unpack("!I4s", content[8:16])
+    data = content[16:16 + length]
+    crc = struct.unpack("!I", content[16 + length:20 + length])[0]
+    width, height, bit_depth, color_type = struct.unpack("!IIBB", data[:10])
+    return (
+        chunk_type == b"IHDR"
+        and length == 13
+        and crc == zlib.crc32(chunk_type + data)
+        and width > 0 and height > 0
+        and bit_depth == 8
+        and content.endswith(b"IEND\xaeB`\x82")
+    )
+
+
+tests = [
+    ("square", check_square),
+    ("fill", check_fill),
+    ("circle", check_circle),
+    ("per-line errors (for loop, __import__)", check_errors_per_line),
+    ("non-finite / huge coordinates are line errors", check_out_of_range),
+    ("svg output", check_svg),
+    ("png signature and IHDR", check_png),
+]
+
+passed = 0
+failed = 0
+
+for name, check in tests:
+    try:
+        ok = check()
+        detail = ""
+    except Exception as e:
+        ok = False
+        detail = f"{type(e).__name__}: {e}"
+
+    print("=" * 60)
+    print("TEST    :", name)
+    print("STATUS  :", "PASS" if ok else "FAIL")
+    if detail:
+        print("ERROR   :", detail)
+
+    if ok:
+        passed += 1
+    else:
+        failed += 1
+
+print("\nSUMMARY")
+print("PASS:", passed)
+print("FAIL:", failed)
+sys.exit(1 if failed else 0)